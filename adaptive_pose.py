@@ -0,0 +1,154 @@
+import os
+
+import cv2
+import numpy as np
+
+import pose_math
+
+# Adaptive inference for the trainer: the pose model runs on a downscaled crop
+# around the athlete (from the previous landmarks), and not at all while the
+# athlete is nearly still. Angles of skipped frames are interpolated once the
+# next inference lands, so rep counting still sees every frame.
+# The Pose stays in MediaPipe's tracking mode (with smoothing), which assumes
+# one continuous video. So the crop is sticky: it only moves when the athlete
+# gets near its edge, and the Pose is reset() whenever the image it sees
+# changes (new crop, or a full-frame search). bench_adaptive_pose's default run
+# uses a stateless stand-in model; the CPU saved with real MediaPipe is only
+# measured when the bench is given recorded clips.
+MOTION_THRESHOLD = float(os.getenv("FLEXA_TRAINER_MOTION_THRESHOLD", "3.0"))  # mean abs gray diff (0-255)
+MAX_SKIP = int(os.getenv("FLEXA_TRAINER_MAX_SKIP", "4"))  # never skip more frames than this in a row
+ROI_MARGIN = 0.25  # padding around the landmark bounding box, as a share of its larger side
+ROI_MAX_SIDE = 384  # crops are downscaled to at most this many pixels on their long side
+MOTION_PROBE = (64, 64)
+MIN_ROI_SIDE = 32
+ROI_EDGE = 0.05  # the crop moves once the landmarks come this close (share of their size) to its edge
+
+
+def _roi_box(points, width, height, margin=ROI_MARGIN):
+    """Padded bounding box (x0, y0, x1, y1) of the landmarks, clipped to the frame."""
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    pad = int(max(x1 - x0, y1 - y0) * margin)
+    return (max(0, int(x0) - pad), max(0, int(y0) - pad),
+            min(width, int(x1) + pad), min(height, int(y1) + pad))
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _usable(box):
+    x0, y0, x1, y1 = box
+    return x1 - x0 >= MIN_ROI_SIDE and y1 - y0 >= MIN_ROI_SIDE
+
+
+class AdaptivePose:
+    """Wraps a (tracking mode) MediaPipe Pose; process(img) returns (points or None, inferred)."""
+
+    def __init__(self, pose, motion_threshold=MOTION_THRESHOLD, max_skip=MAX_SKIP, roi_max_side=ROI_MAX_SIDE):
+        self.pose = pose
+        self.motion_threshold = motion_threshold
+        self.max_skip = max_skip
+        self.roi_max_side = roi_max_side
+        self.last_points = None
+        self.roi = None
+        self.crop = None  # box the model last ran on; the Pose's tracking state belongs to it
+        self.probe = None
+        self.skipped = 0
+        self.stats = {"frames": 0, "inferred": 0, "skipped": 0, "roi": 0, "full": 0, "resets": 0}
+
+    def _probe(self, img):
+        x0, y0, x1, y1 = self.roi
+        small = cv2.resize(img[y0:y1, x0:x1], MOTION_PROBE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def _infer(self, img, box):
+        if box != self.crop:
+            # Tracking state (previous landmarks, smoothing) is in the old crop's coordinates
+            reset = getattr(self.pose, "reset", None)
+            if self.crop is not None:
+                self.stats["resets"] += 1
+                if reset:
+                    reset()
+            self.crop = box
+        x0, y0, x1, y1 = box
+        crop = img[y0:y1, x0:x1]
+        scale = self.roi_max_side / max(crop.shape[:2])
+        if scale < 1:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        results = self.pose.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if not results.pose_landmarks:
+            return None
+        # Landmarks are normalized to the crop, so map them with the crop's original size
+        return pose_math.landmarks_to_array(results.pose_landmarks.landmark, x1 - x0, y1 - y0, offset=(x0, y0))
+
+    def process(self, img):
+        self.stats["frames"] += 1
+        if self.last_points is not None and self.skipped < self.max_skip:
+            motion = float(np.abs(self._probe(img) - self.probe).mean())
+            if motion < self.motion_threshold:
+                self.skipped += 1
+                self.stats["skipped"] += 1
+                return self.last_points, False
+
+        height, width = img.shape[:2]
+        points = None
+        if self.last_points is not None:
+            box = self.crop
+            if box is None or box == (0, 0, width, height) or not _contains(
+                    box, _roi_box(self.last_points, width, height, ROI_EDGE)):
+                box = _roi_box(self.last_points, width, height)
+            points = self._infer(img, box)
+            self.stats["roi"] += points is not None
+        if points is None:
+            # First frame, or the athlete left the crop: look at the whole frame
+            points = self._infer(img, (0, 0, width, height))
+            self.stats["full"] += 1
+        self.stats["inferred"] += 1
+        self.skipped = 0
+        self.last_points = points
+        if points is not None and _usable(_roi_box(points, width, height)):
+            self.roi = _roi_box(points, width, height)
+            self.probe = self._probe(img)
+        else:
+            self.last_points = None  # nothing to track: no skipping or cropping until the athlete is found
+        return points, True
+
+    def summary(self):
+        frames = self.stats["frames"]
+        return {**self.stats, "skip_ratio": round(self.stats["skipped"] / frames, 3) if frames else 0.0}
+
+
+class InterpolatedAngles:
+    """Linear joint-angle fill for skipped frames, released once the next inferred angle arrives.
+
+    Each call passes the frame's timestamp; results are (timestamps, angles) arrays.
+    """
+
+    def __init__(self):
+        self.previous = None
+        self.pending = []  # timestamps of skipped frames waiting for an angle
+
+    def skip(self, seconds):
+        self.pending.append(seconds)
+        return np.empty(0), np.empty(0)
+
+    def infer(self, angle, seconds):
+        """Timestamps and angles for the pending skipped frames plus this one."""
+        times = np.array(self.pending + [seconds], dtype=np.float64)
+        if self.previous is None or not self.pending:
+            angles = np.full(len(times), angle, dtype=np.float64)
+        else:
+            angles = np.linspace(self.previous, angle, len(times) + 1)[1:]
+        self.previous = angle
+        self.pending = []
+        return times, angles
+
+    def flush(self):
+        """Holds the last angle for frames still pending when the session ends."""
+        if self.previous is None:
+            self.pending = []
+            return np.empty(0), np.empty(0)
+        times = np.array(self.pending, dtype=np.float64)
+        self.pending = []
+        return times, np.full(len(times), self.previous)
@@ -3,10 +3,16 @@ import json
 import os
 import matplotlib.pyplot as plt
 import pandas as pd
-import requests
-import google.generativeai as genai
 from dotenv import load_dotenv
 import re 
+import time
+import storage
+import db_cache
+import gemini_stream
+import http_client
+import plan_cache
+import plan_tasks
+import workout_rollups
 
 # Ensure database folder exists
 os.makedirs("./database", exist_ok=True)
@@ -14,73 +20,16 @@ os.makedirs("./database", exist_ok=True)
 # Load environment variables
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+GEMINI_URL = os.getenv("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent")
 
-# Load user profile data
-PROFILE_PATH = "./database/user_profiles.json"
-WORKOUT_HISTORY_PATH = "./database/workout_history.json"
-STREAK_TRACKER_PATH = "./database/streak_tracker.json"
+# Stream plans day by day from streamGenerateContent instead of waiting for the full response
+GEMINI_STREAMING = os.getenv("FLEXA_GEMINI_STREAMING", "1") == "1"
 
+# Bump these whenever the matching prompt changes so cached plans are not reused
+MEAL_PROMPT_VERSION = "meal-v2"
+WORKOUT_PROMPT_VERSION = "workout-v2"
 
-def load_json(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return {}
-    return {}
-
-
-def save_json(file_path, data):
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=4)
-
-
-def generate_plan_with_gemini(prompt):
-    headers = {"Content-Type": "application/json"}
-    data = {"contents": [{"parts": [{"text": prompt}]}]}
-    
-    try:
-        response = requests.post(f"{GEMINI_URL}?key={GEMINI_API_KEY}", json=data, headers=headers)
-
-        if response.status_code != 200:
-            st.error(f"Gemini API Error: {response.status_code} - {response.text}")
-            return "{}"
-
-        response_json = response.json()
-
-        if "candidates" in response_json and response_json["candidates"]:
-            text_response = response_json["candidates"][0]["content"]["parts"][0]["text"]
-            
-            # 🔍 Remove markdown-style triple backticks if present
-            text_response = re.sub(r"```json\s*", "", text_response)  # Remove ```json
-            text_response = re.sub(r"```", "", text_response)  # Remove closing ```
-
-            # 🔍 Ensure valid JSON before returning
-            try:
-                parsed_json = json.loads(text_response)
-                return json.dumps(parsed_json)  # Return properly formatted JSON string
-            except json.JSONDecodeError:
-                st.error("❌ Gemini API returned invalid JSON. Please check output.")
-                st.write("🔍 Raw Response:", text_response)
-                return "{}"
-
-        else:
-            st.warning("⚠️ Gemini API did not return a valid response.")
-            return "{}"
-
-    except requests.exceptions.RequestException as e:
-        st.error(f"❌ Request Exception: {e}")
-        return "{}"
-
-    except json.JSONDecodeError as e:
-        st.error(f"❌ JSON Decode Error: {e}")
-        return "{}"
-
-
-def generate_meal_plan():
-    prompt = """
+MEAL_PLAN_PROMPT = """
     Generate a **5-day healthy meal plan** in **strict JSON format only** with the following structure:
 
     {
@@ -103,19 +52,7 @@ def generate_meal_plan():
     - Ensure all keys are days of the week, and each contains "Breakfast", "Lunch", "Snack", and "Dinner".
     """
 
-    response = generate_plan_with_gemini(prompt)
-    
-    try:
-        return json.loads(response)  # Ensure response is valid JSON
-    except json.JSONDecodeError:
-        st.error("❌ Gemini API returned invalid JSON for Meal Plan.")
-        st.write("🔍 Raw Response:", response)
-        return {}
-
-
-
-def generate_workout_plan():
-    prompt = """
+WORKOUT_PLAN_PROMPT = """
     Generate a **5-day workout plan** in **strict JSON format only** with this structure:
 
     {
@@ -132,15 +69,93 @@ def generate_workout_plan():
     - The response **MUST** be **valid JSON only**.
     """
 
-    response = generate_plan_with_gemini(prompt)
+PROFILE_LABELS = {
+    "goal": "Fitness goal",
+    "activity_level": "Activity level",
+    "weight": "Weight (kg)",
+    "dietary_restrictions": "Dietary restrictions",
+}
+
+# Storage collections used by analytics
+PROFILES = "user_profiles"
+WORKOUT_HISTORY = "workout_history"
+STREAK_TRACKER = "streak_tracker"
 
-    try:
-        return json.loads(response)  # Ensure response is valid JSON
-    except json.JSONDecodeError:
-        st.error("❌ Gemini API returned invalid JSON for Workout Plan.")
-        st.write("🔍 Raw Response:", response)
-        return {}
 
+def load_json(name):
+    return storage.load_document(name)
+
+
+def save_json(name, data):
+    storage.save_document(name, data)
+
+
+def current_profile(user_profiles):
+    """The most recently created profile (the app has no login, so that's the active user)."""
+    if not user_profiles:
+        return None
+    return user_profiles[max(user_profiles, key=lambda user_id: int(user_id) if str(user_id).isdigit() else -1)]
+
+
+def personalize_prompt(prompt, profile, fields):
+    """Appends the user's profile fields to a plan prompt (the prompt is unchanged without a profile)."""
+    if not profile:
+        return prompt
+    lines = []
+    for field in fields:
+        value = profile.get(field)
+        if field == "dietary_restrictions":
+            value = str(value or "").strip() or "None"
+        if value not in (None, ""):
+            lines.append(f"    - {PROFILE_LABELS[field]}: {value}")
+    if not lines:
+        return prompt
+    return prompt + "\n    **Tailor the plan to this person:**\n" + "\n".join(lines) + "\n"
+
+
+def plan_prompt(kind, profile=None):
+    """The meal / workout plan prompt, personalised for profile."""
+    return personalize_prompt(PLAN_SECTIONS[kind][1], profile, plan_cache.PROFILE_FIELDS[kind])
+
+
+def plan_key(kind, profile):
+    """Plan cache key for this kind of plan and profile."""
+    return plan_cache.make_key(kind, profile, PLAN_SECTIONS[kind][2])
+
+
+def fetch_plan(prompt, ctx=None, stream=False, timeout=None):
+    """Generates a plan without touching Streamlit, so it can run on a worker thread.
+
+    ctx is the plan_tasks.TaskContext when run as a task. With stream, the
+    plan is streamed and ctx.emit("day", (day, value)) is called as each day
+    completes; without it, cancellation is checked before and after the
+    request. Raises ValueError on API errors and invalid JSON.
+    """
+    data = {"contents": [{"parts": [{"text": prompt}]}]}
+    request_timeout = (http_client.CONNECT_TIMEOUT, timeout) if timeout else None
+    if ctx and stream:
+        stream = gemini_stream.GeminiJsonStream(GEMINI_URL, GEMINI_API_KEY, data, timeout=request_timeout)
+        for kind, day, value in stream:
+            if kind == "member":
+                ctx.emit("day", (day, value))
+        if not isinstance(stream.result, dict):
+            raise ValueError(f"Gemini API returned invalid JSON: {stream.raw_text[:300]}")
+        ctx.emit("metrics", {"time_to_first_item": stream.time_to_first_item, "total_time": stream.total_time})
+        return stream.result
+
+    if ctx:
+        ctx.check()
+    response = http_client.post(f"{GEMINI_URL}?key={GEMINI_API_KEY}", json=data, endpoint="gemini:generateContent",
+                                retries=http_client.RETRIES, timeout=request_timeout)
+    if ctx:
+        ctx.check()  # timed out or cancelled while waiting: drop the response
+    if response.status_code != 200:
+        raise ValueError(f"Gemini API Error: {response.status_code} - {response.text}")
+    candidates = response.json().get("candidates")
+    if not candidates:
+        raise ValueError("Gemini API did not return a valid response.")
+    text_response = re.sub(r"```(json)?\s*", "", candidates[0]["content"]["parts"][0]["text"])
+    return json.loads(text_response)
 
 
 def get_cheapest_shopping_links():
@@ -172,65 +187,130 @@ def display_calendar(meal_plan, workout_plan, streak_tracker):
         st.session_state.streak_tracker[day] = checked
     
     streak_score = sum(1 for day in days if st.session_state.streak_tracker.get(day, False))
-    save_json(STREAK_TRACKER_PATH, st.session_state.streak_tracker)
+    save_json(STREAK_TRACKER, st.session_state.streak_tracker)
     
     st.write(f"🔥 **Current Streak Score:** {streak_score} days")
     
     calendar_df = pd.DataFrame({
         "Day": days,
-        "Breakfast": [meal_plan[day]["Breakfast"] for day in days],
-        "Lunch": [meal_plan[day]["Lunch"] for day in days],
-        "Snack": [meal_plan[day]["Snack"] for day in days],
-        "Dinner": [meal_plan[day]["Dinner"] for day in days],
-        "Workout": [workout_plan[day] for day in days]
+        "Breakfast": [meal_plan[day].get("Breakfast", "") for day in days],
+        "Lunch": [meal_plan[day].get("Lunch", "") for day in days],
+        "Snack": [meal_plan[day].get("Snack", "") for day in days],
+        "Dinner": [meal_plan[day].get("Dinner", "") for day in days],
+        "Workout": [workout_plan.get(day, "") for day in days]  # plans that timed out can be missing days
     })
     st.dataframe(calendar_df)
 
 
-def display_graphs(workout_history):
-    df = pd.DataFrame(workout_history)
+def display_graphs(exercise=None, points=workout_rollups.CHART_POINTS):
+    """Progress charts from the daily / weekly workout rollups, so render time doesn't grow with history."""
+    period, df = workout_rollups.chart_frame(exercise, points=points)
     if df.empty:
         st.warning("No workout data available.")
         return
     
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("timestamp")
-    
     # Calories burnt over time
     fig, ax = plt.subplots()
-    ax.plot(df["timestamp"], df["calories"], marker="o", linestyle="-", label="Calories Burnt")
-    ax.set_xlabel("Date")
+    ax.plot(df.index, df["calories"], marker="o", linestyle="-", label="Calories Burnt")
+    ax.set_xlabel(period)
     ax.set_ylabel("Calories Burnt")
-    ax.set_title("Calories Burnt Over Time")
+    ax.set_title(f"Calories Burnt per {period}")
     ax.legend()
     st.pyplot(fig)
     
     # Exercise score trend
     fig, ax = plt.subplots()
-    ax.plot(df["timestamp"], df["score"], marker="s", linestyle="--", color="green", label="Exercise Score")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Form Score (%)")
+    ax.plot(df.index, df["score"], marker="s", linestyle="--", color="green", label="Exercise Score")
+    ax.set_xlabel(period)
+    ax.set_ylabel("Average Form Score (%)")
     ax.set_title("Exercise Score Progress")
     ax.legend()
     st.pyplot(fig)
 
-def main():
+# kind -> (section title, base prompt, prompt version, table columns)
+PLAN_SECTIONS = {
+    "meal": ("🥗 Meal Plan", MEAL_PLAN_PROMPT, MEAL_PROMPT_VERSION, None),
+    "workout": ("🏋️ Workout Plan", WORKOUT_PLAN_PROMPT, WORKOUT_PROMPT_VERSION, ["Workout"]),
+}
+
+
+def generate_plans(kinds, stream=GEMINI_STREAMING, timeout=plan_tasks.TIMEOUT_SECONDS, profile=None):
+    """Generates several plans at once; returns ({kind: plan}, {kind: status}).
+
+    Each plan gets its own section, filled in day by day as the workers
+    stream them back. A plan that fails or times out keeps the days that
+    already arrived (status "error" / "timeout"), so they can be shown but not cached.
+    """
+    placeholders, partial = {}, {}
+    for kind in kinds:
+        title, _, _, columns = PLAN_SECTIONS[kind]
+        st.subheader(title)
+        placeholders[kind] = st.empty()
+        partial[kind] = {}
+
+    def on_event(kind, event, value):
+        title, _, _, columns = PLAN_SECTIONS[kind]
+        if event == "day":
+            day, plan = value
+            partial[kind][day] = plan
+            placeholders[kind].dataframe(pd.DataFrame.from_dict(partial[kind], orient="index", columns=columns))
+        elif event == "metrics":
+            st.caption(f"⚡ {title}: first day in {value['time_to_first_item'] or 0:.2f}s | "
+                       f"full plan in {value['total_time']:.2f}s")
+        elif event == "error":
+            st.error(f"❌ {title} could not be generated: {value}")
+        elif event == "timeout":
+            st.warning(f"⏱️ {title} took longer than {timeout:.0f}s, showing the {len(partial[kind])} days that arrived.")
+
+    def task(kind):
+        prompt = plan_prompt(kind, profile)
+        return lambda ctx: fetch_plan(prompt, ctx, stream, timeout)
+
+    start = time.perf_counter()
+    results, status = plan_tasks.run({kind: task(kind) for kind in kinds}, on_event, timeout)
+    plans = {kind: results[kind] if status[kind] == "done" else partial[kind] for kind in kinds}
+    for kind in kinds:
+        if status[kind] == "done" and not stream:
+            title, _, _, columns = PLAN_SECTIONS[kind]
+            placeholders[kind].dataframe(pd.DataFrame.from_dict(plans[kind], orient="index", columns=columns))
+    st.caption(f"⚡ {len(kinds)} plan(s) generated in parallel in {time.perf_counter() - start:.2f}s")
+    return plans, status
+
+
+def cached_plans(profile, stream=GEMINI_STREAMING, refresh=False):
+    """Meal and workout plans for this profile from the plan cache, generating only what's missing or expired."""
+    keys = {kind: plan_key(kind, profile) for kind in PLAN_SECTIONS}
+    entries = {kind: None if refresh else plan_cache.get(key) for kind, key in keys.items()}
+    plans = {kind: entry["plan"] for kind, entry in entries.items() if entry is not None}
+    missing = [kind for kind in PLAN_SECTIONS if kind not in plans]
+    if missing:
+        generated, status = generate_plans(missing, stream, profile=profile)
+        for kind in missing:
+            plans[kind] = generated[kind]
+            if status[kind] == "done":  # partial plans are shown, never cached
+                plan_cache.put(keys[kind], kind, generated[kind], PLAN_SECTIONS[kind][2])
+    else:
+        age_hours = (time.time() - min(entry["created_at"] for entry in entries.values())) / 3600
+        st.caption(f"⚡ Saved plans from {age_hours:.1f} h ago, no FlexAI call needed. Regenerate for fresh ideas.")
+    return plans["meal"], plans["workout"]
+
+
+def main(stream=GEMINI_STREAMING, refresh=False):
     with st.spinner('⏳ Flexa is curating a customized plan for you...'):
-        user_profiles = load_json(PROFILE_PATH)
-        workout_history = load_json(WORKOUT_HISTORY_PATH)
-        streak_tracker = load_json(STREAK_TRACKER_PATH)
+        user_profiles = db_cache.load_document(PROFILES)
+        streak_tracker = dict(db_cache.load_document(STREAK_TRACKER))  # copied: edited in session_state
 
         if not user_profiles:
             st.error("No user profiles found. Please create your profile in 'Me, Myself & Flex'.")
         else:
             st.title("🥑 Munch & Crunch - Personalized Lifestyle Plan")
-            meal_plan = generate_meal_plan()
-            workout_plan = generate_workout_plan()
+            refresh = st.button("🔄 Regenerate my plan") or refresh
+            meal_plan, workout_plan = cached_plans(current_profile(user_profiles), stream, refresh)
 
             display_calendar(meal_plan, workout_plan, streak_tracker)
 
             st.subheader("📊 Your Progress")
-            display_graphs(workout_history)
+            display_graphs()
 
             st.success("Your customized 5-day meal & workout plan is ready! 🥗💪")
 
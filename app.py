@@ -3,13 +3,20 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import json
 import os
-import requests
+import datetime
 from streamlit_lottie import st_lottie
 from dotenv import load_dotenv
-from bill import process_bill
-from stripe_payment import process_payment, get_payment_history
-from trainer import track_exercise
-from analytics import main
+from bill import process_bill, stream_bill, resolve_engine
+import storage
+import db_cache
+import http_client
+import lottie_assets
+import pose_pool
+import score_series
+import exercise_profiles
+import bill_store
+import extraction_cache
+import columnar_export
 import subprocess
 import uuid
 
@@ -76,64 +83,59 @@ def simulate_sol_payment(amount_sol, recipient_address):
     except Exception as e:
         return {"success": False, "message": f"Simulated SOL payment failed: {e}"}
 
-# Load transactions from transaction json file
+# Load transactions from the storage layer
 def load_transactions():
-    transactions_path = "./database/bundlr_transactions.json"
-    if os.path.exists(transactions_path):
-        with open(transactions_path, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return []
-    return []
-
-# Save transactions
-def save_transactions(transactions):
-    transactions_path = "./database/bundlr_transactions.json"
-    with open(transactions_path, "w") as file:
-        json.dump(transactions, file, indent=4)
+    return storage.load_records("bundlr_transactions")
+
+# Save a single transaction (appends, never rewrites the history)
+def save_transaction(transaction):
+    storage.append_record("bundlr_transactions", transaction)
+
+# Collections "Upload your Lifestyle" sends, read through the storage layer
+# so the payload is the same whichever backend (and on-disk layout) is in use
+LIFESTYLE_COLLECTIONS = {
+    "user_profiles": storage.load_document,
+    "streak_tracker": storage.load_document,
+    "workout_history": storage.load_records,
+    "payment_history": storage.load_records,
+    "bundlr_transactions": storage.load_records,
+}
+
+def load_lifestyle():
+    """{collection: data} for the Bundlr upload, bills included; empty collections are left out."""
+    lifestyle = {name: load(name) for name, load in LIFESTYLE_COLLECTIONS.items()}
+    lifestyle["bills"] = bill_store.all_bills()
+    return {name: data for name, data in lifestyle.items() if data}
 
 # Function to load existing user data
 def load_user_data():
-    file_path = "./database/user_profiles.json"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    return db_cache.load_document("user_profiles")
 
 # Function to save user data
 def save_user_data(user_data):
-    file_path = "./database/user_profiles.json"
-    
-    existing_data = load_user_data()
-    
-    # Auto-increment user ID
-    new_user_id = len(existing_data) + 1
-    existing_data[new_user_id] = user_data
-    
-    with open(file_path, "w") as file:
-        json.dump(existing_data, file, indent=4)
+    # Auto-increment user ID (allocated under a lock, safe across sessions)
+    new_user_id = storage.next_id("user_profiles")
+    storage.set_item("user_profiles", new_user_id, user_data)
     
     return new_user_id
-# --- Function to Fetch Lottie Animations ---
-def load_lottie_url(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
 # --- Lottie Animations ---
-splitwise_animation = load_lottie_url("https://lottie.host/9e72d50f-9219-4e27-970c-95d7d604d1ba/3BNR1SE38T.json")
-girl_1T = load_lottie_url("https://lottie.host/e4d68804-020b-493d-ac54-cb23ae9164c2/45Oof5ee2s.json")
-posture = load_lottie_url("https://lottie.host/76c6d628-9e39-4099-b55d-27b5489ee557/q1GGTjMa0O.json")
-death_dancing = load_lottie_url("https://lottie.host/5f97f66c-b96a-493c-9d98-e61c49fce1b3/AEZhJ3cU05.json")
-monkey_meme = load_lottie_url("https://lottie.host/16250878-84bd-4217-87ef-fdd7e07f29fd/aZqhphCqwO.json")
-shopping = load_lottie_url("https://lottie.host/cc901e2f-dcdf-4d82-bbb8-6779edf048ab/oP1M0GjOLV.json")
-cat_meme = load_lottie_url("https://lottie.host/897fe626-fb4d-45a0-9168-896307e53c83/IdPpNgiPtJ.json")
-auth = load_lottie_url("https://lottie.host/347edf77-cab1-4bcd-bd40-1d41ac914957/o8OfUiv8cc.json")
+# Served from memory on reruns; cold starts read the disk cache / bundled copies
+# and only go to the network (concurrently) for animations with no local copy.
+animations = lottie_assets.load_all()
+splitwise_animation = animations["splitwise_animation"]
+girl_1T = animations["girl_1T"]
+posture = animations["posture"]
+death_dancing = animations["death_dancing"]
+monkey_meme = animations["monkey_meme"]
+shopping = animations["shopping"]
+cat_meme = animations["cat_meme"]
+auth = animations["auth"]
+
+
+def show_lottie(animation, **kwargs):
+    """st_lottie, skipped when an animation is unavailable (offline with no cached or bundled copy)."""
+    if animation is not None:
+        st_lottie(animation, **kwargs)
 
 
 # --- Sidebar ---
@@ -149,7 +151,7 @@ section = st.sidebar.radio("Select a Section:", [
 # Add a space before pet animation for better positioning
 st.sidebar.markdown("<br>", unsafe_allow_html=True)
 with st.sidebar:
-    st_lottie(monkey_meme, height=200, key="keto_pet")
+    show_lottie(monkey_meme, height=200, key="keto_pet")
 
 # --- Main Page ---
 # st.title("**Welcome to Flexa!** 🚀")
@@ -213,23 +215,20 @@ if section == "📝 Me, Myself & Flex":
             
             upload_results = [] # Store results in file, status, id
 
-            for filename in os.listdir("./database"):
-                if filename.endswith(".json"):
-                    file_path = os.path.join("./database", filename)
-                    try:
-                        with open(file_path, "r") as file:
-                            json_data = json.load(file)
+            for filename, json_data in load_lifestyle().items():
+                try:
+                    json.dumps(json_data)  # the payload upload_to_bundlr would send
 
-                        # Upload file name
-                        st.info(f"Uploading {filename}...")
+                    # Upload collection name
+                    st.info(f"Uploading {filename}...")
 
-                        #For DEMO
-                        transaction_id = f"{filename}_{len(upload_results)}" #Fake transaction_id
+                    #For DEMO
+                    transaction_id = f"{filename}_{len(upload_results)}" #Fake transaction_id
 
-                        # Create upload results with demo values
-                        upload_results.append({"filename": filename, "status": "Success!", "transaction_id": transaction_id})
-                    except Exception as e:
-                        upload_results.append({"filename": filename, "status": f"Error Processing JSON: {e}", "transaction_id": "N/A"})
+                    # Create upload results with demo values
+                    upload_results.append({"filename": filename, "status": "Success!", "transaction_id": transaction_id})
+                except Exception as e:
+                    upload_results.append({"filename": filename, "status": f"Error Processing JSON: {e}", "transaction_id": "N/A"})
 
             # Display the table of the status results
             df = pd.DataFrame(upload_results)
@@ -238,12 +237,10 @@ if section == "📝 Me, Myself & Flex":
 
             st.success("Finished uploading all JSON files.")
 
-            # Load and save transactions on the blockchain
-            transactions = load_transactions() # Load existing transactions
+            # Save transactions on the blockchain
             for index, row in df.iterrows():
                 if row["status"]=="Success!": # Save transactions when they say sucess
-                    transactions.append({"filename": row["filename"], "transaction_id": row["transaction_id"]}) # Add
-                    save_transactions(transactions) # Save
+                    save_transaction({"filename": row["filename"], "transaction_id": row["transaction_id"]}) # Append
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
@@ -257,41 +254,58 @@ elif section == "💪 Flexa-Tron 3000":
         st.sidebar.info("This AI trainer doesn’t just lift weights, it lifts your fitness game")
 
         # Select exercise and number of reps
-        exercise_options = ["Bicep Curls", "Yoga", "pilates", "Squats", "Push-ups", "Lunges", "Deadlifts", "Planks", "Bench Press"]
+        exercise_options = list(exercise_profiles.PROFILES)
         selected_exercise = st.selectbox("🏋️ Choose an Exercise:", exercise_options)
         
         rep_count = st.number_input("🔢 Number of Reps:", min_value=1, step=1, value=10)
+        tracking_modes = {"⚡ Fast": 0, "⚖️ Balanced": 1, "🎯 Precise": 2}  # MediaPipe model complexity
+        tracking_mode = st.select_slider("🎯 Tracking Accuracy:", options=list(tracking_modes), value="⚖️ Balanced")
 
         # Start Workout Button
         if st.button("🎥 Start Workout"):
             with st.spinner("Tracking your workout..."):
-                result = track_exercise(selected_exercise, rep_count)
+                from trainer import track_exercise  # cv2 + MediaPipe load on first workout only
+                result = track_exercise(selected_exercise, rep_count,
+                                        pose_config=pose_pool.PoseConfig(model_complexity=tracking_modes[tracking_mode]))
 
             if result["success"]:
                 st.success(f"✅ Workout Completed: {result['reps']} reps | Calories Burned: {result['calories']} kcal")
                 st.image(result["chart_path"], caption="📈 Form Score Chart", use_container_width=True)
+                pipeline_stats = result["pipeline"]
+                st.caption(f"🎥 {pipeline_stats['render']['fps']} fps | inference {pipeline_stats['inference']['avg_ms']} ms/frame | "
+                           f"latency p95 {pipeline_stats['latency_p95_ms']} ms | {pipeline_stats['dropped_frames']} frames skipped")
             else:
                 st.error(result["message"])
 
         # 📜 Display Workout History
         st.subheader("📜 Workout History")
 
-        # Load workout history from JSON
-        workout_history_path = "./database/workout_history.json"
-        
-        if os.path.exists(workout_history_path):
-            with open(workout_history_path, "r") as file:
-                workout_history = json.load(file)
-
-            if workout_history:
-                df = pd.DataFrame(workout_history)
-                df = df[["timestamp", "exercise_name", "reps", "score", "calories"]]  
-                st.dataframe(df)
-            else:
-                st.info("📂 No past workouts found.")
+        # Reads only these columns, for the chosen period and exercises, from the month-partitioned Parquet copy
+        history_periods = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All time": None}
+        history_period = st.selectbox("🗓️ Show workouts from:", list(history_periods), index=1)
+        history_exercises = st.multiselect("🏋️ Only these exercises:", exercise_options)
+        history_days = history_periods[history_period]
+        df = columnar_export.query(
+            "workout_history", columns=["timestamp", "exercise_name", "reps", "score", "calories", "series_id"],
+            start=(datetime.date.today() - datetime.timedelta(days=history_days)).isoformat() if history_days else None,
+            exercise_name=history_exercises or None,
+        )
+
+        if not df.empty:
+            st.dataframe(df.drop(columns="series_id"))
+
+            # 📈 Form score of a past session, from its saved series (no video replay)
+            charted = df.dropna(subset=["series_id"])
+            if not charted.empty:
+                session = st.selectbox("📈 Form score over a session:", charted.index[::-1],
+                                       format_func=lambda i: f"{charted.at[i, 'timestamp']} · {charted.at[i, 'exercise_name']}")
+                times, scores = score_series.chart_points(charted.at[session, "series_id"])
+                st.line_chart(pd.DataFrame({"Form score": scores}, index=pd.Index(times, name="Seconds")))
+        else:
+            st.info("📂 No past workouts found.")
 
     with col2:
-        st_lottie(girl_1T, height=300, key="posture")# Display posture animation
+        show_lottie(girl_1T, height=300, key="posture")# Display posture animation
 
 elif section == "🥑 Munch & Crunch":
     col1, col2 = st.columns([2, 1])
@@ -301,11 +315,15 @@ elif section == "🥑 Munch & Crunch":
         st.write("*Diet so good, even Gordon Ramsay won’t yell at you!* 🍔🥗")
         st.sidebar.info("You’re just one salad away from a flex-worthy diet! 🥗")
 
+        # Stays on across reruns (e.g. ticking a day in the calendar); plans come from the plan cache
         if st.button("Build my lifestyle with FlexAI", type="primary"):
+            st.session_state.show_lifestyle_plan = True
+        if st.session_state.get("show_lifestyle_plan"):
+            from analytics import main  # loaded on first use to keep cold start fast
             main()  # Calls the function from analytics.py
 
     with col2:
-        st_lottie(shopping, height=300, key="shopping")
+        show_lottie(shopping, height=300, key="shopping")
 
 elif section == "💸 Flexa":
     col1, col2 = st.columns([2, 1])
@@ -318,157 +336,182 @@ elif section == "💸 Flexa":
         uploaded_file = st.file_uploader("📄 Upload your bill image", type=["png", "jpg", "jpeg"])
 
         if uploaded_file:
+            engine_options = {"FlexAI (Gemini)": "gemini", "Offline OCR (on device)": "local"}
+            engine_label = st.radio("🧠 Extraction engine", list(engine_options), horizontal=True,
+                                    index=list(engine_options.values()).index(resolve_engine()))
+            stream_items = st.checkbox("⚡ Show items as they are extracted", value=True)
             process_button = st.button("🧾 Process Bill with FlexAI", type="primary")
 
             if process_button:
                 with st.spinner("Processing bill..."):
-                    structured_data = process_bill(uploaded_file)
+                    if stream_items:
+                        # Render line items as Gemini streams them in
+                        items_placeholder = st.empty()
+                        streamed_items = []
+                        structured_data = None
+                        for kind, value in stream_bill(uploaded_file, engine=engine_options[engine_label]):
+                            if kind == "item":
+                                streamed_items.append(value)
+                                items_placeholder.dataframe(pd.DataFrame(streamed_items))
+                            elif kind == "metrics":
+                                st.caption(f"⚡ First item in {value['time_to_first_item'] or 0:.2f}s | full bill in {value['total_time']:.2f}s")
+                            elif kind == "bill":
+                                structured_data = value
+                    else:
+                        structured_data = process_bill(uploaded_file, engine=engine_options[engine_label])
 
                     if structured_data:
                         st.success("Bill processed successfully! 🎉")
-                        with open("./database/bill_data.json", "w") as json_file:
-                            json.dump(structured_data, json_file, indent=4)
-
-    # Load bill data if available
-    bill_data_path = "./database/bill_data.json"
-    if os.path.exists(bill_data_path):
-        with open(bill_data_path, "r") as file:
-            bill_data = json.load(file)
-
-        if bill_data:
-            st.subheader(f"💰 Split Bill: {bill_data['bill_id']} - {bill_data['bill_name']}")
-
-            # Step 1: Choose Split Type
-            split_type = st.radio("📊 How do you want to split?", ["Split Equally", "Customize"])
-
-            if split_type == "Split Equally":
-                # Step 2: Split Bill Equally
-                users = ["Kayla", "Nandan", "Deepak", "Lily"]
-                
-                # ✅ Calculate total bill including taxes
-                total_amount = sum(item["price"] * item["quantity"] for item in bill_data["items"]) 
-                total_amount += sum(tax["amount"] for tax in bill_data["taxes"])  # ✅ Fixed tax sum
-
-                equal_split = round(total_amount / len(users), 2)
-
-                split_result = {user: equal_split for user in users}
+                        st.session_state.selected_bill_id = structured_data["bill_id"]
+
+            # FlexAI extraction cache counters
+            cache_stats = extraction_cache.stats()
+            st.caption(f"⚡ FlexAI cache: {cache_stats['hits']} hits | {cache_stats['misses']} misses | {cache_stats['evictions']} evictions")
+
+    # Pick a bill from the store; only the selected bill's items are loaded
+    bill_page_size = 20
+    bill_headers, bill_count = bill_store.list_bills(page=st.session_state.get("bill_page", 1), page_size=bill_page_size)
+    bill_data = None
+    if bill_headers:
+        if bill_count > bill_page_size:
+            st.number_input("📚 Bills page", min_value=1, max_value=-(-bill_count // bill_page_size), step=1, key="bill_page")
+
+        bill_labels = {header["bill_id"]: f"#{header['bill_id']} - {header['bill_name']} ({header['date']}, ${header['total']})" for header in bill_headers}
+        bill_ids = list(bill_labels)
+        selected_bill_id = st.session_state.get("selected_bill_id")
+        selected_bill_id = st.selectbox("🧾 Choose a bill", bill_ids, format_func=bill_labels.get,
+                                        index=bill_ids.index(selected_bill_id) if selected_bill_id in bill_ids else 0)
+        bill_data = bill_store.load_bill(selected_bill_id)
+
+    if bill_data:
+        st.subheader(f"💰 Split Bill: {bill_data['bill_id']} - {bill_data['bill_name']}")
+
+        # Step 1: Choose Split Type
+        split_type = st.radio("📊 How do you want to split?", ["Split Equally", "Customize"])
+
+        if split_type == "Split Equally":
+            # Step 2: Split Bill Equally
+            users = ["Kayla", "Nandan", "Deepak", "Lily"]
+            
+            # ✅ Calculate total bill including taxes
+            total_amount = sum(item["price"] * item["quantity"] for item in bill_data["items"]) 
+            total_amount += sum(tax["amount"] for tax in bill_data["taxes"])  # ✅ Fixed tax sum
 
-                st.subheader("💰 Equal Split Breakdown")
-                st.write(f"Each person owes: **${equal_split}**")
-                st.json(split_result)
+            equal_split = round(total_amount / len(users), 2)
 
-                # ✅ Display Graph for Equal Split
-                fig, ax = plt.subplots()
-                ax.bar(split_result.keys(), split_result.values(), color=['blue', 'green', 'red', 'purple'])
-                ax.set_ylabel("Amount ($)")
-                ax.set_title("Equal Bill Split Per Person")
-                st.pyplot(fig)
+            split_result = {user: equal_split for user in users}
 
-                # ✅ Show in table format
-                df = pd.DataFrame.from_dict(split_result, orient="index", columns=["Amount Owed"])
-                st.table(df)
+            st.subheader("💰 Equal Split Breakdown")
+            st.write(f"Each person owes: **${equal_split}**")
+            st.json(split_result)
 
-            else:
-                # Ensure payment history file exists
-                os.makedirs("./database", exist_ok=True)
-                payment_history_path = "./database/payment_history.json"
+            # ✅ Display Graph for Equal Split
+            fig, ax = plt.subplots()
+            ax.bar(split_result.keys(), split_result.values(), color=['blue', 'green', 'red', 'purple'])
+            ax.set_ylabel("Amount ($)")
+            ax.set_title("Equal Bill Split Per Person")
+            st.pyplot(fig)
 
-                if not os.path.exists(payment_history_path):
-                    with open(payment_history_path, "w") as file:
-                        json.dump([], file, indent=4)
+            # ✅ Show in table format
+            df = pd.DataFrame.from_dict(split_result, orient="index", columns=["Amount Owed"])
+            st.table(df)
 
-                # Step 2: Select users who participated
-                users = ["Kayla", "Nandan", "Deepak", "Lily"]
-                selected_users = st.multiselect("👥 Who ate this bill?", users)
+        else:
+            # Step 2: Select users who participated
+            users = ["Kayla", "Nandan", "Deepak", "Lily"]
+            selected_users = st.multiselect("👥 Who ate this bill?", users)
+            if selected_users != bill_data.get("participants", []):
+                bill_store.set_participants(bill_data["bill_id"], selected_users)
 
-                if selected_users:
-                    st.subheader("🍽 Assign Items & Share")
-                    item_options = {item["item_name"]: (item["price"], item["quantity"]) for item in bill_data["items"]}
+            if selected_users:
+                st.subheader("🍽 Assign Items & Share")
+                item_options = {item["item_name"]: (item["price"], item["quantity"]) for item in bill_data["items"]}
 
-                    # ✅ Calculate total bill before assignments
-                    total_amount = sum(item["price"] * item["quantity"] for item in bill_data["items"]) 
-                    remaining_amount = total_amount  # Track unassigned amount
+                # ✅ Calculate total bill before assignments
+                total_amount = sum(item["price"] * item["quantity"] for item in bill_data["items"]) 
+                remaining_amount = total_amount  # Track unassigned amount
 
-                    user_shares = {}
+                user_shares = {}
 
-                    for user in selected_users:
-                        st.write(f"👤 **{user}**")
-                        selected_item = st.selectbox(f"Item for {user}", list(item_options.keys()), key=f"{user}_item")
-                        max_percentage = item_options[selected_item][1] * 100  # Max % based on item quantity
+                for user in selected_users:
+                    st.write(f"👤 **{user}**")
+                    selected_item = st.selectbox(f"Item for {user}", list(item_options.keys()), key=f"{user}_item")
+                    max_percentage = item_options[selected_item][1] * 100  # Max % based on item quantity
 
-                        share = st.number_input(
-                            f"{user}'s % share", min_value=0, max_value=max_percentage, step=1, key=f"{user}_share"
-                        )
+                    share = st.number_input(
+                        f"{user}'s % share", min_value=0, max_value=max_percentage, step=1, key=f"{user}_share"
+                    )
 
-                        user_shares[user] = {"item": selected_item, "share": share}
-                        item_price = item_options[selected_item][0] * (share / 100)  # Calculate user’s portion
+                    user_shares[user] = {"item": selected_item, "share": share}
+                    item_price = item_options[selected_item][0] * (share / 100)  # Calculate user’s portion
 
-                        remaining_amount -= item_price  # ✅ Deduct assigned amount
+                    remaining_amount -= item_price  # ✅ Deduct assigned amount
 
-                    # Display remaining amount dynamically
-                    st.subheader(f"💰 Remaining Amount: **${round(remaining_amount, 2)}**")
+                # Display remaining amount dynamically
+                st.subheader(f"💰 Remaining Amount: **${round(remaining_amount, 2)}**")
 
-                    # Ensure all items are accounted for
-                    if remaining_amount > 0:
-                        st.warning("⚠ Some items are unassigned! Ensure all are accounted for.")
+                # Ensure all items are accounted for
+                if remaining_amount > 0:
+                    st.warning("⚠ Some items are unassigned! Ensure all are accounted for.")
 
-                    # Step 3: Tax Splitting Option
-                    tax_split_method = st.radio("🧾 Split Taxes & Tips:", ["Equally", "Proportionally"])
+                # Step 3: Tax Splitting Option
+                tax_split_method = st.radio("🧾 Split Taxes & Tips:", ["Equally", "Proportionally"])
 
-                    # Calculate Split
-                    if st.button("💸 Calculate Split"):
-                        total_taxes = sum(tax["amount"] for tax in bill_data["taxes"])  # ✅ Fixed tax sum issue
-                        split_result = {}
+                # Calculate Split
+                if st.button("💸 Calculate Split"):
+                    total_taxes = sum(tax["amount"] for tax in bill_data["taxes"])  # ✅ Fixed tax sum issue
+                    split_result = {}
 
-                        for user, data in user_shares.items():
-                            item_cost = item_options[data["item"]][0] * (data["share"] / 100)
+                    for user, data in user_shares.items():
+                        item_cost = item_options[data["item"]][0] * (data["share"] / 100)
 
-                            if tax_split_method == "Equally":
-                                user_taxes = total_taxes / len(selected_users)
-                            else:
-                                user_taxes = (item_cost / total_amount) * total_taxes
+                        if tax_split_method == "Equally":
+                            user_taxes = total_taxes / len(selected_users)
+                        else:
+                            user_taxes = (item_cost / total_amount) * total_taxes
 
-                            split_result[user] = round(item_cost + user_taxes, 2)
+                        split_result[user] = round(item_cost + user_taxes, 2)
 
-                        st.subheader("💰 Final Split Breakdown")
-                        st.json(split_result)
+                    st.subheader("💰 Final Split Breakdown")
+                    st.json(split_result)
 
-                        # ✅ Display Graph for Custom Split
-                        fig, ax = plt.subplots()
-                        ax.bar(split_result.keys(), split_result.values(), color=['blue', 'green', 'red', 'purple'])
-                        ax.set_ylabel("Amount ($)")
-                        ax.set_title("Custom Bill Split Per Person")
-                        st.pyplot(fig)
+                    # ✅ Display Graph for Custom Split
+                    fig, ax = plt.subplots()
+                    ax.bar(split_result.keys(), split_result.values(), color=['blue', 'green', 'red', 'purple'])
+                    ax.set_ylabel("Amount ($)")
+                    ax.set_title("Custom Bill Split Per Person")
+                    st.pyplot(fig)
 
-                        # ✅ Show in table format
-                        df = pd.DataFrame.from_dict(split_result, orient="index", columns=["Amount Owed"])
-                        st.table(df)
+                    # ✅ Show in table format
+                    df = pd.DataFrame.from_dict(split_result, orient="index", columns=["Amount Owed"])
+                    st.table(df)
 
-                        # Define test users (replace with dynamic user creation)
-                        users = {
-                            "Kayla": "acct_test1",
-                            "Nandan": "acct_test2",
-                            "Deepak": "acct_test3",
-                            "Lily": "acct_test4"
-                        }
+                    # Define test users (replace with dynamic user creation)
+                    users = {
+                        "Kayla": "acct_test1",
+                        "Nandan": "acct_test2",
+                        "Deepak": "acct_test3",
+                        "Lily": "acct_test4"
+                    }
 
-                        st.subheader("💳 Send Payment via Stripe")
+                    st.subheader("💳 Send Payment via Stripe")
 
-                        # Select sender & receiver
-                        sender = st.selectbox("🧑‍💼 Who is paying?", list(users.keys()))
-                        receiver = st.selectbox("🎯 Who is receiving the payment?", [u for u in users.keys() if u != sender])
+                    # Select sender & receiver
+                    sender = st.selectbox("🧑‍💼 Who is paying?", list(users.keys()))
+                    receiver = st.selectbox("🎯 Who is receiving the payment?", [u for u in users.keys() if u != sender])
 
-                        # Select amount to pay
-                        amount = st.number_input("💰 Enter Amount to Pay ($)", min_value=1.0, step=0.01)
+                    # Select amount to pay
+                    amount = st.number_input("💰 Enter Amount to Pay ($)", min_value=1.0, step=0.01)
 
-                        if st.button("💸 Pay Now with Stripe"):
-                            result = process_payment(sender, receiver, amount)
+                    if st.button("💸 Pay Now with Stripe"):
+                        from stripe_payment import process_payment  # Stripe SDK loads only when paying
+                        result = process_payment(sender, receiver, amount)
 
-                            if result["success"]:
-                                st.success(result["message"])
-                                st.write(f"🔗 [View Payment](https://dashboard.stripe.com/test/payments/{result['payment_id']})")
-                            else:
-                                st.error(result["message"])
+                        if result["success"]:
+                            st.success(result["message"])
+                            st.write(f"🔗 [View Payment](https://dashboard.stripe.com/test/payments/{result['payment_id']})")
+                        else:
+                            st.error(result["message"])
 
         # SOL payment
         if st.button("Pay with SOL (Demo)"):
@@ -479,7 +522,7 @@ elif section == "💸 Flexa":
             else:
                 st.error(sol_payment_result["message"] if sol_payment_result else "SOL payment failed.")
     with col2:
-        st_lottie(splitwise_animation, height=300, key="splitwise")
+        show_lottie(splitwise_animation, height=300, key="splitwise")
 
 #Arweave Explorer Page
 # elif section == "🔗 Arweave Explorer":
@@ -504,6 +547,17 @@ elif section == "💸 Flexa":
 #         st.info("No data uploaded yet.")
 
 
+# Per-endpoint latency of outbound calls made through the shared HTTP client
+with st.sidebar.expander("📡 Network stats"):
+    network_stats = http_client.metrics()
+    if network_stats:
+        st.dataframe(pd.DataFrame.from_dict(network_stats, orient="index"))
+    else:
+        st.caption("No outbound calls yet.")
+    lottie_stats = lottie_assets.stats()
+    st.caption(f"Animations: cold start {lottie_stats['cold_start_ms']} ms, "
+               f"this run {lottie_stats['last_load_ms']} ms, {lottie_stats['fetched']} fetched")
+
 # Footer for all pages - Centered
 st.markdown("""
     <style>
@@ -0,0 +1,116 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+import pose_math
+import pose_pool
+import score_series
+import trainer
+import trainer_batch
+
+# Bicep-curl joints and the colours the synthetic clip paints them in (BGR)
+MARKERS = {11: (0, 0, 255), 13: (0, 255, 0), 15: (255, 0, 0)}
+
+
+def write_synthetic_clip(path, reps=6, frames_per_rep=45, hold_frames=30, size=(640, 480), fps=30):
+    """A curl: upper arm fixed, forearm sweeping 170 -> 40 -> 170 degrees, still between reps, plus sensor noise."""
+    width, height = size
+    rng = np.random.default_rng(0)
+    shoulder, elbow = np.array([320, 140]), np.array([320, 260])
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    angles = []
+    for _ in range(reps):
+        sweep = 105 + 65 * np.cos(np.linspace(0, 2 * np.pi, frames_per_rep))
+        angles.extend(sweep.tolist() + [170.0] * hold_frames)
+    for angle in angles:
+        frame = np.full((height, width, 3), 60, np.uint8)
+        frame += rng.integers(0, 4, frame.shape, dtype=np.uint8)
+        theta = math.radians(angle)
+        wrist = (elbow + 110 * np.array([math.sin(theta), -math.cos(theta)])).astype(int)
+        cv2.line(frame, tuple(shoulder), tuple(elbow), (200, 200, 200), 18)
+        cv2.line(frame, tuple(elbow), tuple(wrist), (200, 200, 200), 18)
+        for landmark, point in zip(MARKERS, (shoulder, elbow, wrist)):
+            cv2.circle(frame, tuple(int(v) for v in point), 9, MARKERS[landmark], -1)
+        writer.write(frame)
+    writer.release()
+    return len(angles)
+
+
+class MarkerPose:
+    """Stand-in for MediaPipe Pose: finds the coloured joint markers in whatever (RGB) image it gets.
+
+    Each call burns a fixed amount of CPU like the landmark network does, so
+    saved calls show up as saved CPU time.
+    """
+
+    def __init__(self, model_ms=12.0):
+        self.model_ms = model_ms
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        deadline = time.process_time() + self.model_ms / 1000
+        while time.process_time() < deadline:
+            pass
+        height, width = rgb.shape[:2]
+        found = {}
+        for landmark, (b, g, r) in MARKERS.items():
+            colour = np.array([r, g, b])
+            mask = cv2.inRange(rgb, np.clip(colour - 100, 0, 255), np.clip(colour + 100, 0, 255))
+            moments = cv2.moments(mask, binaryImage=True)
+            if moments["m00"] < 5:
+                return SimpleNamespace(pose_landmarks=None)
+            found[landmark] = (moments["m10"] / moments["m00"] / width, moments["m01"] / moments["m00"] / height)
+        for landmark in MARKERS:
+            found[landmark + 1] = found[landmark]  # one arm on screen: mirror it onto the other side
+        centre = np.mean(list(found.values()), axis=0)
+        landmarks = [SimpleNamespace(x=float(found.get(i, centre)[0]), y=float(found.get(i, centre)[1]))
+                     for i in range(pose_math.NUM_LANDMARKS)]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+
+def run(path, exercise, adaptive, pose, stride):
+    cpu_start = time.process_time()
+    result = trainer_batch.analyze_video(path, exercise, stride=stride, adaptive=adaptive, pose=pose)
+    return result, time.process_time() - cpu_start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU saved by adaptive (ROI + frame-skip) pose inference")
+    parser.add_argument("videos", nargs="*", help="Recorded clips (real MediaPipe); default: synthetic curl clip")
+    parser.add_argument("--exercise", default="Bicep Curls", choices=list(trainer.WORKOUTS))
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--tolerance", type=int, default=1, help="Allowed rep-count difference from full inference")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        score_series.SERIES_DIR = os.path.join(workdir, "score_series")  # analyze_video saves each run's series
+        videos = args.videos
+        if not videos:
+            videos = [os.path.join(workdir, "synthetic_curls.avi")]
+            frames = write_synthetic_clip(videos[0])
+            print(f"Synthetic clip: {frames} frames, 6 curls with pauses (MarkerPose stand-in model)")
+
+        for path in videos:
+            if args.videos:  # real MediaPipe in the pooled (tracking) config both modes use in the app
+                full_pose = pose_pool.build_pose(pose_pool.PoseConfig())
+                fast_pose = pose_pool.build_pose(pose_pool.PoseConfig())
+            else:
+                full_pose, fast_pose = MarkerPose(), MarkerPose()
+            full, full_cpu = run(path, args.exercise, False, full_pose, args.stride)
+            fast, fast_cpu = run(path, args.exercise, True, fast_pose, args.stride)
+            assert abs(full["reps"] - fast["reps"]) <= args.tolerance, (full["reps"], fast["reps"])
+            print(f"{os.path.basename(path)}:")
+            print(f"  full inference : {full['reps']} reps | score {full['score']:6.2f} | "
+                  f"{full['inferences']} model calls | {full_cpu:.2f} s CPU")
+            print(f"  adaptive       : {fast['reps']} reps | score {fast['score']:6.2f} | "
+                  f"{fast['inferences']} model calls | {fast['pose_resets']} crop resets | {fast_cpu:.2f} s CPU "
+                  f"({(1 - fast_cpu / full_cpu) * 100:.0f}% saved{'' if args.videos else ' with the stand-in model'})")
+        if not args.videos:
+            print("  (real MediaPipe costs differ: pass recorded clips to measure the saving with the actual model)")
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import tempfile
+
+from PIL import Image
+
+import stub_server
+
+
+def receipt_text(request):
+    """The stub's extraction: the same two-item receipt, named after the start of the image data."""
+    image_data = request.json()["contents"][0]["parts"][1]["inline_data"]["data"]
+    receipt = {
+        "bill_name": f"Stub Diner {image_data[:8]}",
+        "items": [
+            {"item_name": "Burger", "price": 9.5, "quantity": 2},
+            {"item_name": "Fries", "price": 3.0, "quantity": 1},
+        ],
+        "taxes": [{"amount": 1.8}],
+    }
+    return "```json\n" + json.dumps(receipt) + "\n```"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bill_batch.ingest against a local stub Gemini server")
+    parser.add_argument("--receipts", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response time in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Share of stub responses that are 429/503")
+    args = parser.parse_args()
+
+    stub = stub_server.StubServer(stub_server.gemini_reply(receipt_text), args.latency, args.error_rate)
+    stub_url = f"{stub.url}/v1beta/models/stub:generateContent"
+
+    # Work in a scratch directory so the bench never touches the real ./database
+    with tempfile.TemporaryDirectory(prefix="flexa-bill-batch-") as workdir:
+        os.chdir(workdir)
+        import bill_batch  # noqa: E402 (imported after chdir on purpose)
+        import bill_store  # noqa: E402
+
+        for concurrency in args.concurrency:
+            receipt_dir = os.path.join(workdir, f"receipts_{concurrency}")
+            os.makedirs(receipt_dir)
+            for i in range(args.receipts):
+                # Distinct small images so every receipt misses the extraction cache
+                Image.new("RGB", (400, 800), (concurrency, i % 256, i // 256)).save(
+                    os.path.join(receipt_dir, f"receipt_{i}.png"))
+
+            stub.reset()
+            bill_ids = []
+            report = bill_batch.ingest(bill_batch.find_receipts(receipt_dir), max_in_flight=concurrency,
+                                       url=stub_url, api_key="stub",
+                                       on_result=lambda path, stored_bill: bill_ids.append(stored_bill["bill_id"]))
+            assert report["failed"] == 0, report["failures"]
+            assert len(set(bill_ids)) == args.receipts
+            assert all(bill_store.load_bill(bill_id)["items"] for bill_id in bill_ids), "receipt missing from bill_store"
+            # Every 429/503 was retried: the stub saw one extra request per injected error
+            assert len(stub.requests) == args.receipts + stub.errors
+            assert stub.errors > 0 or args.error_rate * args.receipts < 1
+            assert stub.max_in_flight <= concurrency, stub.max_in_flight
+            print(f"concurrency={concurrency:>2}: {report['receipts']} ok / {report['failed']} failed | "
+                  f"{report['receipts_per_second']} receipts/s | p50 {report['p50_latency_ms']} ms | "
+                  f"p95 {report['p95_latency_ms']} ms | {stub.errors} 429/503 retried | "
+                  f"max {stub.max_in_flight} in flight")
+        os.chdir(os.path.dirname(workdir))
+
+    stub.shutdown()
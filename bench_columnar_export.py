@@ -0,0 +1,120 @@
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+EXERCISES = ["Push-ups", "Squats", "Bicep Curls", "Lunges", "Jumping Jacks"]
+USERS = ["Kayla", "Nandan", "Deepak", "Lily"]
+
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[runs // 2]
+
+
+def dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def json_history_table(storage, pd, start, exercise):
+    """The old path: every record parsed into pandas, then filtered."""
+    df = pd.DataFrame(storage.load_records("workout_history"))
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df[(df["timestamp"] >= start) & (df["exercise_name"] == exercise)]
+    return df[["timestamp", "exercise_name", "reps", "score", "calories"]]
+
+
+def json_payment_table(storage, pd, sender):
+    df = pd.DataFrame(storage.load_records("payment_history"))
+    return df[df["sender"] == sender][["timestamp", "sender", "receiver", "amount", "status"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON history vs month-partitioned Parquet for the history tables")
+    parser.add_argument("--workouts", type=int, default=100000)
+    parser.add_argument("--payments", type=int, default=20000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("FLEXA_FSYNC", "never")  # seeding speed only
+    os.environ.setdefault("FLEXA_COMPACT_EVERY", str(10 ** 9))
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import pandas as pd
+        import columnar_export
+        import storage
+
+        first_day = datetime.datetime(2023, 1, 1)
+        span = datetime.timedelta(days=365 * args.years)
+        for i in range(args.workouts):
+            storage.append_record("workout_history", {
+                "exercise_name": EXERCISES[i % len(EXERCISES)], "reps": 10 + i % 15, "score": 60.0 + i % 40,
+                "calories": 5.0 + i % 15 * 0.5, "series_id": f"{i:032x}",
+                "timestamp": (first_day + span * i / args.workouts).strftime("%Y-%m-%d %H:%M:%S")})
+        for i in range(args.payments):
+            storage.append_record("payment_history", {
+                "transaction_id": f"tr_{i}", "timestamp": str(first_day + span * i / args.payments),
+                "sender": USERS[i % 4], "receiver": USERS[(i + 1) % 4], "amount": 5.0 + i % 50, "status": "Completed"})
+
+        start = time.perf_counter()
+        columnar_export.export("workout_history")
+        columnar_export.export("payment_history")
+        export_s = time.perf_counter() - start
+
+        last_90 = (first_day + span - datetime.timedelta(days=90)).strftime("%Y-%m-%d")
+        workouts = columnar_export.query("workout_history", ["timestamp", "exercise_name", "reps", "score", "calories"],
+                                         start=last_90, exercise_name="Squats")
+        expected = json_history_table(storage, pd, pd.Timestamp(last_90), "Squats")
+        assert len(workouts) == len(expected) and workouts["reps"].sum() == expected["reps"].sum()
+        payments = columnar_export.query("payment_history", ["timestamp", "sender", "receiver", "amount", "status"],
+                                         sender="Kayla")
+        assert len(payments) == len(json_payment_table(storage, pd, "Kayla"))
+
+        cases = [
+            ("workouts, 90 days of Squats", "workout_history",
+             lambda: json_history_table(storage, pd, pd.Timestamp(last_90), "Squats"),
+             lambda: columnar_export.query("workout_history", ["timestamp", "exercise_name", "reps", "score", "calories"],
+                                           start=last_90, exercise_name="Squats")),
+            ("payments from Kayla", "payment_history", lambda: json_payment_table(storage, pd, "Kayla"),
+             lambda: columnar_export.query("payment_history", ["timestamp", "sender", "receiver", "amount", "status"],
+                                           sender="Kayla")),
+        ]
+        print(f"{args.workouts} workouts / {args.payments} payments over {args.years:g} years "
+              f"({storage.STORAGE_BACKEND} backend); export {export_s:.2f} s")
+        print(f"  on disk: JSON {dir_bytes(storage.DATABASE_DIR) - dir_bytes(columnar_export.COLUMNAR_DIR):,} B | "
+              f"Parquet {dir_bytes(columnar_export.COLUMNAR_DIR):,} B")
+        for label, name, json_fn, parquet_fn in cases:
+            json_ms = median_ms(json_fn, args.runs)
+            parquet_ms = median_ms(parquet_fn, args.runs)
+            full_mb = pd.DataFrame(storage.load_records(name)).memory_usage(deep=True).sum() / 1e6
+            result_mb = parquet_fn().memory_usage(deep=True).sum() / 1e6
+            print(f"  {label:<28}: JSON {json_ms:7.1f} ms ({full_mb:.1f} MB in pandas) | "
+                  f"Parquet {parquet_ms:6.1f} ms ({result_mb:.2f} MB)")
+
+        # Recording a session appends to the JSON history and to the pending file; every FLUSH_EVERY
+        # appends (or at the next query) the pending records become one new part file per month
+        records = [{"exercise_name": "Squats", "reps": 12, "score": 90.0, "calories": 6.0,
+                    "timestamp": (first_day + span + datetime.timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")}
+                   for i in range(columnar_export.FLUSH_EVERY + 20)]
+        samples = []
+        for record in records:
+            start = time.perf_counter()
+            columnar_export.append_record("workout_history", record)
+            samples.append((time.perf_counter() - start) * 1000)
+        meta = columnar_export._read_meta("workout_history")
+        assert meta["parts"] == 2 and meta["pending"] == 20, meta  # one flush so far, nothing re-exported
+        start = time.perf_counter()
+        appended = columnar_export.query("workout_history", ["reps"], start=(first_day + span).strftime("%Y-%m-%d"))
+        flush_query_ms = (time.perf_counter() - start) * 1000
+        assert len(appended) == len(records) and columnar_export._read_meta("workout_history")["pending"] == 0
+        assert len(columnar_export.query("workout_history", ["reps"])) == args.workouts + len(records)
+        assert not columnar_export.ensure_exported("workout_history"), "appends left the export stale"
+        samples.sort()
+        print(f"  append one session: median {samples[len(samples) // 2]:.2f} ms, max {samples[-1]:.1f} ms "
+              f"(flush every {columnar_export.FLUSH_EVERY}); query that flushes 20 pending: {flush_query_ms:.1f} ms")
@@ -0,0 +1,44 @@
+import argparse
+import os
+import tempfile
+import time
+
+import db_cache
+import storage
+
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[runs // 2]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-rerun cost of reading workout history, parsed vs cached")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        for i in range(args.records):
+            storage.append_record("workout_history", {
+                "exercise_name": "Squats", "reps": i % 20, "score": 75.0, "calories": 8.0,
+                "timestamp": f"2025-01-{i % 28 + 1:02d} 08:00:00",
+            })
+
+        parse_ms = median_ms(lambda: storage.load_records("workout_history"), args.runs)
+        db_cache.load_records("workout_history")
+        cached_ms = median_ms(lambda: db_cache.load_records("workout_history"), args.runs)
+
+        storage.append_record("workout_history", {"exercise_name": "Squats", "reps": 1, "score": 1.0,
+                                                  "calories": 1.0, "timestamp": "2025-02-01 08:00:00"})
+        assert len(db_cache.load_records("workout_history")) == args.records + 1, "write did not invalidate the cache"
+
+        print(f"{args.records} records ({storage.STORAGE_BACKEND} backend)")
+        print(f"  full parse per rerun : {parse_ms:.2f} ms")
+        print(f"  cached per rerun     : {cached_ms:.3f} ms (version check only)")
+        print(f"  stats: {db_cache.stats()}")
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import numpy as np
+
+import exercise_profiles
+import pose_math
+import score_series
+
+
+def synthetic_angles(profile, reps, fps=30, rep_seconds=2.5, depth=0.9, noise=3.0, seed=0):
+    """Angles of reps that reach depth (0-1) of the profile's range, with tracking noise."""
+    rng = np.random.default_rng(seed)
+    contracted, extended = profile.angle_range
+    frames = int(rep_seconds * fps)
+    phase = (1 - np.cos(np.linspace(0, 2 * np.pi, frames))) / 2  # 0 -> 1 -> 0 per rep
+    sweep = extended + (contracted - extended) * depth * phase
+    rest = np.full(fps, float(extended))
+    trace = np.concatenate([np.concatenate([sweep, rest]) for _ in range(reps)])
+    return trace + rng.normal(0, noise, trace.size)
+
+
+def per_frame_count(profile, angles):
+    counter = exercise_profiles.rep_counter(profile)
+    for angle in angles.tolist():
+        counter.update(float(exercise_profiles.scores(profile, angle)))
+    return counter.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rep counting per exercise profile over recorded angle arrays")
+    parser.add_argument("--reps", type=int, default=12)
+    parser.add_argument("--depth", type=float, default=0.9, help="Share of the angle range each rep reaches")
+    parser.add_argument("--noise", type=float, default=3.0, help="Angle noise in degrees")
+    parser.add_argument("--series", nargs="*", default=[], metavar="EXERCISE=SERIES_ID",
+                        help="Recount saved sessions from ./database/score_series")
+    args = parser.parse_args()
+
+    print(f"{args.reps} reps per exercise at {args.depth:.0%} depth, ±{args.noise}° noise")
+    print(f"  {'exercise':12s} {'exact 100/0':>11s} {'hysteresis':>10s} {'per-frame':>9s}")
+    for name, profile in exercise_profiles.PROFILES.items():
+        angles = synthetic_angles(profile, args.reps, depth=args.depth, noise=args.noise)
+        exact = pose_math.RepCounter().update(exercise_profiles.scores(profile, angles))
+        batch = exercise_profiles.count_reps(profile, angles)
+        assert batch == per_frame_count(profile, angles), name
+        print(f"  {name:12s} {exact:11.1f} {batch:10.1f} {'match':>9s}")
+
+    profile = exercise_profiles.PROFILES["Squats"]
+    long_angles = synthetic_angles(profile, 4000)
+    start = time.perf_counter()
+    loop_count = per_frame_count(profile, long_angles)
+    loop_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    batch_count = exercise_profiles.count_reps(profile, long_angles)
+    batch_ms = (time.perf_counter() - start) * 1000
+    assert loop_count == batch_count
+    print(f"{long_angles.size} frames: per-frame {loop_ms:.1f} ms, batch {batch_ms:.2f} ms "
+          f"({loop_ms / batch_ms:.0f}x), {batch_count:.0f} reps")
+
+    for entry in args.series:
+        exercise, series_id = entry.split("=", 1)
+        data = score_series.load(series_id)
+        if data is None:
+            print(f"{series_id}: no saved series")
+            continue
+        print(f"{series_id} ({exercise}): {exercise_profiles.count_reps(exercise_profiles.PROFILES[exercise], data['angles']):.1f} reps")
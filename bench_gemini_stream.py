@@ -0,0 +1,55 @@
+import argparse
+import json
+import time
+
+import gemini_stream
+import stub_server
+
+SAMPLE_BILL = {
+    "bill_name": "IKEA Food Place",
+    "items": [
+        {"item_name": "Cheese Burger", "price": 5.99, "quantity": 4},
+        {"item_name": "Soda", "price": 0.49, "quantity": 4},
+        {"item_name": "Cinnamon Bun", "price": 1.00, "quantity": 2},
+    ],
+    "taxes": [{"amount": 2.90}, {"amount": 1.28}],
+}
+SAMPLE_MEAL_PLAN = {
+    day: {"Breakfast": "Oatmeal with berries", "Lunch": "Grilled chicken with salad",
+          "Snack": "Apple with peanut butter", "Dinner": "Baked salmon with quinoa"}
+    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+}
+
+
+def document_text(request):
+    """The fake model answer: the bill or the meal plan as fenced JSON, picked by the model name in the path."""
+    document = SAMPLE_BILL if "/bill:" in request.path else SAMPLE_MEAL_PLAN
+    return "```json\n" + json.dumps(document, indent=2) + "\n```"
+
+
+def run(base_url, name, event_kind, event_key, expected):
+    is_item = lambda kind, key: kind == event_kind and (event_key is None or key == event_key)
+    stream = gemini_stream.GeminiJsonStream(f"{base_url}/{name}:generateContent", "fake", {"contents": []},
+                                            is_item=is_item)
+    arrivals = [time.perf_counter() for kind, key, _ in stream if is_item(kind, key)]
+    assert stream.result == expected, f"{name}: streamed result does not match the document"
+    assert arrivals, f"{name}: no incremental events"
+    print(f"{name:>4}: {len(arrivals)} {event_key or 'days'} streamed | time to first item "
+          f"{stream.time_to_first_item * 1000:.0f} ms | full response {stream.total_time * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-to-first-item against a fake streaming Gemini server")
+    parser.add_argument("--chunk-size", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Stream each answer as chunk_size-character events, chunk_delay apart
+    stub = stub_server.StubServer(
+        stub_server.gemini_reply(document_text, args.chunk_size),
+        latency=lambda request: args.chunk_delay * -(-len(document_text(request)) // args.chunk_size))
+    base_url = f"{stub.url}/v1beta/models"
+
+    run(base_url, "bill", "element", "items", SAMPLE_BILL)
+    run(base_url, "plan", "member", None, SAMPLE_MEAL_PLAN)
+    stub.shutdown()
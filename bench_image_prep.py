@@ -0,0 +1,63 @@
+import base64
+import io
+import os
+import time
+
+import requests
+from PIL import Image
+
+import bill
+import image_prep
+
+SAMPLE_IMAGES = ["./bill2.jpg", "./random_bill.png"]
+
+
+def time_extraction(data):
+    """Wall-clock time of one Gemini generateContent call for a request body."""
+    start = time.perf_counter()
+    response = requests.post(f"{bill.GEMINI_URL}?key={bill.GEMINI_API_KEY}", json=data, timeout=120)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def raw_request(image_bytes):
+    """Request body as it was sent before pre-processing (raw bytes labelled image/jpeg)."""
+    return {"contents": [{"parts": [
+        {"text": bill.BILL_PROMPT},
+        {"inline_data": {"mime_type": "image/jpeg", "data": base64.b64encode(image_bytes).decode("utf-8")}},
+    ]}]}
+
+
+if __name__ == "__main__":
+    for path in SAMPLE_IMAGES:
+        with open(path, "rb") as image_file:
+            image_bytes = image_file.read()
+
+        start = time.perf_counter()
+        prepared_bytes, mime_type, stats = image_prep.preprocess_image(image_bytes)
+        prep_ms = (time.perf_counter() - start) * 1000
+
+        # What Gemini receives: no bigger than the original, and labelled with its real format and size
+        assert len(prepared_bytes) == stats["processed_bytes"] <= stats["original_bytes"] == len(image_bytes)
+        assert image_prep.detect_mime_type(prepared_bytes) == mime_type
+        with Image.open(io.BytesIO(prepared_bytes)) as prepared:
+            if stats["bytes_saved"]:
+                assert mime_type == "image/jpeg" and prepared.mode == "L"
+                assert prepared.size == stats["dimensions"] and max(prepared.size) <= image_prep.MAX_DIMENSION
+            else:
+                assert prepared_bytes == image_bytes
+
+        raw_b64 = len(base64.b64encode(image_bytes))
+        prepared_b64 = len(base64.b64encode(prepared_bytes))
+        print(f"📸 {os.path.basename(path)} ({image_prep.detect_mime_type(image_bytes)} -> {mime_type})")
+        print(f"   file:    {stats['original_bytes'] / 1024:8.1f} KB -> {stats['processed_bytes'] / 1024:8.1f} KB "
+              f"(saved {stats['bytes_saved'] / 1024:.1f} KB, {stats.get('dimensions', 'unchanged')})")
+        print(f"   payload: {raw_b64 / 1024:8.1f} KB -> {prepared_b64 / 1024:8.1f} KB base64")
+        print(f"   pre-processing time: {prep_ms:.1f} ms")
+
+        if bill.GEMINI_API_KEY:
+            before = time_extraction(raw_request(image_bytes))
+            after = time_extraction(bill.build_gemini_request(image_bytes)[0])
+            print(f"   extraction latency: {before * 1000:.0f} ms raw -> {after * 1000:.0f} ms pre-processed")
+        else:
+            print("   extraction latency: skipped (set GEMINI_API_KEY to compare against Gemini)")
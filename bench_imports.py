@@ -0,0 +1,51 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# What each app section imports the first time it is opened
+SECTIONS = {
+    "app shell (profile page)": ["storage", "http_client", "lottie_assets", "bill_store", "extraction_cache", "bill"],
+    "💪 Flexa-Tron 3000": ["trainer"],
+    "🥑 Munch & Crunch": ["analytics"],
+    "💸 Flexa (Stripe)": ["stripe_payment"],
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    for name in sys.argv[1:]:
+        __import__(name)
+    print(json.dumps({"ms": (time.perf_counter() - start) * 1000}))
+except ImportError as e:
+    print(json.dumps({"missing": e.name or str(e)}))
+"""
+
+
+def time_imports(modules, runs):
+    """Median import time (fresh interpreter each run) for a list of modules, or the missing dependency."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE, *modules], capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        if "missing" in result:
+            return None, result["missing"]
+        samples.append(result["ms"])
+    return sorted(samples)[len(samples) // 2], None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start import cost of each app section")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    eager_total = 0.0
+    for section, modules in SECTIONS.items():
+        ms, missing = time_imports(modules, args.runs)
+        if ms is None:
+            print(f"{section:<28} n/a (missing dependency: {missing})")
+            continue
+        eager_total += ms
+        print(f"{section:<28} {ms:8.1f} ms  ({', '.join(modules)})")
+    print(f"{'all sections (old eager)':<28} {eager_total:8.1f} ms  (measurable sections only)")
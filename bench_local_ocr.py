@@ -0,0 +1,88 @@
+import time
+
+import bill
+import local_ocr
+
+# Hand-checked contents of the sample receipts in the repo
+GROUND_TRUTH = {
+    "./random_bill.png": {
+        "items": [("cheese burger", 5.99, 4), ("soda", 0.49, 4), ("cinnamon bun", 1.00, 2)],
+        "taxes": [2.90, 1.28],
+    },
+    "./bill2.jpg": {
+        "items": [
+            ("ginger ale", 130.00, 3), ("brownie", 230.00, 2), ("seasoned fries", 270.00, 1),
+            ("tuesday 1 dozer", 315.00, 1), ("tuesday 1/2 doz", 225.00, 10), ("mangobloom*", 280.00, 1),
+            ("teetottalers", 280.00, 1), ("electric curf", 280.00, 1),
+        ],
+        "taxes": [452.50, 124.49, 124.49],
+    },
+}
+
+
+# Receipt lines the rule-based parser has got wrong before: text -> (items, tax amounts)
+PARSER_CASES = {
+    "Princess Cake 4.50": (["Princess Cake"], []),
+    "Private Reserve Wine 12.00": (["Private Reserve Wine"], []),
+    "TOTAL INCL VAT 24.75": ([], []),
+    "Subtotal 20.00\nVAT 20% 4.75": ([], [4.75]),
+    "CGST 2.5% 124.49\nSGST 2.5% 124.49": ([], [124.49, 124.49]),
+    "Service Charge 10.00\nTip 3.00": ([], [10.00, 3.00]),
+}
+
+
+def check_parser():
+    """Regression check of local_ocr.parse_receipt_text on PARSER_CASES (no Tesseract needed)."""
+    for text, (items, taxes) in PARSER_CASES.items():
+        parsed = local_ocr.parse_receipt_text(text)
+        got = ([item["item_name"] for item in parsed["items"]], [tax["amount"] for tax in parsed["taxes"]])
+        assert got == (items, taxes), f"{text!r}: expected {(items, taxes)}, got {got}"
+    print(f"✅ parser regression check: {len(PARSER_CASES)} cases")
+
+
+def item_accuracy(extracted, truth):
+    """F1 over (name, price, quantity) line items plus the absolute error of the tax total."""
+    found = {(item["item_name"].lower().strip(), round(float(item["price"]), 2), int(item["quantity"]))
+             for item in extracted.get("items", [])}
+    expected = set(truth["items"])
+    matched = len(found & expected)
+    precision = matched / len(found) if found else 0.0
+    recall = matched / len(expected)
+    f1 = 2 * precision * recall / (precision + recall) if matched else 0.0
+    tax_error = abs(sum(tax.get("amount", 0) for tax in extracted.get("taxes", [])) - sum(truth["taxes"]))
+    return f1, tax_error
+
+
+def run_engine(name, extract, image_bytes, truth):
+    start = time.perf_counter()
+    try:
+        extracted = extract(image_bytes)
+    except Exception as e:
+        print(f"   {name:>6}: failed ({e})")
+        return
+    latency = time.perf_counter() - start
+    f1, tax_error = item_accuracy(extracted, truth)
+    print(f"   {name:>6}: {latency * 1000:7.0f} ms | item F1 {f1:.2f} | tax error {tax_error:.2f} "
+          f"| {len(extracted.get('items', []))} items")
+
+
+def extract_remote(image_bytes):
+    """Gemini path without the cache or the bill store, so the timing is one real round trip."""
+    import requests
+    data, _ = bill.build_gemini_request(image_bytes)
+    response = requests.post(f"{bill.GEMINI_URL}?key={bill.GEMINI_API_KEY}", json=data, timeout=120)
+    response.raise_for_status()
+    return bill.parse_bill_text(bill.extract_response_text(response.json()))
+
+
+if __name__ == "__main__":
+    check_parser()
+    for path, truth in GROUND_TRUTH.items():
+        with open(path, "rb") as image_file:
+            image_bytes = image_file.read()
+        print(f"📸 {path}")
+        run_engine("local", local_ocr.extract_bill, image_bytes, truth)
+        if bill.GEMINI_API_KEY:
+            run_engine("gemini", extract_remote, image_bytes, truth)
+        else:
+            print("   gemini: skipped (set GEMINI_API_KEY to compare against the remote path)")
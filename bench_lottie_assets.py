@@ -0,0 +1,97 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+
+import lottie_assets
+import stub_server
+
+ANIMATION = {"v": "5.7.4", "fr": 30, "ip": 0, "op": 60, "w": 300, "h": 300, "layers": [{"ty": 4, "nm": "shape"}] * 50}
+
+
+def lottie_reply(request):
+    """Fake lottie.host: the animation with an ETag (304 when it matches), HTML under /bad/."""
+    if request.path.startswith("/bad/"):  # e.g. a captive portal answering 200 with HTML
+        return 200, b"<html>Sign in to the Wi-Fi</html>"
+    body = json.dumps(ANIMATION).encode("utf-8")
+    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return 304, b""
+    return 200, body, {"Content-Type": "application/json", "ETag": etag}
+
+
+def reset_memory(revalidate=False):
+    """Simulates a fresh process (the disk cache stays); revalidate makes the ETag check due."""
+    lottie_assets._memory.clear()
+    lottie_assets._failed.clear()
+    lottie_assets._last_revalidation = 0.0 if revalidate else time.time()
+
+
+def timed_load():
+    start = time.perf_counter()
+    animations = lottie_assets.load_all()
+    assert all(animation == ANIMATION for animation in animations.values()), "missing or wrong animation"
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start vs warm-rerun Lottie loading against a fake CDN")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per request on the fake CDN")
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = stub_server.StubServer(lottie_reply, args.latency)
+    base_url = stub.url
+    lottie_assets.ASSETS = {name: f"{base_url}/{name}.json" for name in lottie_assets.ASSETS}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        lottie_assets.CACHE_DIR = os.path.join(workdir, "lottie_cache")
+        lottie_assets.BUNDLED_DIR = os.path.join(workdir, "bundled")
+
+        sequential_ms = len(lottie_assets.ASSETS) * args.latency * 1000
+        reset_memory()
+        cold_ms = timed_load()
+        warm_ms = sorted(timed_load() for _ in range(args.reruns))[args.reruns // 2]
+        reset_memory()
+        disk_ms = timed_load()
+        # Revalidation is due: it runs in the background, the next rerun must not wait on it
+        reset_memory(revalidate=True)
+        revalidating_ms = timed_load()
+        time.sleep(0.1)  # let the revalidation requests get in flight
+        during_revalidation_ms = timed_load()
+
+        print(f"{len(lottie_assets.ASSETS)} animations, {args.latency * 1000:.0f} ms per request")
+        print(f"  old sequential fetch per rerun : ~{sequential_ms:.0f} ms")
+        print(f"  cold start (concurrent fetch)  : {cold_ms:.0f} ms")
+        print(f"  new process, disk cache        : {disk_ms:.1f} ms")
+        print(f"  warm rerun (median)            : {warm_ms:.3f} ms")
+        print(f"  disk cache + revalidation due  : {revalidating_ms:.1f} ms, "
+              f"rerun during revalidation {during_revalidation_ms:.3f} ms")
+        assert during_revalidation_ms < args.latency * 1000 / 2, "rerun waited on background revalidation"
+        print(f"  stats: {lottie_assets.stats()}")
+
+        # Offline first run, nothing cached or bundled: unreachable CDN and a non-JSON answer
+        with socket.socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            dead_url = f"http://127.0.0.1:{closed.getsockname()[1]}"
+        names = list(lottie_assets.ASSETS)
+        lottie_assets.ASSETS = {name: f"{dead_url if i % 2 else base_url + '/bad'}/{name}.json"
+                                for i, name in enumerate(names)}
+        lottie_assets.CACHE_DIR = os.path.join(workdir, "offline_cache")
+        lottie_assets.BUNDLED_DIR = os.path.join(workdir, "offline_bundled")
+        reset_memory()
+        placeholder = lottie_assets._read_json(lottie_assets.PLACEHOLDER_PATH)
+        assert placeholder is not None, f"{lottie_assets.PLACEHOLDER_PATH} is missing"
+        start = time.perf_counter()
+        animations = lottie_assets.load_all()
+        offline_ms = (time.perf_counter() - start) * 1000
+        assert all(animation == placeholder for animation in animations.values()), "offline load returned no placeholder"
+        start = time.perf_counter()
+        lottie_assets.load_all()
+        offline_rerun_ms = (time.perf_counter() - start) * 1000
+        assert offline_rerun_ms < args.latency * 1000 / 2, "offline rerun waited on the failed downloads again"
+        print(f"  offline first run: placeholders in {offline_ms:.0f} ms, rerun {offline_rerun_ms:.3f} ms")
+    stub.shutdown()
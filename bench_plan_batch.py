@@ -0,0 +1,75 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+
+import stub_server
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+GOALS = ["Bulking 🏋️", "Cutting 🔥", "Lean Bulk 💪", "Maintain ⚖️", "Flexibility & Mobility 🤸"]
+ACTIVITY = ["Sedentary (little to no exercise)", "Moderately active (3-5 days/week)", "Very active (6-7 days/week)"]
+DIETS = ["", "vegetarian", "vegan", "no nuts"]
+
+
+def plan_text(request):
+    """The stub's plan for a meal or workout prompt, fenced like Gemini often answers."""
+    if "meal plan" in stub_server.prompt_text(request):
+        plan = {day: {"Breakfast": "Oats", "Lunch": "Salad", "Snack": "Apple", "Dinner": "Tofu"} for day in DAYS}
+    else:
+        plan = {day: "Full-body strength training" for day in DAYS}
+    return "```json\n" + json.dumps(plan) + "\n```"
+
+
+def make_profiles(users, seed=0):
+    """Synthetic user_profiles: few distinct goal / activity / weight / diet combos, so many users share a plan."""
+    rng = random.Random(seed)
+    combos = list(itertools.product(GOALS, ACTIVITY, (60, 75, 90), DIETS))
+    return {
+        str(i): dict(zip(("goal", "activity_level", "weight", "dietary_restrictions"), rng.choice(combos)),
+                     name=f"User {i}", email=f"user{i}@example.com", height=rng.randint(150, 200))
+        for i in range(1, users + 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark plan_batch.run against a local mock Gemini server")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=1200, help="Rate limit in requests per minute")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock response time in seconds")
+    args = parser.parse_args()
+
+    stub = stub_server.StubServer(stub_server.gemini_reply(plan_text), args.latency)
+    os.environ["GEMINI_URL"] = f"{stub.url}/v1beta/models/mock:generateContent"
+    os.environ["GEMINI_API_KEY"] = "mock"
+
+    # Work in a scratch directory so the bench never touches the real ./database
+    with tempfile.TemporaryDirectory(prefix="flexa-plan-batch-") as workdir:
+        os.chdir(workdir)
+        import plan_batch  # noqa: E402 (imported after chdir on purpose, analytics reads GEMINI_URL at import)
+
+        profiles = make_profiles(args.users)
+        cold = plan_batch.run(profiles, args.workers, args.rpm)
+        assert cold["failed"] == 0, cold["failures"]
+        prompts = {stub_server.prompt_text(request) for request in stub.requests}
+        assert len(stub.requests) == cold["unique_prompts"] == len(prompts)
+        min_seconds = (cold["unique_prompts"] - 1) * 60 / args.rpm
+        assert cold["elapsed_seconds"] >= min_seconds * 0.95, "rate limit not respected"
+
+        # A few users log a new weight: only their new prompts go to Gemini, everyone else is a cache hit
+        for user_id in list(profiles)[:5]:
+            profiles[user_id] = dict(profiles[user_id], weight=profiles[user_id]["weight"] + 1)
+        requests_before = len(stub.requests)
+        warm = plan_batch.run(profiles, args.workers, args.rpm)
+        assert len(stub.requests) - requests_before == warm["generated"]
+        os.chdir(os.path.dirname(workdir))
+
+    for label, report in (("cold", cold), ("warm", warm)):
+        print(f"{label}: {report['users']} users, {report['plans_needed']} plans -> {report['unique_prompts']} unique prompts "
+              f"({report['deduped']} deduped), {report['generated']} Gemini calls, "
+              f"cache-hit ratio {report['cache_hit_ratio']:.0%}, {report['users_per_minute']:.0f} users/min "
+              f"in {report['elapsed_seconds']:.2f} s")
+    print(f"naive (1 call per user and plan at {args.rpm:g}/min): >= {cold['plans_needed'] * 60 / args.rpm:.1f} s")
+    stub.shutdown()
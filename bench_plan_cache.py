@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+import time
+
+# The cache lives in ./database; keep the real one untouched (removed again at exit)
+WORKDIR = tempfile.TemporaryDirectory(prefix="flexa-plan-cache-")
+os.chdir(WORKDIR.name)
+import plan_cache  # noqa: E402 (imported after chdir on purpose)
+
+PROFILE = {"name": "Sam", "email": "sam@example.com", "dietary_restrictions": "vegetarian",
+           "height": 180, "weight": 75, "goal": "Lean Bulk 💪", "activity_level": "Moderately active (3-5 days/week)"}
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def fake_gemini(kind, seconds, calls):
+    """Stands in for a Gemini plan generation that takes seconds."""
+    def generate():
+        calls[kind] += 1
+        time.sleep(seconds)
+        if kind == "meal":
+            return {day: {"Breakfast": "Oats", "Lunch": "Salad", "Snack": "Apple", "Dinner": "Tofu"} for day in DAYS}
+        return {day: "Full-body strength training" for day in DAYS}
+    return generate
+
+
+def rerun(profile, seconds, calls, refresh=False):
+    """One Munch & Crunch render: both plans, like analytics.cached_plans."""
+    start = time.perf_counter()
+    for kind in ("meal", "workout"):
+        key = plan_cache.make_key(kind, profile, f"{kind}-v1")
+        if refresh or plan_cache.get(key) is None:
+            plan_cache.put(key, kind, fake_gemini(kind, seconds, calls)(), f"{kind}-v1")
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Munch & Crunch reruns with the plan cache")
+    parser.add_argument("--gemini-seconds", type=float, default=1.5, help="Simulated generation time per plan")
+    parser.add_argument("--reruns", type=int, default=10, help="Reruns after the first build (e.g. calendar ticks)")
+    args = parser.parse_args()
+
+    profile = dict(PROFILE)  # fresh database: starts cold
+    calls = {"meal": 0, "workout": 0}
+    first_ms = rerun(profile, args.gemini_seconds, calls)
+    rerun_ms = [rerun(profile, args.gemini_seconds, calls) for _ in range(args.reruns)]
+    assert calls == {"meal": 1, "workout": 1}, calls
+    renamed_ms = rerun(dict(profile, name="Samantha", email="s@example.com"), args.gemini_seconds, calls)
+    assert calls == {"meal": 1, "workout": 1}, "name/email must not invalidate plans"
+    refresh_ms = rerun(profile, args.gemini_seconds, calls, refresh=True)
+    edited_ms = rerun(dict(profile, goal="Cutting 🔥"), args.gemini_seconds, calls)
+
+    print(f"first build      : {first_ms:8.1f} ms (2 Gemini calls)")
+    print(f"{args.reruns} reruns        : {sum(rerun_ms) / len(rerun_ms):8.2f} ms avg (0 Gemini calls)")
+    print(f"name/email edit  : {renamed_ms:8.2f} ms (cached)")
+    print(f"regenerate button: {refresh_ms:8.1f} ms (2 Gemini calls)")
+    print(f"goal changed     : {edited_ms:8.1f} ms (2 Gemini calls)")
+    print(f"Gemini calls: {calls} | cache {plan_cache.stats()}")
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import time
+
+import plan_tasks
+import stub_server
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+MEAL_PLAN = {day: {"Breakfast": "Oats", "Lunch": "Salad", "Snack": "Apple", "Dinner": "Salmon"} for day in DAYS}
+WORKOUT_PLAN = {day: "Full-body strength training" for day in DAYS}
+
+
+# Seconds the stub takes to write each kind of plan (streams spread it over their chunks)
+SECONDS = {"meal": 1.0, "workout": 1.0}
+
+
+def plan_kind(request):
+    return "meal" if "meal plan" in stub_server.prompt_text(request) else "workout"
+
+
+def plan_text(request):
+    return json.dumps(MEAL_PLAN if plan_kind(request) == "meal" else WORKOUT_PLAN, indent=2)
+
+
+def timed_run(analytics, stream, timeout, seconds):
+    SECONDS.update(seconds)
+    days = {"meal": [], "workout": []}
+
+    def on_event(kind, event, value):
+        if event == "day":
+            days[kind].append(value[0])
+
+    tasks = {
+        kind: (lambda ctx, prompt=prompt: analytics.fetch_plan(prompt, ctx, stream, timeout))
+        for kind, prompt in (("meal", analytics.MEAL_PLAN_PROMPT), ("workout", analytics.WORKOUT_PLAN_PROMPT))
+    }
+    start = time.perf_counter()
+    results, status = plan_tasks.run(tasks, on_event, timeout)
+    return time.perf_counter() - start, results, status, days
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent meal + workout plan generation")
+    parser.add_argument("--meal-seconds", type=float, default=1.2)
+    parser.add_argument("--workout-seconds", type=float, default=0.8)
+    args = parser.parse_args()
+
+    stub = stub_server.StubServer(stub_server.gemini_reply(plan_text, chunk_size=20),
+                                  latency=lambda request: SECONDS[plan_kind(request)])
+    os.environ["GEMINI_URL"] = f"{stub.url}/v1beta/models/fake:generateContent"
+    os.environ["GEMINI_API_KEY"] = "fake"
+    import analytics  # reads GEMINI_URL at import
+
+    seconds = {"meal": args.meal_seconds, "workout": args.workout_seconds}
+    SECONDS.update(seconds)
+    start = time.perf_counter()
+    sequential = [analytics.fetch_plan(analytics.MEAL_PLAN_PROMPT), analytics.fetch_plan(analytics.WORKOUT_PLAN_PROMPT)]
+    sequential_seconds = time.perf_counter() - start
+    assert sequential == [MEAL_PLAN, WORKOUT_PLAN]
+    print(f"sequential             : {sequential_seconds:.2f} s (sum of calls {sum(seconds.values()):.2f} s)")
+
+    for stream in (False, True):
+        elapsed, results, status, days = timed_run(analytics, stream, 10, seconds)
+        assert status == {"meal": "done", "workout": "done"} and results == {"meal": MEAL_PLAN, "workout": WORKOUT_PLAN}
+        print(f"concurrent{' (stream)' if stream else '         '}  : {elapsed:.2f} s (max of calls {max(seconds.values()):.2f} s)")
+
+    # Workout plan stalls past the timeout: the meal plan still lands, the workout keeps its streamed days
+    elapsed, results, status, days = timed_run(analytics, True, 1.5, {"meal": 0.5, "workout": 4.0})
+    assert status == {"meal": "done", "workout": "timeout"} and results["meal"] == MEAL_PLAN
+    print(f"workout timeout at 1.5s: {elapsed:.2f} s | meal done, workout partial with {len(days['workout'])} days")
+
+    # Same stall without streaming: the timed-out task drops its late response instead of returning it
+    late = {}
+    tasks = {"workout": lambda ctx: late.setdefault("plan", analytics.fetch_plan(analytics.WORKOUT_PLAN_PROMPT, ctx))}
+    SECONDS.update({"meal": 0.5, "workout": 1.0})
+    results, status = plan_tasks.run(tasks, timeout=0.3)
+    time.sleep(1.2)
+    assert status == {"workout": "timeout"} and "plan" not in late
+    print("workout timeout (no stream): late response dropped")
+    stub.shutdown()
@@ -0,0 +1,96 @@
+import argparse
+import math
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import pose_math
+
+WIDTH, HEIGHT = 640, 480
+JOINTS = (11, 13, 15)  # Bicep Curls: shoulder, elbow, wrist
+
+
+def synthetic_landmarks(frames, seed=0):
+    """MediaPipe-like normalized landmarks for a curl: the wrist swings around the elbow, with jitter."""
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(0.2, 0.8, size=(frames, pose_math.NUM_LANDMARKS, 2))
+    t = np.arange(frames)
+    elbow_angle = np.radians(110 + 70 * np.sin(t / 15.0)) + rng.normal(0, 0.02, frames)
+    coords[:, 11] = (0.50, 0.30)
+    coords[:, 13] = (0.50, 0.50)
+    coords[:, 15, 0] = 0.50 + 0.2 * np.sin(elbow_angle)
+    coords[:, 15, 1] = 0.50 - 0.2 * np.cos(elbow_angle)
+    return [[SimpleNamespace(x=float(x), y=float(y)) for x, y in frame] for frame in coords]
+
+
+def legacy_frame_math(frames):
+    """The old trainer loop: lmList of [id, x, y], math.atan2 and scalar np.interp per frame."""
+    dir, count, scores = 0, 0, []
+    for landmarks in frames:
+        lmList = []
+        for id, lm in enumerate(landmarks):
+            lmList.append([id, int(lm.x * WIDTH), int(lm.y * HEIGHT)])
+        x1, y1 = lmList[JOINTS[0]][1:]
+        x2, y2 = lmList[JOINTS[1]][1:]
+        x3, y3 = lmList[JOINTS[2]][1:]
+        angle = math.degrees(math.atan2(y3 - y2, x3 - x2) - math.atan2(y1 - y2, x1 - x2))
+        if angle < 0:
+            angle += 360
+        per = np.interp(angle, (60, 160), (100, 0))
+        scores.append(per)
+        if per == 100 and dir == 0:
+            count += 0.5
+            dir = 1
+        if per == 0 and dir == 1:
+            count += 0.5
+            dir = 0
+    return count, scores
+
+
+def per_frame_math(frames):
+    """The new trainer loop: one landmark array and the shared kernel per frame."""
+    counter, scores = pose_math.RepCounter(), []
+    for landmarks in frames:
+        points = pose_math.landmarks_to_array(landmarks, WIDTH, HEIGHT)
+        per = float(pose_math.form_scores(pose_math.joint_angles(points, *JOINTS)))
+        scores.append(per)
+        counter.update(per)
+    return counter.count, scores
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frames/sec of the per-frame pose math (no model inference)")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=256, help="Frames per buffered window")
+    args = parser.parse_args()
+
+    frames = synthetic_landmarks(args.frames)
+    (legacy_count, legacy_scores), legacy_s = timed(legacy_frame_math, frames)
+    (frame_count, frame_scores), frame_s = timed(per_frame_math, frames)
+
+    # Landmark conversion happens once per frame as results arrive; the window kernel runs on the buffer
+    window_points = np.stack([pose_math.landmarks_to_array(landmarks, WIDTH, HEIGHT) for landmarks in frames])
+    counter, window_scores = pose_math.RepCounter(), []
+    start = time.perf_counter()
+    for i in range(0, args.frames, args.window):
+        _, scores, _ = pose_math.evaluate_window(window_points[i:i + args.window], JOINTS, counter)
+        window_scores.append(scores)
+    window_s = time.perf_counter() - start
+    window_scores = np.concatenate(window_scores)
+
+    assert frame_count == legacy_count == counter.count, (legacy_count, frame_count, counter.count)
+    assert np.array_equal(np.array(legacy_scores), np.array(frame_scores)), "per-frame scores differ"
+    assert np.allclose(np.array(legacy_scores), window_scores, rtol=0, atol=1e-9), "window scores differ"
+    assert round(sum(legacy_scores) / len(legacy_scores), 2) == round(float(window_scores.mean()), 2)
+
+    print(f"{args.frames} frames, {legacy_count:g} reps, identical counts and scores on every path")
+    print(f"  legacy lmList + math.atan2  : {args.frames / legacy_s:12,.0f} frames/s")
+    print(f"  array per frame             : {args.frames / frame_s:12,.0f} frames/s")
+    print(f"  buffered window ({args.window:>4} frames): {args.frames / window_s:12,.0f} frames/s (kernel only)")
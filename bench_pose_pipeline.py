@@ -0,0 +1,62 @@
+import argparse
+import json
+import time
+
+import pose_pipeline
+
+
+def simulated_stages(frames, capture_ms, inference_ms, render_ms):
+    """Stand-ins that block like cv2/MediaPipe do (those release the GIL while they work)."""
+    remaining = {"frames": frames, "tracked": 0}
+
+    def read_frame():
+        if remaining["frames"] == 0:
+            return None
+        remaining["frames"] -= 1
+        time.sleep(capture_ms / 1000)  # waiting for the camera's next frame
+        return object()
+
+    def infer(frame):
+        time.sleep(inference_ms / 1000)
+        remaining["tracked"] += 1  # the trainer's angle / score / rep update happens here
+        return "landmarks"
+
+    def render(frame, result):
+        time.sleep(render_ms / 1000)
+        return True
+
+    return read_frame, infer, render, remaining
+
+
+def report(name, stats, tracked, frames):
+    print(f"{name:>9}: tracked {tracked}/{frames} | render {stats['render']['fps']:5.1f} fps | inference {stats['inference']['fps']:5.1f} fps | "
+          f"capture {stats['capture']['fps']:5.1f} fps | latency p50 {stats['latency_p50_ms']:.0f} ms "
+          f"p95 {stats['latency_p95_ms']:.0f} ms | dropped {stats['dropped_frames']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serial vs pipelined trainer loop")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--capture-ms", type=float, default=33, help="Camera frame interval (30 fps)")
+    parser.add_argument("--inference-ms", type=float, default=25)
+    parser.add_argument("--render-ms", type=float, default=8)
+    parser.add_argument("--video", help="Run trainer.track_exercise headless on this video file instead")
+    parser.add_argument("--exercise", default="Squats")
+    args = parser.parse_args()
+
+    if args.video:
+        import trainer
+
+        for pipelined in (False, True):
+            result = trainer.track_exercise(args.exercise, 1, source=args.video, pipelined=pipelined, headless=True)
+            print(f"{'pipelined' if pipelined else 'serial'}: {result['reps']} reps, score {result['score']}")
+            print(json.dumps(result["pipeline"], indent=2))
+    else:
+        stage_args = (args.frames, args.capture_ms, args.inference_ms, args.render_ms)
+        *stages, counts = simulated_stages(*stage_args)
+        report("serial", pose_pipeline.run_serial(*stages), counts["tracked"], args.frames)
+        *stages, counts = simulated_stages(*stage_args)
+        stats = pose_pipeline.PosePipeline(*stages).run()
+        report("pipelined", stats, counts["tracked"], args.frames)
+        # Rendering may drop frames, scoring must not (frames dropped before inference are never seen)
+        assert counts["tracked"] == stats["inference"]["frames"], "inferred frames were not all tracked"
@@ -0,0 +1,99 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pose_pool
+
+
+class FakePose:
+    """Stand-in for MediaPipe Pose: slow to build, cheap to reset."""
+
+    def __init__(self, config, build_seconds, live):
+        time.sleep(build_seconds)
+        self.config = config
+        self.live = live
+        self.resets = 0
+        live.change(1)
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.live.change(-1)
+
+
+class LiveCount:
+    """Models currently in memory, and the most there ever were at once."""
+
+    def __init__(self):
+        self.now = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def change(self, delta):
+        with self.lock:
+            self.now += delta
+            self.peak = max(self.peak, self.now)
+
+
+def simulate(sessions, concurrency, configs, build_seconds, workout_seconds, pooled, max_instances):
+    """Runs sessions workouts, concurrency at a time; returns wall time, models built and peak models in memory."""
+    live = LiveCount()
+    built = []
+
+    def factory(config):
+        pose = FakePose(config, build_seconds, live)
+        built.append(pose)
+        return pose
+
+    pool = pose_pool.PosePool(factory, max_instances=max_instances)
+
+    def workout(i):
+        config = configs[i % len(configs)]
+        started = time.perf_counter()
+        if pooled:
+            with pool.pose(config):
+                time.sleep(workout_seconds)
+        else:
+            pose = factory(config)  # a model per session, dropped afterwards
+            time.sleep(workout_seconds)
+            pose.close()
+        return time.perf_counter() - started
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        durations = sorted(executor.map(workout, range(sessions)))
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "models_built": len(built),
+        "peak_models": live.peak,
+        "session_p95_ms": round(durations[int(len(durations) * 0.95) - 1] * 1000, 1),
+        "pool": pool.stats() if pooled else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pose model pool vs building a model per workout")
+    parser.add_argument("--sessions", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-instances", type=int, default=4)
+    parser.add_argument("--build-ms", type=float, default=400, help="Simulated model load time")
+    parser.add_argument("--workout-ms", type=float, default=100, help="Simulated workout length")
+    args = parser.parse_args()
+
+    # Most users keep the default accuracy; one in four picks Fast
+    configs = [pose_pool.PoseConfig(model_complexity=1)] * 3 + [pose_pool.PoseConfig(model_complexity=0)]
+    common = dict(sessions=args.sessions, concurrency=args.concurrency, configs=configs,
+                  build_seconds=args.build_ms / 1000, workout_seconds=args.workout_ms / 1000,
+                  max_instances=args.max_instances)
+    fresh = simulate(pooled=False, **common)
+    pooled = simulate(pooled=True, **common)
+    assert pooled["models_built"] <= fresh["models_built"]
+    assert pooled["peak_models"] <= args.max_instances
+    print(f"New model per workout: {json.dumps(fresh)}")
+    print(f"Pooled models        : {json.dumps(pooled)}")
+    print(f"{fresh['models_built'] - pooled['models_built']} model loads avoided, "
+          f"peak models in memory {fresh['peak_models']} -> {pooled['peak_models']}, "
+          f"wall time {fresh['seconds']} s -> {pooled['seconds']} s")
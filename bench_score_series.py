@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import score_series
+
+
+def synthetic_session(frames, fps=30):
+    """Curl-like joint angles with noise, and their form scores."""
+    times = np.arange(frames) / fps
+    angles = 105 + 65 * np.cos(times * 2 * np.pi / 3) + np.random.default_rng(0).normal(0, 2, frames)
+    scores = np.interp(angles, (60, 160), (0, 100))
+    return times, angles, scores
+
+
+def list_bytes(values):
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bounded score series vs the per-frame Python list")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    frames = int(args.minutes * 60 * args.fps)
+    times, angles, scores = synthetic_session(frames, args.fps)
+    print(f"{args.minutes:g} min session: {frames} frames")
+
+    start = time.perf_counter()
+    score_list = []
+    for score in scores.tolist():
+        score_list.append(score)
+    list_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    series = score_series.ScoreSeries()
+    for sample in zip(times.tolist(), angles.tolist(), scores.tolist()):
+        series.append(*sample)
+    series_ms = (time.perf_counter() - start) * 1000
+    assert abs(series.mean_score - scores.mean()) < 1e-6
+    series_bytes = series.times.nbytes + series.angles.nbytes + series.scores.nbytes
+    print(f"  Python list (scores only): {list_bytes(score_list) / 1024:8.0f} KiB | {list_ms:6.1f} ms to append")
+    print(f"  ScoreSeries (time/angle/score): {series_bytes / 1024:3.0f} KiB | {series_ms:6.1f} ms to append "
+          f"| {len(series)} samples, stride {series.stride}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, method, points in (("every frame", "decimate", frames),
+                                      ("decimated", "decimate", score_series.CHART_POINTS),
+                                      ("LTTB", "lttb", score_series.CHART_POINTS)):
+            full = score_series.ScoreSeries(capacity=frames + frames % 2)
+            full.times[:frames], full.angles[:frames], full.scores[:frames] = times, angles, scores
+            full.size, full.frames, full.score_sum = frames, frames, float(scores.sum())
+            source = full if label == "every frame" else series
+            start = time.perf_counter()
+            path = score_series.render_chart(source, os.path.join(workdir, f"{label}.png"), points=points, method=method)
+            print(f"  chart, {label:11s}: {(time.perf_counter() - start) * 1000:7.1f} ms | "
+                  f"{os.path.getsize(path) / 1024:5.0f} KiB png")
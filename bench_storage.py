@@ -0,0 +1,99 @@
+import argparse
+import os
+import tempfile
+import time
+from multiprocessing import Pool
+
+import storage
+
+
+def make_backend(backend_name, base_dir):
+    if backend_name == "sqlite":
+        return storage.SqliteBackend(os.path.join(base_dir, "flexa.db"))
+    return storage.BACKENDS[backend_name](base_dir)
+
+
+def writer(args):
+    """One concurrent writer: appends history records and saves new profiles."""
+    backend_name, base_dir, writer_id, count = args
+    backend = make_backend(backend_name, base_dir)
+    user_ids = []
+    for i in range(count):
+        backend.append_record("stress_history", {"writer": writer_id, "i": i})
+        user_id = backend.next_id("stress_profiles")
+        backend.set_item("stress_profiles", user_id, {"writer": writer_id, "i": i})
+        user_ids.append(user_id)
+    return user_ids
+
+
+def run(backend_name, writers, records):
+    """Runs the stress test against one backend and checks that nothing was lost."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        make_backend(backend_name, base_dir)  # create schema before the writers race
+
+        start = time.perf_counter()
+        with Pool(writers) as pool:
+            results = pool.map(writer, [(backend_name, base_dir, w, records) for w in range(writers)])
+        elapsed = time.perf_counter() - start
+
+        backend = make_backend(backend_name, base_dir)
+        expected = writers * records
+        history = backend.load_records("stress_history")
+        profiles = backend.load_document("stress_profiles")
+        user_ids = [user_id for ids in results for user_id in ids]
+
+        ok = (
+            len(history) == expected
+            and len(profiles) == expected
+            and sorted(user_ids) == list(range(1, expected + 1))
+        )
+        print(f"{backend_name:>6}: {writers} writers x {records} records in {elapsed:.2f}s "
+              f"({expected / elapsed:.0f} writes/s) | history={len(history)} profiles={len(profiles)} "
+              f"unique_ids={len(set(user_ids))} -> {'OK' if ok else 'LOST RECORDS'}")
+        return ok
+
+
+def check_backend_switch():
+    """Writes bills and workout rollups with the JSONL backend, switches to SQLite and checks they were all imported."""
+    import bill_store
+    import workout_rollups
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            storage._storage = storage.JsonlLogBackend()
+            for i in range(3):
+                bill_store.save_bill({"bill_name": f"Dinner {i}", "date": f"2026-10-0{i + 1}", "participants": ["Kayla"],
+                                      "items": [{"item_name": "Pizza", "price": 12.5, "quantity": 2}], "taxes": []})
+            expected = [bill_store.load_bill(bill_id) for bill_id in (1, 2, 3)]
+            for day in range(1, 20):
+                workout_rollups.append_record({"exercise_name": "Squats", "reps": 10, "score": 80.0, "calories": 4.0,
+                                               "timestamp": f"2026-{day % 3 + 8:02d}-{day:02d} 08:00:00"})
+            expected_rollups = workout_rollups.frame("day")
+
+            storage._storage = storage.SqliteBackend()  # first start: imports ./database
+            bills, count = bill_store.list_bills()
+            imported = [bill_store.load_bill(bill_id) for bill_id in (1, 2, 3)]
+            next_id = bill_store.next_bill_id()
+            rollups = workout_rollups.frame("day")
+        finally:
+            storage._storage = None
+            os.chdir(cwd)
+    ok = count == 3 and len(bills) == 3 and imported == expected and next_id == 4 and rollups.equals(expected_rollups)
+    print(f"jsonl -> sqlite: {len(bills)}/{count} bills listed, next ID {next_id}, "
+          f"{len(rollups)}/{len(expected_rollups)} rollup days -> {'OK' if ok else 'LOST DATA'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent writer stress test for storage.py")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--backend", choices=list(storage.BACKENDS) + ["all"], default="all")
+    args = parser.parse_args()
+
+    backends = list(storage.BACKENDS) if args.backend == "all" else [args.backend]
+    results = [run(name, args.writers, args.records) for name in backends]
+    results.append(check_backend_switch())
+    raise SystemExit(0 if all(results) else 1)
@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+EXERCISES = ["Push-ups", "Squats", "Bicep Curls", "Lunges", "Jumping Jacks"]
+
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[runs // 2]
+
+
+def plot(x, calories, scores):
+    """The two progress charts analytics.display_graphs draws (without Streamlit)."""
+    for values in (calories, scores):
+        fig, ax = plt.subplots()
+        ax.plot(x, values, marker="o", linestyle="-")
+        fig.canvas.draw()
+        plt.close(fig)
+
+
+def full_history_render(storage, pd):
+    """The old display_graphs: every session parsed, sorted and plotted."""
+    df = pd.DataFrame(storage.load_records("workout_history"))
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.sort_values("timestamp")
+    plot(df["timestamp"], df["calories"], df["score"])
+
+
+def rollup_render(workout_rollups):
+    period, df = workout_rollups.chart_frame()
+    plot(df.index, df["calories"], df["score"])
+    return period, len(df)
+
+
+def session(i, total, years):
+    day = datetime.date(2020, 1, 1) + datetime.timedelta(days=int(i * years * 365 / total))
+    return {"exercise_name": EXERCISES[i % len(EXERCISES)], "reps": 10 + i % 15, "score": 60.0 + i % 40,
+            "calories": 5.0 + i % 15 * 0.5, "timestamp": f"{day.isoformat()} {8 + i % 12:02d}:00:00"}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Progress chart render time as workout history grows")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--years", type=float, default=4, help="Time span the largest history covers")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("FLEXA_FSYNC", "never")  # seeding speed only
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import pandas as pd
+        import storage
+        import workout_rollups
+
+        total = max(args.sessions)
+        seeded = 0
+        print(f"{'sessions':>9} | {'full history':>12} | {'rollups':>9} | {'rollup data':>11} | points")
+        for size in sorted(args.sessions):
+            for i in range(seeded, size):
+                storage.append_record("workout_history", session(i, total, args.years))
+            seeded = size
+            workout_rollups.rebuild()  # seeding only; the app folds in each session as it is recorded
+
+            full_ms = median_ms(lambda: full_history_render(storage, pd), args.runs)
+            rollup_ms = median_ms(lambda: rollup_render(workout_rollups), args.runs)
+            data_ms = median_ms(workout_rollups.chart_frame, args.runs)
+            period, points = rollup_render(workout_rollups)
+            print(f"{size:>9} | {full_ms:>9.1f} ms | {rollup_ms:>6.1f} ms | {data_ms:>8.1f} ms | {points} ({period})")
+
+        # Cost of keeping the rollups current, per recorded session
+        extra = [session(total + i, total, args.years) for i in range(200)]
+        start = time.perf_counter()
+        for record in extra[:100]:
+            storage.append_record("workout_history", record)
+        append_ms = (time.perf_counter() - start) * 1000 / 100
+        workout_rollups.rebuild()  # picks up the sessions appended without the rollups
+        start = time.perf_counter()
+        for record in extra[100:]:
+            workout_rollups.append_record(record)
+        add_ms = (time.perf_counter() - start) * 1000 / 100 - append_ms
+
+        incremental = workout_rollups.frame("week")
+        workout_rollups.rebuild()
+        assert incremental.equals(workout_rollups.frame("week")), "incremental rollups drifted from a full rebuild"
+        assert incremental["sessions"].sum() == total + len(extra)
+        print(f"per session: append {append_ms:.2f} ms + rollup update {add_ms:.2f} ms "
+              f"({storage.STORAGE_BACKEND} backend); incremental == full rebuild")
+
+        # Sessions recorded while another session rebuilds must each be counted once
+        racing = [session(total + len(extra) + i, total, args.years) for i in range(40)]
+        rebuilder = threading.Thread(target=lambda: [workout_rollups.rebuild() for _ in range(3)])
+        rebuilder.start()
+        for record in racing:
+            workout_rollups.append_record(record)
+        rebuilder.join()
+        sessions = workout_rollups.frame("week")["sessions"].sum()
+        assert sessions == total + len(extra) + len(racing), f"{sessions} sessions counted during rebuilds"
+        print(f"{len(racing)} sessions recorded during rebuilds: each counted once")
@@ -101,53 +101,133 @@
 import base64
 import json
 import os
-import requests
 from dotenv import load_dotenv
 import re
+import bill_store
+import extraction_cache
+import image_prep
+import local_ocr
+import gemini_stream
+import http_client
 
 # Load environment variables
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Updated Gemini API Endpoint (Using gemini-1.5-flash)
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+# Updated Gemini API Endpoint (Using gemini-1.5-flash); override GEMINI_URL to point at a local stub
+GEMINI_URL = os.getenv("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent")
 
-def encode_image_to_base64(image_file):
-    """Convert image file to base64 encoding."""
-    return base64.b64encode(image_file.read()).decode("utf-8")
+# Bump PROMPT_VERSION whenever BILL_PROMPT changes so cached extractions are not reused
+BILL_PROMPT = "Extract the structured bill details including bill_name, items with their quantity and price, all taxes, and tips from this image. Return data in structured JSON format."
+PROMPT_VERSION = "bill-v1"
+
+# Extraction engine: "gemini" (remote), "local" (offline Tesseract OCR) or "auto" (Gemini when a key is set)
+OCR_ENGINE = os.getenv("FLEXA_OCR_ENGINE", "auto")
+ENGINES = ("auto", "gemini", "local")
+
+def encode_image_to_base64(image_bytes):
+    """Convert image bytes to base64 encoding."""
+    return base64.b64encode(image_bytes).decode("utf-8")
 
 def get_next_bill_id():
-    """Retrieve the next available bill ID from stored data."""
-    file_path = os.path.join("./database", "bill_data.json")
-    
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as json_file:
-                existing_data = json.load(json_file)
-                return existing_data.get("bill_id", 0) + 1
-        except json.JSONDecodeError:
-            return 1
-    return 1
-
-def process_bill(uploaded_file):
-    """Processes the uploaded bill image and extracts details using Gemini API."""
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY is missing. Make sure it's set in your .env file.")
-    
-    # Convert image to base64
-    image_base64 = encode_image_to_base64(uploaded_file)
+    """Retrieve the next available bill ID from the bill store."""
+    return bill_store.next_bill_id()
+
+def resolve_engine(engine=None):
+    """Picks the extraction engine for a call; "auto" falls back to local OCR without a Gemini key."""
+    engine = engine or OCR_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine: {engine}. Choose one of {', '.join(ENGINES)}.")
+    if engine == "auto":
+        return "gemini" if GEMINI_API_KEY else "local"
+    return engine
+
+def get_cache_key(image_bytes, engine="gemini"):
+    """Extraction cache key for an uploaded image (raw bytes + engine, prompt and pre-processing versions)."""
+    if engine == "local":
+        return extraction_cache.make_key(image_bytes, f"{local_ocr.LOCAL_OCR_VERSION}/{image_prep.PREP_VERSION}")
+    return extraction_cache.make_key(image_bytes, f"{PROMPT_VERSION}/{image_prep.PREP_VERSION}")
+
+def build_gemini_request(image_bytes):
+    """Request body asking Gemini to extract the bill from a pre-processed image.
     
-    headers = {"Content-Type": "application/json"}
+    Returns (request_body, prep_stats) where prep_stats reports the bytes saved.
+    """
+    prepared_bytes, mime_type, prep_stats = image_prep.preprocess_image(image_bytes)
     data = {
         "contents": [
             {"parts": [
-                {"text": "Extract the structured bill details including bill_name, items with their quantity and price, all taxes, and tips from this image. Return data in structured JSON format."},
-                {"inline_data": {"mime_type": "image/jpeg", "data": image_base64}}
+                {"text": BILL_PROMPT},
+                {"inline_data": {"mime_type": mime_type, "data": encode_image_to_base64(prepared_bytes)}}
             ]}
         ]
     }
+    return data, prep_stats
+
+def extract_response_text(response_data):
+    """Pulls the generated text out of a Gemini response, without markdown fences."""
+    extracted_text = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
     
-    response = requests.post(f"{GEMINI_URL}?key={GEMINI_API_KEY}", json=data, headers=headers)
+    # Remove markdown-style JSON formatting
+    return re.sub(r'^```json\n|```$', '', extracted_text.strip(), flags=re.MULTILINE)
+
+def load_cached_bill(cache_key):
+    """Returns the bill for a previously extracted image, or None if it was never extracted."""
+    cached_data = extraction_cache.get(cache_key)
+    if cached_data is None:
+        return None
+    existing_bill = bill_store.load_bill(cached_data["bill_id"])
+    if existing_bill:
+        return existing_bill
+    # The bill was removed from the store; reuse the extraction under a new ID
+    return store_extraction(cached_data, cache_key)
+
+def store_extraction(structured_data, cache_key):
+    """Assigns a bill ID, saves the bill and caches the extraction for this image."""
+    # Assign auto-incremented bill ID
+    structured_data["bill_id"] = get_next_bill_id()
+    
+    # Save structured data to the bill store
+    save_bill_data(structured_data)
+    
+    # Only cache extractions that parsed into structured JSON
+    if "raw_text" not in structured_data:
+        extraction_cache.put(cache_key, structured_data)
+    
+    return structured_data
+
+def extract_local(image_bytes, cache_key):
+    """Runs the offline OCR engine on a cache miss and stores the result."""
+    structured_data = local_ocr.extract_bill(image_bytes)
+    if not structured_data["items"]:
+        print("⚠ Offline OCR found no line items in the bill image!")
+        return {}
+    return store_extraction(structured_data, cache_key)
+
+def process_bill(uploaded_file, engine=None):
+    """Processes the uploaded bill image and extracts details using Gemini API or the offline OCR engine."""
+    image_bytes = uploaded_file.read()
+    engine = resolve_engine(engine)
+    
+    # Same image + same prompt -> reuse the earlier extraction instead of calling Gemini again
+    cache_key = get_cache_key(image_bytes, engine)
+    cached_bill = load_cached_bill(cache_key)
+    if cached_bill is not None:
+        return cached_bill
+    
+    if engine == "local":
+        return extract_local(image_bytes, cache_key)
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY is missing. Make sure it's set in your .env file.")
+    
+    headers = {"Content-Type": "application/json"}
+    data, prep_stats = build_gemini_request(image_bytes)
+    print(f"🗜 Pre-processing saved {prep_stats['bytes_saved'] / 1024:.0f} KB "
+          f"({prep_stats['original_bytes'] / 1024:.0f} KB -> {prep_stats['processed_bytes'] / 1024:.0f} KB)")
+    
+    response = http_client.post(f"{GEMINI_URL}?key={GEMINI_API_KEY}", json=data, headers=headers,
+                                endpoint="gemini:generateContent", retries=http_client.RETRIES)
     
     if response.status_code != 200:
         raise ValueError(f"Failed to process bill. API response error: {response.text}")
@@ -155,25 +235,50 @@ def process_bill(uploaded_file):
     response_data = response.json()
     print("🔍 Raw API Response:", json.dumps(response_data, indent=4))  # Debugging output
     
-    extracted_text = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+    extracted_text = extract_response_text(response_data)
     
     if not extracted_text:
         print("⚠ No text extracted from the bill image!")
         return {}
     
-    # Remove markdown-style JSON formatting
-    extracted_text = re.sub(r'^```json\n|```$', '', extracted_text.strip(), flags=re.MULTILINE)
-    
     # Parse the extracted text into structured data
     structured_data = parse_bill_text(extracted_text)
     
-    # Assign auto-incremented bill ID
-    structured_data["bill_id"] = get_next_bill_id()
+    return store_extraction(structured_data, cache_key)
+
+def stream_bill(uploaded_file, engine=None):
+    """Streaming version of process_bill.
     
-    # Save structured data to JSON file
-    save_bill_data(structured_data)
+    Yields ("item", item) for each line item as soon as Gemini has produced it,
+    then ("metrics", {...}) with time-to-first-item, and finally ("bill", bill).
+    Cached bills and the offline engine yield all their items at once.
+    """
+    image_bytes = uploaded_file.read()
+    engine = resolve_engine(engine)
     
-    return structured_data
+    cache_key = get_cache_key(image_bytes, engine)
+    structured_data = load_cached_bill(cache_key)
+    if structured_data is None and engine == "gemini":
+        if not GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY is missing. Make sure it's set in your .env file.")
+        
+        data, _ = build_gemini_request(image_bytes)
+        stream = gemini_stream.GeminiJsonStream(GEMINI_URL, GEMINI_API_KEY, data,
+                                                is_item=lambda kind, key: kind == "element" and key == "items")
+        for kind, key, value in stream:
+            if kind == "element" and key == "items":
+                yield "item", value
+        
+        yield "metrics", {"time_to_first_item": stream.time_to_first_item, "total_time": stream.total_time}
+        structured_data = stream.result if isinstance(stream.result, dict) else parse_bill_text(stream.raw_text)
+        yield "bill", store_extraction(structured_data, cache_key)
+        return
+    
+    if structured_data is None:
+        structured_data = extract_local(image_bytes, cache_key)
+    for item in structured_data.get("items", []):
+        yield "item", item
+    yield "bill", structured_data
 
 def parse_bill_text(extracted_text):
     """Parses extracted text into structured JSON format."""
@@ -187,14 +292,10 @@ def parse_bill_text(extracted_text):
     return structured_data
 
 def save_bill_data(data):
-    """Saves the extracted bill data to a JSON file in ./database."""
-    os.makedirs("./database", exist_ok=True)
-    file_path = os.path.join("./database", "bill_data.json")
-    
-    with open(file_path, "w") as json_file:
-        json.dump(data, json_file, indent=4)
+    """Saves the extracted bill data to the bill store under its bill_id."""
+    bill_id = bill_store.save_bill(data)
     
-    print(f"Bill data saved successfully to {file_path}")
+    print(f"Bill data saved successfully as bill {bill_id}")
 
 def main(image_path):
     """Main function to test bill processing."""
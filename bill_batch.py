@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import bill
+import http_client
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def find_receipts(source):
+    """Image paths from a directory, or from a manifest (.json list or one path per line)."""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r") as file:
+        if source.endswith(".json"):
+            paths = json.load(file)
+        else:
+            paths = [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    return [path if os.path.isabs(path) else os.path.join(base_dir, path) for path in paths]
+
+
+def call_gemini(data, url, api_key, max_retries=4):
+    """POSTs one request body to Gemini; the shared client retries 429/5xx with jittered backoff."""
+    response = http_client.post(f"{url}?key={api_key}", json=data, endpoint="gemini:generateContent",
+                                retries=max_retries)
+    if response.status_code != 200:
+        raise ValueError(f"Failed to process bill. API response error: {response.status_code} {response.text}")
+    return response.json()
+
+
+def extract_receipt(path, url, api_key, max_retries):
+    """Extracts and stores one receipt; returns (path, bill, latency_seconds, cache_hit, bytes_saved)."""
+    start = time.perf_counter()
+    with open(path, "rb") as image_file:
+        image_bytes = image_file.read()
+
+    cache_key = bill.get_cache_key(image_bytes)
+    cached_bill = bill.load_cached_bill(cache_key)
+    if cached_bill is not None:
+        return path, cached_bill, time.perf_counter() - start, True, 0
+
+    data, prep_stats = bill.build_gemini_request(image_bytes)
+    response_data = call_gemini(data, url, api_key, max_retries)
+    structured_data = bill.parse_bill_text(bill.extract_response_text(response_data))
+    stored_bill = bill.store_extraction(structured_data, cache_key)
+    return path, stored_bill, time.perf_counter() - start, False, prep_stats["bytes_saved"]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def ingest(paths, max_in_flight=4, max_retries=4, url=None, api_key=None, on_result=None):
+    """Runs the Gemini extraction for many receipts with at most max_in_flight requests at once.
+
+    Each bill is written to the bill store as soon as its request finishes;
+    on_result(path, bill) is called for each one. Returns a throughput/latency report.
+    """
+    url = url or bill.GEMINI_URL
+    api_key = api_key or bill.GEMINI_API_KEY
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY is missing. Make sure it's set in your .env file.")
+
+    latencies = []
+    failures = []
+    cache_hits = 0
+    bytes_saved = 0
+    start = time.perf_counter()
+
+    # Requests share http_client's keep-alive pool, which also caps connections per host
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        futures = {
+            executor.submit(extract_receipt, path, url, api_key, max_retries): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            try:
+                path, stored_bill, latency, cache_hit, saved = future.result()
+            except Exception as e:
+                failures.append({"path": futures[future], "error": str(e)})
+                continue
+            latencies.append(latency)
+            cache_hits += cache_hit
+            bytes_saved += saved
+            if on_result:
+                on_result(path, stored_bill)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "receipts": len(latencies),
+        "failed": len(failures),
+        "failures": failures,
+        "cache_hits": cache_hits,
+        "bytes_saved": bytes_saved,
+        "elapsed_seconds": round(elapsed, 3),
+        "receipts_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_latency_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_latency_ms": round(percentile(latencies, 95) * 1000, 1),
+        "http": http_client.metrics().get("gemini:generateContent", {}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk receipt ingestion into the Flexa bill store")
+    parser.add_argument("source", help="Directory of receipt images or a manifest file")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum Gemini requests in flight")
+    parser.add_argument("--retries", type=int, default=4)
+    args = parser.parse_args()
+
+    receipts = find_receipts(args.source)
+    print(f"📸 Ingesting {len(receipts)} receipts with {args.concurrency} in flight...")
+    report = ingest(
+        receipts, args.concurrency, args.retries,
+        on_result=lambda path, stored_bill: print(f"✅ {path} -> bill {stored_bill.get('bill_id')}"),
+    )
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,167 @@
+import datetime
+
+import storage
+import db_cache
+
+# Storage collections for bills
+BILL_HEADERS = "bill_headers"                    # bill_headers/<bill_id> -> header (no line items)
+BILL_ITEMS = "bill_items"                        # bill_items/<bill_id> -> items & taxes, loaded on demand
+DATE_INDEX = "bill_index_date"                   # YYYY-MM-DD -> [bill_id]; also the list of all bills
+PARTICIPANT_INDEX = "bill_index_participant"     # name -> [bill_id]
+BILLS = "bills"                                  # bill ID counter (bills.seq)
+LEGACY_BILL = "bill_data"                        # old single overwritten bill
+
+# Receipt date formats tried after ISO, for the YYYY-MM-DD date index
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%m/%d/%Y", "%d/%m/%y", "%d %b %Y", "%d %B %Y", "%b %d, %Y")
+
+_legacy_checked = False
+
+
+def _bill_total(bill):
+    total = sum(item.get("price", 0) * item.get("quantity", 1) for item in bill.get("items", []))
+    total += sum(tax.get("amount", 0) for tax in bill.get("taxes", []))
+    return round(total, 2)
+
+
+def _date_key(value):
+    """A bill date as YYYY-MM-DD (today if it can't be read), so the date index has one key per day."""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    text = str(value or "").strip()
+    try:
+        return datetime.date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return datetime.date.today().isoformat()
+
+
+def _header_name(bill_id):
+    return f"{BILL_HEADERS}/{bill_id}"
+
+
+def _all_bill_ids():
+    return {int(bill_id) for bill_ids in db_cache.load_document(DATE_INDEX).values() for bill_id in bill_ids}
+
+
+def _add_to_index(index_name, key, bill_id):
+    def add(bill_ids):
+        bill_ids = bill_ids or []
+        if bill_id not in bill_ids:
+            bill_ids.append(bill_id)
+        return bill_ids
+    storage.update_item(index_name, key, add)
+
+
+def _remove_from_index(index_name, key, bill_id):
+    storage.update_item(index_name, key, lambda bill_ids: [b for b in (bill_ids or []) if b != bill_id])
+
+
+def _migrate_legacy_bill():
+    """Carries the old single ./database/bill_data.json bill over into the store once."""
+    global _legacy_checked
+    if _legacy_checked:
+        return
+    _legacy_checked = True
+    legacy = storage.load_document(LEGACY_BILL)
+    if legacy.get("bill_id") and not storage.load_document(_header_name(legacy["bill_id"])):
+        save_bill(legacy)
+
+
+def next_bill_id():
+    """Allocates a new bill ID, continuing from the stored bills / legacy bill_data.json if present."""
+    return storage.next_id(BILLS, seed=lambda: max(
+        [int(storage.load_document(LEGACY_BILL).get("bill_id", 0)), *_all_bill_ids()]))
+
+
+def save_bill(bill):
+    """Stores a bill under its bill_id; the header and the line items are kept apart."""
+    bill_id = bill.get("bill_id") or next_bill_id()
+    date = _date_key(bill.get("date"))
+    participants = bill.get("participants", [])
+
+    storage.save_document(f"{BILL_ITEMS}/{bill_id}", {
+        "items": bill.get("items", []),
+        "taxes": bill.get("taxes", []),
+    })
+
+    header = {key: value for key, value in bill.items() if key not in ("items", "taxes")}
+    header.update({
+        "bill_id": bill_id,
+        "bill_name": bill.get("bill_name", f"Bill {bill_id}"),
+        "date": date,
+        "participants": participants,
+        "item_count": len(bill.get("items", [])),
+        "total": _bill_total(bill),
+    })
+    storage.save_document(_header_name(bill_id), header)
+
+    _add_to_index(DATE_INDEX, date, bill_id)
+    for participant in participants:
+        _add_to_index(PARTICIPANT_INDEX, participant, bill_id)
+    return bill_id
+
+
+def get_bill(bill_id):
+    """Bill header (name, date, participants, total) without line items."""
+    _migrate_legacy_bill()
+    return db_cache.load_document(_header_name(bill_id)) or None
+
+
+def get_bill_items(bill_id):
+    """Line items and taxes of one bill, read only when the bill is opened."""
+    data = db_cache.load_document(f"{BILL_ITEMS}/{bill_id}")
+    return {"items": data.get("items", []), "taxes": data.get("taxes", [])}
+
+
+def load_bill(bill_id):
+    """Full bill in the {bill_id, bill_name, items, taxes} shape the app expects."""
+    header = get_bill(bill_id)
+    if header is None:
+        return None
+    return {**header, **get_bill_items(bill_id)}
+
+
+def list_bills(page=1, page_size=20):
+    """Newest-first page of bill headers, plus the total number of bills."""
+    _migrate_legacy_bill()
+    bill_ids = sorted(_all_bill_ids(), reverse=True)
+    start = (page - 1) * page_size
+    headers = [get_bill(bill_id) for bill_id in bill_ids[start:start + page_size]]
+    return [header for header in headers if header], len(bill_ids)
+
+
+def all_bills():
+    """Every bill in full, oldest first."""
+    _migrate_legacy_bill()
+    return [bill for bill in map(load_bill, sorted(_all_bill_ids())) if bill]
+
+
+def bills_by_date(date):
+    """Headers of the bills recorded on a date (YYYY-MM-DD, or any format _date_key reads)."""
+    return [bill for bill in map(get_bill, db_cache.load_document(DATE_INDEX).get(_date_key(date), [])) if bill]
+
+
+def bills_by_participant(name):
+    """Headers of the bills a participant took part in."""
+    return [bill for bill in map(get_bill, db_cache.load_document(PARTICIPANT_INDEX).get(name, [])) if bill]
+
+
+def set_participants(bill_id, participants):
+    """Records who shared a bill and keeps the participant index in sync."""
+    header = get_bill(bill_id)
+    if header is None:
+        return
+    old = set(header.get("participants", []))
+    for name in old - set(participants):
+        _remove_from_index(PARTICIPANT_INDEX, name, bill_id)
+    for name in set(participants) - old:
+        _add_to_index(PARTICIPANT_INDEX, name, bill_id)
+    header = {**header, "participants": list(participants)}  # the db_cache copy is shared, don't mutate it
+    storage.save_document(_header_name(bill_id), header)
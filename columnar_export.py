@@ -0,0 +1,324 @@
+import argparse
+import json
+import os
+import shutil
+
+import db_cache
+import storage
+
+# Month-partitioned Parquet copies of the append-only histories, for reports
+# and history tables that need a few columns of a date range:
+#   ./database/columnar/<collection>/month=YYYY-MM/part-0.parquet
+# Columns are typed (timestamps, ints, floats) instead of JSON strings, and
+# query() reads only the requested columns of the months / rows that match.
+# Sessions and payments are written through append_record() (trainer,
+# stripe_payment), which only adds a line to _pending.jsonl; pending records
+# become a new part file in their month every FLUSH_EVERY appends or at the
+# next query, so no month file is ever re-read to add a record. The export
+# remembers the storage.version() it matches, so the first query, or one after
+# a write that skipped append(), re-exports from the JSON history (which also
+# merges the part files). Without pyarrow, query() falls back to the JSON history.
+COLUMNAR_DIR = os.path.join(storage.DATABASE_DIR, "columnar")
+META_FILE = "_meta.json"
+PENDING_FILE = "_pending.jsonl"
+FLUSH_EVERY = int(os.getenv("FLEXA_COLUMNAR_FLUSH_EVERY", "200"))
+# Re-export (one file per month again) once this many flushes added part files
+MAX_PARTS = int(os.getenv("FLEXA_COLUMNAR_MAX_PARTS", "50"))
+
+# collection -> [(column, type)]; "timestamp" decides the month partition
+SCHEMAS = {
+    "workout_history": [
+        ("timestamp", "timestamp"), ("exercise_name", "string"), ("reps", "int32"),
+        ("score", "float64"), ("calories", "float64"), ("series_id", "string"),
+    ],
+    "payment_history": [
+        ("transaction_id", "string"), ("timestamp", "timestamp"), ("sender", "string"),
+        ("receiver", "string"), ("amount", "float64"), ("status", "string"),
+    ],
+}
+
+
+def _pyarrow():
+    """(pyarrow, pyarrow.dataset, pyarrow.parquet), or None when pyarrow isn't installed."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow, pyarrow.dataset, pyarrow.parquet
+
+
+def available():
+    return _pyarrow() is not None
+
+
+def _schema(name):
+    pa = _pyarrow()[0]
+    types = {"timestamp": pa.timestamp("us"), "string": pa.string(), "int32": pa.int32(), "float64": pa.float64()}
+    return pa.schema([(column, types[kind]) for column, kind in SCHEMAS[name]])
+
+
+def _collection_dir(name):
+    return os.path.join(COLUMNAR_DIR, name)
+
+
+def _month_path(name, month, part=0):
+    return os.path.join(_collection_dir(name), f"month={month}", f"part-{part}.parquet")
+
+
+def _meta_path(name):
+    return os.path.join(_collection_dir(name), META_FILE)
+
+
+def _pending_path(name):
+    return os.path.join(_collection_dir(name), PENDING_FILE)
+
+
+def _read_meta(name):
+    try:
+        with open(_meta_path(name), "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _version(name):
+    """storage.version(name) as it reads back from the meta file (tuples become lists)."""
+    return json.loads(json.dumps(storage.version(name)))
+
+
+def _month(record):
+    return str(record.get("timestamp") or "")[:7] or "unknown"
+
+
+def to_table(name, records):
+    """Typed Arrow table of records (missing fields become nulls, extra fields are dropped)."""
+    pa = _pyarrow()[0]
+    schema = _schema(name)
+    columns = []
+    for field in schema:
+        values = [record.get(field.name) for record in records]
+        if pa.types.is_timestamp(field.type):
+            values = [None if value is None else str(value) for value in values]
+            columns.append(pa.array(values, type=pa.string()).cast(field.type))
+        else:
+            columns.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _write_month(name, month, table, part=0):
+    pq = _pyarrow()[2]
+    path = _month_path(name, month, part)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = os.path.join(os.path.dirname(path), f".part-{part}.{os.getpid()}.tmp")  # hidden from queries
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, path)
+
+
+def export(name):
+    """Rewrites every month partition of a collection from its JSON history; returns the record count."""
+    os.makedirs(_collection_dir(name), exist_ok=True)
+    with storage.file_lock(_meta_path(name)):
+        return _export(name)
+
+
+def _export(name):
+    # Under the meta lock, which append_record() holds across the history append too
+    version = _version(name)
+    records = storage.load_records(name)
+    months = {}
+    for record in records:
+        months.setdefault(_month(record), []).append(record)
+    for entry in os.listdir(_collection_dir(name)):
+        if entry.startswith("month="):
+            shutil.rmtree(os.path.join(_collection_dir(name), entry), ignore_errors=True)
+    for month, month_records in months.items():
+        _write_month(name, month, to_table(name, month_records))
+    if os.path.exists(_pending_path(name)):
+        os.remove(_pending_path(name))
+    storage.atomic_write_json(_meta_path(name), {"records": len(records), "months": sorted(months),
+                                                 "version": version, "pending": 0, "parts": 1})
+    return len(records)
+
+
+def _read_pending(name):
+    try:
+        with open(_pending_path(name), "r") as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _flush(name, meta):
+    """Writes the pending records as a new part file in each of their months (call under the meta lock).
+
+    Returns False if the pending file doesn't match meta (an append or flush
+    was interrupted); the caller re-exports then.
+    """
+    try:
+        records = _read_pending(name)
+    except json.JSONDecodeError:
+        return False
+    if len(records) != meta.get("pending", 0):
+        return False
+    months = {}
+    for record in records:
+        months.setdefault(_month(record), []).append(record)
+    part = meta.get("parts", 1)
+    for month, month_records in months.items():
+        _write_month(name, month, to_table(name, month_records), part)  # rewritten as-is if a flush was cut short
+    meta.update({"records": meta["records"] + len(records), "months": sorted(set(meta["months"]) | set(months)),
+                 "pending": 0, "parts": part + 1})
+    storage.atomic_write_json(_meta_path(name), meta)
+    os.remove(_pending_path(name))
+    return True
+
+
+def _current(name, meta):
+    """True if meta matches the JSON history and the part files don't need merging yet."""
+    return meta is not None and meta.get("version") == _version(name) and meta.get("parts", 1) <= MAX_PARTS
+
+
+def ensure_exported(name):
+    """Brings the Parquet copy up to date with the JSON history; True if anything was written.
+
+    Flushes pending appends, or re-exports when the history changed without
+    append_record() (or the part files need merging).
+    """
+    meta = _read_meta(name)
+    if _current(name, meta) and not meta.get("pending"):
+        return False
+    os.makedirs(_collection_dir(name), exist_ok=True)
+    with storage.file_lock(_meta_path(name)):
+        meta = _read_meta(name)  # another session may have caught up meanwhile
+        if _current(name, meta):
+            if not meta.get("pending"):
+                return False
+            if _flush(name, meta):
+                return True
+        _export(name)
+    return True
+
+
+def _append(name, record, previous_version):
+    """Queues one newly appended record for the Parquet copy (call under the meta lock).
+
+    previous_version is _version(name) from just before the record was
+    written. If the export doesn't match it, some write skipped
+    append_record(); the record is left to the re-export of the next query.
+    """
+    meta = _read_meta(name)
+    if meta is None or meta.get("version") != previous_version:
+        return
+    with open(_pending_path(name), "a") as file:
+        file.write(json.dumps(record, default=str) + "\n")
+    meta["pending"] = meta.get("pending", 0) + 1
+    meta["version"] = _version(name)
+    if meta["pending"] < FLUSH_EVERY or not _flush(name, meta):
+        storage.atomic_write_json(_meta_path(name), meta)
+
+
+def append_record(name, record):
+    """storage.append_record(name, record), then the same record into the Parquet copy.
+
+    The history append happens under the meta lock, so no other append slips
+    in between. The Parquet side is best-effort: if it fails, the export is
+    left stale and the next query rebuilds it from the JSON history.
+    """
+    if not available():
+        storage.append_record(name, record)
+        return
+    os.makedirs(_collection_dir(name), exist_ok=True)
+    with storage.file_lock(_meta_path(name)):
+        previous_version = _version(name)
+        storage.append_record(name, record)
+        try:
+            _append(name, record, previous_version)
+        except Exception as e:
+            print(f"⚠ Parquet copy of {name} not updated, the next query re-exports it: {e}")
+
+
+def _filter(pa, ds, start, end, equals):
+    """Arrow filter expression: month partitions and timestamps in start..end, column == value / isin(values)."""
+    expression = None
+
+    def both(condition):
+        return condition if expression is None else expression & condition
+
+    if start:
+        expression = both(ds.field("month") >= str(start)[:7])
+        expression = both(ds.field("timestamp") >= pa.scalar(str(start)).cast(pa.timestamp("us")))
+    if end:
+        end = str(end)
+        if len(end) == 10:
+            end += " 23:59:59.999999"  # a bare date includes the whole day
+        expression = both(ds.field("month") <= end[:7])
+        expression = both(ds.field("timestamp") <= pa.scalar(end).cast(pa.timestamp("us")))
+    for column, value in equals.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            expression = both(ds.field(column).isin(list(value)))
+        else:
+            expression = both(ds.field(column) == value)
+    return expression
+
+
+def _query_json(name, columns, start, end, equals):
+    """query() without pyarrow: the cached JSON DataFrame, filtered in pandas."""
+    import pandas as pd
+
+    df = db_cache.dataframe(name)
+    if df.empty:
+        return pd.DataFrame(columns=columns or [column for column, _ in SCHEMAS[name]])
+    mask = pd.Series(True, index=df.index)
+    timestamps = pd.to_datetime(df["timestamp"], format="mixed")
+    if start:
+        mask &= timestamps >= pd.Timestamp(start)
+    if end:
+        mask &= timestamps <= (pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+                               if len(str(end)) == 10 else pd.Timestamp(end))
+    for column, value in equals.items():
+        if value is not None:
+            mask &= df[column].isin(list(value)) if isinstance(value, (list, tuple, set)) else df[column] == value
+    df = df.loc[mask].assign(timestamp=timestamps[mask])
+    return df.reindex(columns=columns or [column for column, _ in SCHEMAS[name]]).reset_index(drop=True)
+
+
+def query(name, columns=None, start=None, end=None, **equals):
+    """DataFrame of a history collection: just columns, rows in start..end and column == value filters.
+
+    start / end are dates or datetimes ("YYYY-MM-DD" end includes that day);
+    equals are e.g. exercise_name="Squats", sender="Kayla", receiver=["Lily", "Deepak"].
+    Months outside the range are never opened and only the requested columns are read.
+    """
+    unknown = set(columns or []) | set(equals)
+    unknown -= {column for column, _ in SCHEMAS[name]}
+    if unknown:
+        raise ValueError(f"Unknown {name} columns: {sorted(unknown)}")
+    modules = _pyarrow()
+    if modules is None:
+        return _query_json(name, columns, start, end, equals)
+    pa, ds, _ = modules
+
+    ensure_exported(name)
+    schema = _schema(name)
+    columns = list(columns or schema.names)
+    if not _read_meta(name)["months"]:
+        return schema.empty_table().select(columns).to_pandas()
+    dataset = ds.dataset(_collection_dir(name), format="parquet", schema=schema.append(pa.field("month", pa.string())),
+                         partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+                         exclude_invalid_files=False, ignore_prefixes=[".", "_"])
+    table = dataset.to_table(columns=columns, filter=_filter(pa, ds, start, end, equals))
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export workout / payment history to month-partitioned Parquet")
+    parser.add_argument("collections", nargs="*", default=list(SCHEMAS), choices=list(SCHEMAS))
+    args = parser.parse_args()
+    if not available():
+        raise SystemExit("pyarrow is not installed (pip install pyarrow)")
+    print(json.dumps({name: {"records": export(name), "months": len(_read_meta(name)["months"])}
+                      for name in args.collections}, indent=4))
@@ -0,0 +1,63 @@
+import threading
+
+import storage
+
+# Parsed collections and DataFrames kept in memory across Streamlit reruns and
+# sessions. Every hit is checked against storage.version(name) (file stat for
+# the JSON/JSONL backends, a write counter for SQLite), so writes from trainer,
+# bill, stripe_payment or another process invalidate the entry automatically.
+# Returned objects are shared: treat them as read-only and copy before mutating.
+
+_entries = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cached(key, name, build):
+    version = storage.version(name)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == version:
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+    value = build()
+    with _lock:
+        _entries[key] = (version, value)
+    return value
+
+
+def load_records(name):
+    """storage.load_records(name), parsed once per version of the collection."""
+    return _cached(("records", name), name, lambda: storage.load_records(name))
+
+
+def load_document(name):
+    """storage.load_document(name), parsed once per version of the collection."""
+    return _cached(("document", name), name, lambda: storage.load_document(name))
+
+
+def dataframe(name, columns=None):
+    """DataFrame of a record collection (optionally just these columns), rebuilt only after a write."""
+    import pandas as pd
+
+    def build():
+        df = pd.DataFrame(load_records(name))
+        if columns is not None and not df.empty:
+            df = df.reindex(columns=list(columns))  # columns older records lack come back empty
+        return df
+
+    return _cached(("dataframe", name, tuple(columns or ())), name, build)
+
+
+def invalidate(name=None):
+    """Drops cached entries for one collection, or all of them."""
+    with _lock:
+        for key in [key for key in _entries if name is None or key[1] == name]:
+            del _entries[key]
+
+
+def stats():
+    """Hit/miss counters and the number of cached entries."""
+    with _lock:
+        return {**_stats, "entries": len(_entries)}
@@ -0,0 +1,89 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import pose_math
+
+# Exercise profiles for the trainer: which joints to track, the angle range
+# that maps to a form score of 100 -> 0, the hysteresis thresholds of the rep
+# counter and the calories burned per rep. FLEXA_EXERCISE_PROFILES can point to
+# a JSON file that overrides or adds profiles, e.g.
+# {"Squats": {"angle_range": [85, 170]}, "Wall Sits": {"joints": [[23, 25, 27]]}}.
+PROFILES_PATH = os.getenv("FLEXA_EXERCISE_PROFILES")
+
+ExerciseProfile = namedtuple("ExerciseProfile", [
+    "joints",            # landmark triples (a, vertex, c); their interior angles are averaged
+    "angle_range",       # (contracted, extended) angle: form score 100 and 0
+    "top",               # score that completes the first half rep
+    "bottom",            # score that completes the rep
+    "calories_per_rep",
+], defaults=[pose_math.SCORE_ANGLES, 90, 10, 0.5])
+
+LEFT_ELBOW, RIGHT_ELBOW = (11, 13, 15), (12, 14, 16)  # Shoulder, Elbow, Wrist
+LEFT_KNEE, RIGHT_KNEE = (23, 25, 27), (24, 26, 28)    # Hip, Knee, Ankle
+LEFT_HIP, RIGHT_HIP = (11, 23, 25), (12, 24, 26)      # Shoulder, Hip, Knee
+
+PROFILES = {
+    "Bicep Curls": ExerciseProfile((LEFT_ELBOW, RIGHT_ELBOW), (60, 160), calories_per_rep=0.5),
+    "Yoga": ExerciseProfile((LEFT_HIP, RIGHT_HIP), (70, 170), top=85, bottom=15, calories_per_rep=0.4),  # forward folds
+    "pilates": ExerciseProfile((LEFT_HIP, RIGHT_HIP), (80, 165), calories_per_rep=0.4),  # roll-ups
+    "Squats": ExerciseProfile((LEFT_KNEE, RIGHT_KNEE), (90, 165), calories_per_rep=0.8),
+    "Push-ups": ExerciseProfile((LEFT_ELBOW, RIGHT_ELBOW), (90, 160), calories_per_rep=0.7),
+    "Lunges": ExerciseProfile((LEFT_KNEE, RIGHT_KNEE), (95, 165), calories_per_rep=0.6),
+    "Deadlifts": ExerciseProfile((LEFT_HIP, RIGHT_HIP), (100, 170), calories_per_rep=1.2),
+    "Planks": ExerciseProfile((LEFT_ELBOW, RIGHT_ELBOW), (60, 160), calories_per_rep=0.3),
+    "Bench Press": ExerciseProfile((LEFT_ELBOW, RIGHT_ELBOW), (90, 160), calories_per_rep=1.0),
+}
+
+
+def load_profiles(path, profiles=PROFILES):
+    """Merges profiles from a JSON file into profiles (fields left out keep their defaults)."""
+    with open(path, "r") as file:
+        overrides = json.load(file)
+    for name, fields in overrides.items():
+        if "joints" in fields:
+            fields["joints"] = tuple(tuple(joint) for joint in fields["joints"])
+        if "angle_range" in fields:
+            fields["angle_range"] = tuple(fields["angle_range"])
+        profiles[name] = profiles[name]._replace(**fields) if name in profiles else ExerciseProfile(**fields)
+    return profiles
+
+
+if PROFILES_PATH:
+    load_profiles(PROFILES_PATH)
+
+
+def angles(profile, points):
+    """Interior angle (0-180) averaged over the profile's joints, for one frame or a (frames, 33, 2) window.
+
+    Folding to 0-180 makes the left and right side of the body agree, whichever
+    way the athlete faces the camera.
+    """
+    total = 0.0
+    for joint in profile.joints:
+        angle = pose_math.joint_angles(points, *joint)
+        total = total + np.minimum(angle, 360 - angle)
+    return total / len(profile.joints)
+
+
+def scores(profile, joint_angles):
+    return pose_math.form_scores(joint_angles, profile.angle_range)
+
+
+def rep_counter(profile):
+    return pose_math.RepCounter(profile.top, profile.bottom)
+
+
+def evaluate(profile, points, counter=None):
+    """Angles, scores and rep count for a buffered (frames, 33, 2) window of landmarks."""
+    counter = counter or rep_counter(profile)
+    window_angles = angles(profile, points)
+    window_scores = scores(profile, window_angles)
+    return window_angles, window_scores, counter.update(window_scores)
+
+
+def count_reps(profile, recorded_angles):
+    """Rep count over a recorded angle array (e.g. a saved score series), in one vectorised pass."""
+    return rep_counter(profile).update(scores(profile, np.asarray(recorded_angles, dtype=np.float64)))
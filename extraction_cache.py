@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import storage
+
+# Persistent cache of Gemini receipt extractions, one file per image hash:
+# {"created_at": epoch seconds, "data": extraction}. created_at decides expiry
+# (MAX_AGE_SECONDS after the extraction, however often it is read); the file's
+# mtime, touched on every hit, only orders entries for LRU eviction.
+CACHE_DIR = os.path.join(storage.DATABASE_DIR, "extraction_cache")
+MAX_ENTRIES = int(os.getenv("FLEXA_EXTRACTION_CACHE_ENTRIES", "500"))
+MAX_BYTES = int(os.getenv("FLEXA_EXTRACTION_CACHE_BYTES", str(50 * 1024 * 1024)))
+MAX_AGE_SECONDS = int(os.getenv("FLEXA_EXTRACTION_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(counter, amount=1):
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def stats():
+    """Hit / miss / eviction counters since the process started."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def make_key(image_bytes, prompt_version):
+    """Cache key: SHA-256 of the image content plus the prompt version."""
+    digest = hashlib.sha256()
+    digest.update(prompt_version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def get(key):
+    """Returns the cached extraction for key, or None on a miss or an expired entry."""
+    path = _entry_path(key)
+    try:
+        with open(path, "r") as file:
+            entry = json.load(file)
+        if "created_at" not in entry:
+            entry = {"created_at": os.path.getmtime(path), "data": entry}  # written before created_at was stored
+    except (OSError, json.JSONDecodeError):
+        _count("misses")
+        return None
+    if time.time() - entry["created_at"] > MAX_AGE_SECONDS:
+        _remove(path)
+        _count("misses")
+        return None
+    os.utime(path)  # mark as recently used for LRU eviction
+    _count("hits")
+    return entry["data"]
+
+
+def put(key, data):
+    """Stores an extraction and evicts least-recently-used entries over the size limits."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    storage.atomic_write_json(_entry_path(key), {"created_at": time.time(), "data": data})
+    evict()
+
+
+def evict():
+    """Drops expired entries, then the least recently used ones until under the limits.
+
+    Only the mtime is checked here (an entry unused for MAX_AGE_SECONDS is
+    certainly expired); entries that are still read but older than that are
+    dropped by get().
+    """
+    now = time.time()
+    entries = []
+    for filename in os.listdir(CACHE_DIR):
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(CACHE_DIR, filename)
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        if now - info.st_mtime > MAX_AGE_SECONDS:
+            _remove(path)
+        else:
+            entries.append((info.st_mtime, info.st_size, path))
+
+    entries.sort()  # oldest first
+    total_bytes = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > MAX_ENTRIES or total_bytes > MAX_BYTES):
+        _, size, path = entries.pop(0)
+        total_bytes -= size
+        _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        _count("evictions")
+    except OSError:
+        pass
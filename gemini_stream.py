@@ -0,0 +1,164 @@
+import json
+import time
+
+import http_client
+
+
+class IncrementalJsonParser:
+    """Parses a JSON document fed in arbitrary text chunks and reports values as soon as they close.
+
+    Anything before the first '{' or '[' (like a ```json fence) and after the
+    root value is ignored. feed() returns events for the values completed by
+    that chunk:
+      ("member", key, value)    a member of the top-level object, e.g. ("Monday", {...})
+      ("element", key, value)   an element of an array that is a top-level member, e.g. ("items", {...})
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.root_start = None
+        self.done = False
+
+    def feed(self, text):
+        events = []
+        for ch in text:
+            self._step(ch, events)
+        return events
+
+    def result(self):
+        """The complete parsed document, once the root value has closed."""
+        if not self.done:
+            raise ValueError("JSON document is incomplete")
+        return json.loads("".join(self.buffer[self.root_start:]))
+
+    def _push(self, ch, pos):
+        self.stack.append({"type": ch, "start": pos, "expect_key": ch == "{", "key": None, "item_start": None})
+
+    def _step(self, ch, events):
+        pos = len(self.buffer)
+        if self.done:
+            return
+        self.buffer.append(ch)
+
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif ch == "\\":
+                self.escape = True
+            elif ch == '"':
+                self.in_string = False
+                frame = self.stack[-1]
+                if frame["type"] == "{" and frame["expect_key"]:
+                    frame["key"] = json.loads("".join(self.buffer[self.string_start:pos + 1]))
+            return
+
+        if not self.stack:
+            if ch in "{[":
+                self.root_start = pos
+                self._push(ch, pos)
+            else:
+                self.buffer.pop()  # prose or code fence before the document
+            return
+
+        frame = self.stack[-1]
+        if ch.isspace():
+            return
+        if ch == '"':
+            self.in_string = True
+            self.string_start = pos
+            if not (frame["type"] == "{" and frame["expect_key"]) and frame["item_start"] is None:
+                frame["item_start"] = pos
+        elif ch == ":":
+            frame["expect_key"] = False
+        elif ch == ",":
+            self._finish_scalar(frame, pos, events)
+            frame["expect_key"] = frame["type"] == "{"
+        elif ch in "}]":
+            self._finish_scalar(frame, pos, events)
+            self.stack.pop()
+            if not self.stack:
+                self.done = True
+                return
+            value = json.loads("".join(self.buffer[frame["start"]:pos + 1]))
+            self._emit(self.stack[-1], value, events)
+        elif ch in "{[":
+            frame["item_start"] = None
+            self._push(ch, pos)
+        elif frame["item_start"] is None:
+            frame["item_start"] = pos
+
+    def _finish_scalar(self, frame, pos, events):
+        if frame["item_start"] is None:
+            return
+        text = "".join(self.buffer[frame["item_start"]:pos]).strip()
+        frame["item_start"] = None
+        try:
+            self._emit(frame, json.loads(text), events)
+        except json.JSONDecodeError:
+            pass
+
+    def _emit(self, frame, value, events):
+        depth = len(self.stack)
+        if depth == 1 and frame["type"] == "{":
+            events.append(("member", frame["key"], value))
+        elif depth == 1:
+            events.append(("element", None, value))
+        elif depth == 2 and frame["type"] == "[" and self.stack[0]["type"] == "{":
+            events.append(("element", self.stack[0]["key"], value))
+
+
+def stream_url(generate_url):
+    """streamGenerateContent (server-sent events) URL for a generateContent URL."""
+    return generate_url.replace(":generateContent", ":streamGenerateContent")
+
+
+def iter_text_chunks(response):
+    """Yields the generated text of each server-sent event in a streaming Gemini response."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        chunk = json.loads(line[len("data:"):].strip())
+        for candidate in chunk.get("candidates", []):
+            for part in candidate.get("content", {}).get("parts", []):
+                if part.get("text"):
+                    yield part["text"]
+
+
+class GeminiJsonStream:
+    """Iterates parser events from a streaming Gemini call and records its timings.
+
+    After iteration, .result holds the full parsed JSON, .raw_text the text
+    Gemini produced, and .time_to_first_item / .total_time are in seconds.
+    is_item(kind, key) picks which events count as an "item" for that timing.
+    """
+
+    def __init__(self, generate_url, api_key, body, timeout=None, is_item=None):
+        self.url = f"{stream_url(generate_url)}?alt=sse&key={api_key}"
+        self.body = body
+        self.timeout = timeout
+        self.is_item = is_item or (lambda kind, key: True)
+        self.parser = IncrementalJsonParser()
+        self.raw_text = ""
+        self.result = None
+        self.time_to_first_item = None
+        self.total_time = None
+
+    def __iter__(self):
+        start = time.perf_counter()
+        response = http_client.post(self.url, json=self.body, stream=True, endpoint="gemini:streamGenerateContent",
+                                    retries=http_client.RETRIES, timeout=self.timeout)
+        with response:
+            if response.status_code != 200:
+                raise ValueError(f"Gemini streaming API error: {response.status_code} - {response.text}")
+            for text in iter_text_chunks(response):
+                self.raw_text += text
+                for event in self.parser.feed(text):
+                    if self.time_to_first_item is None and self.is_item(event[0], event[1]):
+                        self.time_to_first_item = time.perf_counter() - start
+                    yield event
+        self.total_time = time.perf_counter() - start
+        self.result = self.parser.result() if self.parser.done else None
@@ -0,0 +1,123 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One pooled, keep-alive session for every outbound call (Gemini, Lottie, ...)
+CONNECT_TIMEOUT = float(os.getenv("FLEXA_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("FLEXA_HTTP_READ_TIMEOUT", "60"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("FLEXA_HTTP_MAX_PER_HOST", "8"))
+MAX_HOSTS = 16
+RETRIES = int(os.getenv("FLEXA_HTTP_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_WINDOW = 500  # latency samples kept per endpoint
+
+_session = None
+_session_lock = threading.Lock()
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_session():
+    """The shared session. Connections are reused, and pool_block caps them per host."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                                  pool_block=True, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _record(endpoint, latency, error):
+    with _metrics_lock:
+        stats = _metrics.setdefault(endpoint, {
+            "requests": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=LATENCY_WINDOW),
+        })
+        stats["requests"] += 1
+        stats["errors"] += error
+        stats["latencies"].append(latency)
+
+
+def _record_retry(endpoint):
+    with _metrics_lock:
+        _metrics.setdefault(endpoint, {
+            "requests": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=LATENCY_WINDOW),
+        })["retries"] += 1
+
+
+def metrics():
+    """Per-endpoint request/error/retry counts and p50/p95 latency in milliseconds."""
+    summary = {}
+    with _metrics_lock:
+        for endpoint, stats in _metrics.items():
+            latencies = sorted(stats["latencies"])
+            summary[endpoint] = {
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else 0.0,
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else 0.0,
+            }
+    return summary
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt: Retry-After if given, else full-jitter exponential."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, url, endpoint=None, retries=None, timeout=None, **kwargs):
+    """Sends a request through the shared session.
+
+    Connection errors, timeouts and 429/5xx answers are retried with jittered
+    backoff (GET by default; pass retries= to retry other methods). Once the
+    retries are used up the last response is returned, or the last exception raised.
+    """
+    parts = urlsplit(url)
+    endpoint = endpoint or f"{parts.netloc}{parts.path}"
+    if retries is None:
+        retries = RETRIES if method.upper() == "GET" else 0
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    session = get_session()
+
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _record(endpoint, time.perf_counter() - start, True)
+            if attempt == retries:
+                raise
+            _record_retry(endpoint)
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        failed = response.status_code >= 400
+        _record(endpoint, time.perf_counter() - start, failed)
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            return response
+        _record_retry(endpoint)
+        delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+        response.close()
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,64 @@
+import io
+import os
+
+from PIL import Image, ImageOps
+
+# Receipt pre-processing before the image is base64-encoded for Gemini.
+# Bump PREP_VERSION when the defaults change so cached extractions are not reused.
+PREP_VERSION = "prep-v1"
+MAX_DIMENSION = int(os.getenv("FLEXA_OCR_MAX_DIMENSION", "1600"))
+JPEG_QUALITY = int(os.getenv("FLEXA_OCR_JPEG_QUALITY", "80"))
+
+
+def detect_mime_type(image_bytes):
+    """MIME type of the image bytes, from the decoded format rather than the file name."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return Image.MIME.get(image.format, "image/jpeg")
+    except Exception:
+        return "image/jpeg"
+
+
+def preprocess_image(image_bytes, max_dimension=MAX_DIMENSION, grayscale=True,
+                     normalize_contrast=True, quality=JPEG_QUALITY):
+    """Shrinks a receipt photo for OCR.
+
+    Applies the EXIF rotation, downscales so the longest side is at most
+    max_dimension, converts to grayscale, stretches the contrast and
+    re-encodes as JPEG. Returns (bytes, mime_type, stats). If the result is not
+    smaller than the original, the original bytes are sent instead.
+    """
+    original_size = len(image_bytes)
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            original_mime = Image.MIME.get(image.format, "image/jpeg")
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            if grayscale:
+                image = image.convert("L")
+            elif image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            if normalize_contrast:
+                image = ImageOps.autocontrast(image, cutoff=1)
+
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+            processed_bytes = output.getvalue()
+            processed_dimensions = image.size
+    except Exception as e:
+        print(f"⚠ Image pre-processing failed, sending the original image: {e}")
+        return image_bytes, detect_mime_type(image_bytes), {
+            "original_bytes": original_size, "processed_bytes": original_size, "bytes_saved": 0,
+        }
+
+    if len(processed_bytes) >= original_size:
+        return image_bytes, original_mime, {
+            "original_bytes": original_size, "processed_bytes": original_size, "bytes_saved": 0,
+        }
+
+    return processed_bytes, "image/jpeg", {
+        "original_bytes": original_size,
+        "processed_bytes": len(processed_bytes),
+        "bytes_saved": original_size - len(processed_bytes),
+        "dimensions": processed_dimensions,
+    }
@@ -0,0 +1,113 @@
+import io
+import re
+
+import image_prep
+
+# Offline bill extraction: Tesseract OCR on CPU + a rule-based line-item parser.
+# Produces the same {bill_name, items[{item_name, price, quantity}], taxes[{amount}]}
+# shape as the Gemini path. Bump LOCAL_OCR_VERSION when the parser changes.
+LOCAL_OCR_VERSION = "local-v2"
+OCR_MAX_DIMENSION = 2000  # Tesseract reads small receipt fonts better with a bit more resolution
+
+TAX_KEYWORDS = ("tax", "gst", "cgst", "sgst", "igst", "vat", "cess", "serc", "service charge", "tip", "gratuity")
+SKIP_KEYWORDS = (
+    "total", "subtotal", "net amount", "balance", "change", "cash", "visa", "mastercard",
+    "amex", "card", "paid", "received", "round off", "due", "discount",
+)
+
+
+def _keyword_pattern(keywords):
+    """Whole-word match, so "Princess Cake" isn't "cess" and "Private Reserve" isn't "vat"."""
+    return re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b", re.IGNORECASE)
+
+
+TAX_PATTERN = _keyword_pattern(TAX_KEYWORDS)
+SKIP_PATTERN = _keyword_pattern(SKIP_KEYWORDS)
+
+MONEY_PATTERN = re.compile(r"^-?\$?(\d{1,3}(,\d{3})+|\d+)[.,]\d{2}$")
+INTEGER_PATTERN = re.compile(r"^\d{1,3}$")
+
+
+def _parse_money(token):
+    token = token.replace("$", "")
+    if "," in token and "." in token:
+        token = token.replace(",", "")
+    return float(token.replace(",", "."))
+
+
+def parse_line(line):
+    """Splits a receipt line into (name, quantity, unit_price, amount), or None if it has no amount."""
+    tokens = line.split()
+    money = []
+    while tokens and MONEY_PATTERN.match(tokens[-1]) and len(money) < 2:
+        money.insert(0, _parse_money(tokens.pop()))
+    if not money:
+        return None
+
+    # "1 GINGER ALE 3 130.00 390.00": serial number, name, quantity, rate, amount
+    quantity = None
+    if len(tokens) > 1 and INTEGER_PATTERN.match(tokens[-1]):
+        quantity = int(tokens.pop())
+        if INTEGER_PATTERN.match(tokens[0]):
+            tokens.pop(0)
+    # "4 Cheese Burger 5.99 23.96": quantity, name, price, amount
+    elif len(tokens) > 1 and INTEGER_PATTERN.match(tokens[0]):
+        quantity = int(tokens.pop(0))
+
+    name = " ".join(tokens).strip(" :.-")
+    if not re.search(r"[A-Za-z]", name):
+        return None
+
+    amount = money[-1]
+    if len(money) == 2:
+        unit_price = money[0]
+        if quantity is None:
+            quantity = round(amount / unit_price) if unit_price else 1
+    else:
+        quantity = quantity or 1
+        unit_price = round(amount / quantity, 2)
+    return name, quantity, unit_price, amount
+
+
+def parse_receipt_text(text):
+    """Rule-based parser from raw OCR text to the bill schema used by app.py."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    bill_name = next((line for line in lines if re.search(r"[A-Za-z]{3}", line)), "Receipt")
+    items = []
+    taxes = []
+
+    for line in lines:
+        parsed = parse_line(line)
+        if parsed is None:
+            continue
+        name, quantity, unit_price, amount = parsed
+
+        # Totals first: "TOTAL INCL VAT" is the bill total, not another tax line
+        if SKIP_PATTERN.search(name):
+            continue
+        elif TAX_PATTERN.search(name):
+            taxes.append({"amount": amount})
+        elif amount == 0:
+            continue  # zero-priced modifiers like "NAKED PERI PERI 0.00"
+        else:
+            items.append({"item_name": name, "price": unit_price, "quantity": quantity})
+
+    return {"bill_name": bill_name, "items": items, "taxes": taxes}
+
+
+def recognize_text(image_bytes):
+    """Runs Tesseract on the pre-processed (rotated, grayscale, contrast-stretched) receipt."""
+    import pytesseract
+    from PIL import Image
+
+    prepared_bytes, _, _ = image_prep.preprocess_image(image_bytes, max_dimension=OCR_MAX_DIMENSION, quality=95)
+    try:
+        with Image.open(io.BytesIO(prepared_bytes)) as image:
+            return pytesseract.image_to_string(image, config="--psm 6")
+    except pytesseract.TesseractNotFoundError:
+        raise ValueError("Offline OCR needs the Tesseract binary. Install tesseract-ocr and make sure it is on PATH.")
+
+
+def extract_bill(image_bytes):
+    """Extracts a bill from image bytes entirely on the local CPU."""
+    return parse_receipt_text(recognize_text(image_bytes))
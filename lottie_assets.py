@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import http_client
+import storage
+
+# Lottie animations used across the app
+ASSETS = {
+    "splitwise_animation": "https://lottie.host/9e72d50f-9219-4e27-970c-95d7d604d1ba/3BNR1SE38T.json",
+    "girl_1T": "https://lottie.host/e4d68804-020b-493d-ac54-cb23ae9164c2/45Oof5ee2s.json",
+    "posture": "https://lottie.host/76c6d628-9e39-4099-b55d-27b5489ee557/q1GGTjMa0O.json",
+    "death_dancing": "https://lottie.host/5f97f66c-b96a-493c-9d98-e61c49fce1b3/AEZhJ3cU05.json",
+    "monkey_meme": "https://lottie.host/16250878-84bd-4217-87ef-fdd7e07f29fd/aZqhphCqwO.json",
+    "shopping": "https://lottie.host/cc901e2f-dcdf-4d82-bbb8-6779edf048ab/oP1M0GjOLV.json",
+    "cat_meme": "https://lottie.host/897fe626-fb4d-45a0-9168-896307e53c83/IdPpNgiPtJ.json",
+    "auth": "https://lottie.host/347edf77-cab1-4bcd-bd40-1d41ac914957/o8OfUiv8cc.json",
+}
+
+CACHE_DIR = os.path.join(storage.DATABASE_DIR, "lottie_cache")
+# Copies shipped with the app, used when there is no network and no disk cache yet
+# (python lottie_assets.py --bundle fills it); the placeholder stands in for any that are missing
+BUNDLED_DIR = "./assets/lottie"
+PLACEHOLDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "lottie", "_placeholder.json")
+REVALIDATE_SECONDS = int(os.getenv("FLEXA_LOTTIE_REVALIDATE_SECONDS", str(24 * 3600)))
+# Animations with no copy whose download failed are retried in the background, at most this often
+RETRY_SECONDS = int(os.getenv("FLEXA_LOTTIE_RETRY_SECONDS", "60"))
+FETCH_TIMEOUT = (2, 10)
+
+_memory = {}
+_failed = set()  # names with no copy whose last download failed
+_lock = threading.Lock()
+_last_revalidation = 0.0
+_last_retry = 0.0
+_stats = {"cold_start_ms": None, "last_load_ms": None, "fetched": 0, "not_modified": 0, "failed": 0}
+_stats_lock = threading.Lock()  # fetch counters are bumped from worker threads
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+
+def _meta_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.meta.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _fetch(name):
+    """Downloads (or revalidates with If-None-Match / If-Modified-Since) one animation."""
+    meta = _read_json(_meta_path(name)) or {}
+    has_copy = os.path.exists(_cache_path(name))
+    headers = {}
+    if has_copy and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if has_copy and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = http_client.get(ASSETS[name], endpoint="lottie", retries=0, timeout=FETCH_TIMEOUT, headers=headers)
+    except requests.exceptions.RequestException:
+        _count("failed")
+        return None
+
+    if response.status_code == 304:
+        _count("not_modified")
+        return _read_json(_cache_path(name))
+    if response.status_code != 200:
+        _count("failed")
+        return None
+    try:
+        animation = response.json()
+    except ValueError:  # truncated or non-JSON body (captive portal, proxy error page)
+        _count("failed")
+        return None
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    storage.atomic_write_json(_cache_path(name), animation)
+    storage.atomic_write_json(_meta_path(name), {
+        "url": ASSETS[name],
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    })
+    _count("fetched")
+    return animation
+
+
+def _fetch_many(names):
+    """Fetches concurrently and stores what arrived in _memory; the network wait happens outside _lock."""
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        fetched = {name: animation for name, animation in zip(names, executor.map(_fetch, names))
+                   if animation is not None}
+    with _lock:
+        _memory.update(fetched)
+        _failed.update(name for name in names if name not in _memory)
+        _failed.difference_update(fetched)
+
+
+def load_all():
+    """All animations by name, served from memory after the first call.
+
+    The first call in a process reads the disk cache (or the bundled copies)
+    and only waits on the network for animations it has no copy of, fetching
+    those concurrently. Copies older than REVALIDATE_SECONDS are revalidated
+    with their ETag on a background thread. Animations that are still missing
+    (offline on the first run) come back as the bundled placeholder and are
+    only waited on once; later calls retry them in the background.
+    """
+    global _last_revalidation, _last_retry
+    start = time.perf_counter()
+    with _lock:
+        cold = not _memory
+        for name in ASSETS:
+            if name not in _memory:
+                local_copy = _read_json(_cache_path(name)) or _read_json(os.path.join(BUNDLED_DIR, f"{name}.json"))
+                if local_copy is not None:
+                    _memory[name] = local_copy
+
+        missing = [name for name in ASSETS if name not in _memory and name not in _failed]
+        retry = [name for name in ASSETS if name not in _memory and name in _failed]
+        if retry and time.time() - _last_retry > RETRY_SECONDS:
+            _last_retry = time.time()
+        else:
+            retry = []
+        revalidate = time.time() - _last_revalidation > REVALIDATE_SECONDS
+        if revalidate:
+            _last_revalidation = time.time()
+
+    if missing:
+        _fetch_many(missing)  # nothing to show for these yet, so this one waits
+    if retry:
+        threading.Thread(target=_fetch_many, args=(retry,), daemon=True).start()
+    stale = [name for name in ASSETS if name in _memory and name not in missing]
+    if revalidate and stale:
+        threading.Thread(target=_fetch_many, args=(stale,), daemon=True).start()
+
+    placeholder = _read_json(PLACEHOLDER_PATH)
+    with _lock:
+        animations = {name: _memory.get(name, placeholder) for name in ASSETS}
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    with _stats_lock:
+        if cold:
+            _stats["cold_start_ms"] = elapsed_ms
+        _stats["last_load_ms"] = elapsed_ms
+    return animations
+
+
+def stats():
+    """Cold-start and last (warm rerun) load times plus fetch counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def bundle():
+    """Copies the disk cache into BUNDLED_DIR so the app has offline fallbacks."""
+    os.makedirs(BUNDLED_DIR, exist_ok=True)
+    copied = 0
+    for name in ASSETS:
+        if os.path.exists(_cache_path(name)):
+            shutil.copyfile(_cache_path(name), os.path.join(BUNDLED_DIR, f"{name}.json"))
+            copied += 1
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lottie asset cache")
+    parser.add_argument("--bundle", action="store_true", help="Fetch all animations and copy them into ./assets/lottie")
+    args = parser.parse_args()
+
+    animations = load_all()
+    print(f"Loaded {sum(a is not None for a in animations.values())}/{len(ASSETS)} animations: {stats()}")
+    if args.bundle:
+        print(f"Bundled {bundle()} animations into {BUNDLED_DIR}")
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import analytics
+import http_client
+import plan_cache
+import storage
+
+# Headless pre-generation of every user's meal + workout plans into the plan
+# cache, e.g. nightly, so Munch & Crunch opens on a stored plan. Users whose
+# plan inputs agree (plan_cache.PROFILE_FIELDS) share one Gemini call.
+RATE_PER_MINUTE = float(os.getenv("FLEXA_PLAN_BATCH_RPM", "60"))
+WORKERS = int(os.getenv("FLEXA_PLAN_BATCH_WORKERS", "4"))
+
+
+class RateLimiter:
+    """Spaces request starts at least 60 / per_minute seconds apart across all workers (0 = unlimited)."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def plan_requests(profiles, kinds=tuple(analytics.PLAN_SECTIONS)):
+    """{cache key: {"kind", "profile", "users"}}: one entry per distinct plan prompt across all profiles."""
+    requests = {}
+    for user_id, profile in profiles.items():
+        for kind in kinds:
+            key = analytics.plan_key(kind, profile)
+            entry = requests.setdefault(key, {"kind": kind, "profile": profile, "users": []})
+            entry["users"].append(user_id)
+    return requests
+
+
+def generate(key, entry, limiter, timeout):
+    """Generates and stores one plan; returns (key, latency_seconds)."""
+    limiter.wait()
+    start = time.perf_counter()
+    kind = entry["kind"]
+    plan = analytics.fetch_plan(analytics.plan_prompt(kind, entry["profile"]), timeout=timeout)
+    if not isinstance(plan, dict) or not plan:
+        raise ValueError(f"Gemini returned an empty {kind} plan")
+    plan_cache.put(key, kind, plan, analytics.PLAN_SECTIONS[kind][2])
+    return key, time.perf_counter() - start
+
+
+def run(profiles=None, workers=WORKERS, rate_per_minute=RATE_PER_MINUTE, refresh=False,
+        timeout=None, on_result=None):
+    """Fills the plan cache for every profile; returns a throughput / dedupe / cache-hit report.
+
+    Cached plans are kept unless refresh is set. on_result(kind, users, error)
+    is called as each distinct plan finishes (error is None on success).
+    """
+    if profiles is None:
+        profiles = storage.load_document(analytics.PROFILES)
+    if not analytics.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY is missing. Make sure it's set in your .env file.")
+
+    start = time.perf_counter()
+    requests = plan_requests(profiles)
+    plans_needed = sum(len(entry["users"]) for entry in requests.values())
+    pending = {key: entry for key, entry in requests.items() if refresh or plan_cache.get(key) is None}
+    cache_hits = sum(len(entry["users"]) for key, entry in requests.items() if key not in pending)
+
+    latencies = []
+    failures = []
+    limiter = RateLimiter(rate_per_minute)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="plan-batch") as executor:
+        futures = {executor.submit(generate, key, entry, limiter, timeout): key for key, entry in pending.items()}
+        for future in as_completed(futures):
+            entry = pending[futures[future]]
+            try:
+                _, latency = future.result()
+            except Exception as e:
+                failures.append({"kind": entry["kind"], "users": entry["users"], "error": str(e)})
+                if on_result:
+                    on_result(entry["kind"], entry["users"], e)
+                continue
+            latencies.append(latency)
+            if on_result:
+                on_result(entry["kind"], entry["users"], None)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "users": len(profiles),
+        "plans_needed": plans_needed,
+        "unique_prompts": len(requests),
+        "deduped": plans_needed - len(requests),
+        "cache_hits": cache_hits,
+        "cache_hit_ratio": round(cache_hits / plans_needed, 3) if plans_needed else 0.0,
+        "generated": len(latencies),
+        "failed": len(failures),
+        "failures": failures,
+        "elapsed_seconds": round(elapsed, 3),
+        "users_per_minute": round(len(profiles) / elapsed * 60, 1) if elapsed else 0.0,
+        "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+        "http": http_client.metrics().get("gemini:generateContent", {}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate meal + workout plans for every Flexa profile")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Maximum Gemini requests in flight")
+    parser.add_argument("--rpm", type=float, default=RATE_PER_MINUTE, help="Gemini requests per minute (0 = unlimited)")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate plans that are already cached")
+    parser.add_argument("--timeout", type=float, default=None, help="Read timeout per Gemini request in seconds")
+    args = parser.parse_args()
+
+    profiles = storage.load_document(analytics.PROFILES)
+    print(f"🥑 Planning for {len(profiles)} users with {args.workers} workers at {args.rpm:g} requests/min...")
+    report = run(
+        profiles, args.workers, args.rpm, args.refresh, args.timeout,
+        on_result=lambda kind, users, error: print(
+            f"{'❌' if error else '✅'} {kind} plan for {len(users)} user(s){f': {error}' if error else ''}"),
+    )
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import db_cache
+import storage
+
+# Generated meal / workout plans, cached per user profile in the database.
+# Keys hash the profile fields a plan depends on plus the prompt version, so
+# editing the profile or the prompt gets a fresh plan; reruns and repeat
+# clicks read the stored plan instead of calling Gemini again. Each entry is
+# its own document (plan_cache/<key>), so storing one plan never rewrites the others.
+PLAN_CACHE = "plan_cache"
+TTL_SECONDS = int(os.getenv("FLEXA_PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Profile fields each plan is tailored to (name and email don't change what Gemini
+# should suggest); keys cover exactly these, so users who agree on them share one plan
+PROFILE_FIELDS = {
+    "meal": ("goal", "activity_level", "weight", "dietary_restrictions"),
+    "workout": ("goal", "activity_level", "weight"),
+}
+
+_stats = {"hits": 0, "misses": 0, "expired": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def stats():
+    """Hit / miss / expiry counters since the process started."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _entry_name(key):
+    return f"{PLAN_CACHE}/{key}"
+
+
+def make_key(kind, profile, prompt_version):
+    """Cache key: SHA-256 of the plan kind, prompt version and the profile fields the prompt uses.
+
+    Profiles that agree on those fields share one plan.
+    """
+    values = {field: (profile or {}).get(field) for field in PROFILE_FIELDS[kind]}
+    payload = json.dumps([kind, prompt_version, values], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key, ttl=TTL_SECONDS):
+    """The cached plan entry ({"plan", "created_at", ...}) for key, or None on a miss or an expired entry."""
+    entry = db_cache.load_document(_entry_name(key))
+    if not entry:
+        _count("misses")
+        return None
+    if time.time() - entry["created_at"] > ttl:
+        _count("expired")
+        _count("misses")
+        return None
+    _count("hits")
+    return entry
+
+
+def put(key, kind, plan, prompt_version):
+    """Stores a plan; empty plans (failed generations) are never cached."""
+    if not plan:
+        return None
+    entry = {"kind": kind, "prompt_version": prompt_version, "plan": plan, "created_at": time.time()}
+    storage.save_document(_entry_name(key), entry)
+    return entry
+
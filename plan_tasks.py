@@ -0,0 +1,126 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs independent generation requests (meal plan, workout plan, per-day or
+# per-user prompts, ...) concurrently. Workers never touch Streamlit: they
+# emit events into a queue and the calling thread, which owns the Streamlit
+# script context, drains it and renders partial results as they arrive.
+TIMEOUT_SECONDS = float(os.getenv("FLEXA_PLAN_TIMEOUT", "45"))
+MAX_WORKERS = int(os.getenv("FLEXA_PLAN_WORKERS", "4"))
+POLL_SECONDS = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """Raised inside a task by emit() or check() once the task has been cancelled or timed out."""
+
+
+def get_executor():
+    """Shared worker threads, so concurrent sessions don't each start their own."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="plan")
+        return _executor
+
+
+class TaskContext:
+    """Handed to each task: emit() partial results, check cancelled between steps."""
+
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Raises Cancelled once the task has been cancelled or timed out."""
+        if self.cancel_event.is_set():
+            raise Cancelled(self.name)
+
+    def emit(self, kind, value):
+        self.check()
+        self.events.put((self.name, kind, value))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+def run(tasks, on_event=None, timeout=TIMEOUT_SECONDS, cancel=None):
+    """Runs {name: fn(ctx)} concurrently and returns ({name: result}, {name: status}).
+
+    on_event(name, kind, value) is called on this thread for every emitted
+    event, then once per task with kind "done" (value = result), "error"
+    (the exception) or "timeout". timeout is per task (a number, or a dict by
+    name). Setting the optional cancel Event, or an exception escaping this
+    function (e.g. Streamlit stopping the script), cancels every unfinished
+    task; a task that is mid-request stops at its next emit() or check().
+    """
+    events = queue.Queue()
+    on_event = on_event or (lambda name, kind, value: None)
+    start = time.monotonic()
+    contexts = {name: TaskContext(name, events) for name in tasks}
+    deadlines = {
+        name: start + (timeout.get(name, TIMEOUT_SECONDS) if isinstance(timeout, dict) else timeout)
+        for name in tasks
+    }
+
+    def finish(name, ctx, fn):
+        if ctx.cancelled:
+            return  # cancelled or timed out while still queued behind other sessions' tasks
+        try:
+            result = fn(ctx)
+        except Exception as e:
+            events.put((name, "_error", e))
+        else:
+            events.put((name, "_done", result))
+
+    executor = get_executor()
+    for name, fn in tasks.items():
+        executor.submit(finish, name, contexts[name], fn)
+
+    results = {name: None for name in tasks}
+    status = {}
+    try:
+        while len(status) < len(tasks):
+            if cancel is not None and cancel.is_set():
+                for name in tasks:
+                    if name not in status:
+                        status[name] = "cancelled"
+                        contexts[name].cancel()
+                        on_event(name, "cancelled", None)
+                break
+            now = time.monotonic()
+            for name, deadline in deadlines.items():
+                if name not in status and now >= deadline:
+                    status[name] = "timeout"
+                    contexts[name].cancel()
+                    on_event(name, "timeout", None)
+            try:
+                name, kind, value = events.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if name in status:
+                continue  # late output of a task that already timed out
+            if kind == "_done":
+                status[name] = "done"
+                results[name] = value
+                on_event(name, "done", value)
+            elif kind == "_error":
+                status[name] = "cancelled" if isinstance(value, Cancelled) else "error"
+                on_event(name, status[name], value)
+            else:
+                on_event(name, kind, value)
+    finally:
+        for name, ctx in contexts.items():
+            if name not in status:
+                ctx.cancel()
+    return results, status
@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+
+# Array-backed pose math for the trainer. Landmarks are int pixel arrays of
+# shape (33, 2) per frame, or (frames, 33, 2) for a buffered window, and every
+# function here works on either. A single frame gives exactly the numbers of the
+# old lmList + math.atan2 + scalar np.interp code; a window uses np.arctan2,
+# which can differ from math.atan2 in the last bit, so rep counts and the
+# stored (rounded) scores match while raw scores agree to ~1e-12.
+
+NUM_LANDMARKS = 33
+SCORE_ANGLES = (60, 160)  # elbow/knee angle that maps to a form score of 100 and 0
+
+
+def landmarks_to_array(landmarks, width, height, offset=None):
+    """(33, 2) int array of pixel coordinates from MediaPipe landmarks (truncated like int()).
+
+    offset=(x0, y0) maps landmarks found in a width x height crop back onto the full frame.
+    """
+    coords = np.empty((len(landmarks), 2), dtype=np.float64)
+    coords[:, 0] = [lm.x for lm in landmarks]
+    coords[:, 1] = [lm.y for lm in landmarks]
+    coords *= (width, height)
+    if offset is not None:
+        coords += offset
+    return coords.astype(np.int64)
+
+
+def joint_angles(points, p1, p2, p3):
+    """Angle at p2 in degrees [0, 360) for one frame (scalar) or a window of frames (1-D array)."""
+    points = np.asarray(points)
+    if points.ndim == 2:
+        # Single live frame: plain floats are cheaper than NumPy calls on three points
+        (x1, y1), (x2, y2), (x3, y3) = points[[p1, p2, p3]].tolist()
+        angle = math.degrees(math.atan2(y3 - y2, x3 - x2) - math.atan2(y1 - y2, x1 - x2))
+        return angle + 360 if angle < 0 else angle
+    a, b, c = points[..., p1, :], points[..., p2, :], points[..., p3, :]
+    angle = np.degrees(np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+                       - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    return np.where(angle < 0, angle + 360, angle)
+
+
+def form_scores(angles, angle_range=SCORE_ANGLES):
+    """Form score 0-100 per angle: 100 at the top of the rep, 0 at full extension.
+
+    angle_range is (contracted, extended): the angles scored 100 and 0.
+    """
+    contracted, extended = angle_range
+    if contracted < extended:
+        return np.interp(angles, (contracted, extended), (100, 0))
+    return np.interp(angles, (extended, contracted), (0, 100))
+
+
+class RepCounter:
+    """Half-rep state machine (top -> bottom -> top ...) that consumes scores a window at a time.
+
+    A half rep counts once the score reaches top (>=) and the next once it
+    falls to bottom (<=). Scores in between never move the state, so jitter
+    around one threshold can't double count. The defaults (100, 0) only fire
+    on exact extremes, like the original counter.
+    """
+
+    def __init__(self, top=100, bottom=0):
+        self.top = top
+        self.bottom = bottom
+        self.dir = 0  # 0: waiting for a score >= top, 1: waiting for <= bottom
+        self.count = 0.0
+
+    def update(self, scores):
+        """Feeds one score or an array of scores; returns the running rep count."""
+        if np.ndim(scores) == 0:
+            if scores >= self.top and self.dir == 0:
+                self.count += 0.5  # Half rep completed
+                self.dir = 1
+            elif scores <= self.bottom and self.dir == 1:
+                self.count += 0.5  # Full rep completed
+                self.dir = 0
+            return self.count
+        scores = np.atleast_1d(scores)
+        # Only scores past the thresholds move the state machine; collapse
+        # repeats and drop a leading extreme the machine is not waiting for.
+        extremes = np.where(scores >= self.top, 1, np.where(scores <= self.bottom, 0, -1))
+        extremes = extremes[extremes >= 0]
+        if extremes.size:
+            extremes = extremes[np.r_[True, extremes[1:] != extremes[:-1]]]
+            if extremes[0] != (1 if self.dir == 0 else 0):
+                extremes = extremes[1:]
+            half_reps = extremes.size
+            self.count += 0.5 * half_reps
+            if half_reps % 2:
+                self.dir = 1 - self.dir
+        return self.count
+
+
+def evaluate_window(points, joints, counter=None):
+    """Angles, scores and rep count for a buffered (frames, 33, 2) window of landmarks."""
+    counter = counter or RepCounter()
+    angles = joint_angles(points, *joints)
+    scores = form_scores(angles)
+    return angles, scores, counter.update(scores)
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+# Capture -> inference -> render pipeline for the trainer. Capture and
+# inference run on their own threads; render runs on the calling thread
+# (cv2.imshow must stay on the main thread). Stages are connected by small
+# drop-oldest queues, so a slow stage skips stale frames instead of building
+# up latency, and a slow camera read never blocks inference.
+
+LATENCY_WINDOW = 500
+
+
+class DropOldestQueue:
+    """Bounded queue whose put() never blocks: when full, the oldest item is dropped."""
+
+    def __init__(self, maxsize=2):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None once the queue is closed and drained (or on timeout)."""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class StageStats:
+    """Frames handled, FPS and per-frame work time of one stage."""
+
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.0
+        self.start = None
+        self.end = None
+
+    def record(self, started, finished):
+        self.start = self.start or started
+        self.end = finished
+        self.frames += 1
+        self.busy += finished - started
+
+    def summary(self):
+        elapsed = (self.end - self.start) if self.frames > 1 else 0
+        return {
+            "frames": self.frames,
+            "fps": round((self.frames - 1) / elapsed, 1) if elapsed else 0.0,
+            "avg_ms": round(self.busy / self.frames * 1000, 2) if self.frames else 0.0,
+        }
+
+
+def _percentile(samples, fraction):
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 1) if samples else 0.0
+
+
+class PosePipeline:
+    """Runs read_frame -> infer -> render concurrently.
+
+    read_frame() returns a frame or None at the end of the source, infer(frame)
+    returns the inference result, and render(frame, result) returns False to
+    stop (e.g. ESC pressed). render() skips stale results, so per-frame state
+    (rep counts, score series) belongs in infer(). pace_fps throttles file
+    sources to real camera speed so they behave like a webcam; leave it None
+    for live cameras.
+    """
+
+    def __init__(self, read_frame, infer, render, queue_size=1, pace_fps=None):
+        self.read_frame = read_frame
+        self.infer = infer
+        self.render = render
+        self.pace_fps = pace_fps
+        self.frames = DropOldestQueue(queue_size)
+        self.results = DropOldestQueue(queue_size)
+        self.stop_event = threading.Event()
+        self.stages = {"capture": StageStats(), "inference": StageStats(), "render": StageStats()}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def _capture(self):
+        next_due = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                if self.pace_fps:
+                    next_due += 1 / self.pace_fps
+                    time.sleep(max(0.0, next_due - time.perf_counter()))
+                started = time.perf_counter()
+                frame = self.read_frame()
+                if frame is None:
+                    break
+                finished = time.perf_counter()
+                self.stages["capture"].record(started, finished)
+                self.frames.put((finished, frame))
+        finally:
+            self.frames.close()
+
+    def _inference(self):
+        try:
+            while not self.stop_event.is_set():
+                item = self.frames.get(timeout=0.5)
+                if item is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                captured_at, frame = item
+                started = time.perf_counter()
+                result = self.infer(frame)
+                self.stages["inference"].record(started, time.perf_counter())
+                self.results.put((captured_at, frame, result))
+        finally:
+            self.results.close()
+
+    def run(self, deadline=None):
+        """Runs until the source ends, render() returns False or time.time() passes deadline."""
+        workers = [threading.Thread(target=self._capture, daemon=True),
+                   threading.Thread(target=self._inference, daemon=True)]
+        for worker in workers:
+            worker.start()
+        try:
+            while deadline is None or time.time() < deadline:
+                item = self.results.get(timeout=0.1)
+                if item is None:
+                    if self.results.closed:
+                        break
+                    continue
+                captured_at, frame, result = item
+                started = time.perf_counter()
+                keep_going = self.render(frame, result)
+                finished = time.perf_counter()
+                self.stages["render"].record(started, finished)
+                self.latencies.append(finished - captured_at)
+                if keep_going is False:
+                    break
+        finally:
+            self.stop_event.set()
+            for worker in workers:
+                worker.join(timeout=2)
+        return self.stats()
+
+    def stats(self):
+        """Per-stage FPS / work time, dropped frames and capture-to-render latency."""
+        return {
+            **{stage: stats.summary() for stage, stats in self.stages.items()},
+            "dropped_frames": self.frames.dropped + self.results.dropped,
+            "latency_p50_ms": _percentile(self.latencies, 0.5),
+            "latency_p95_ms": _percentile(self.latencies, 0.95),
+        }
+
+
+def run_serial(read_frame, infer, render, deadline=None):
+    """The same stages one after another on the calling thread (the old loop), with the same stats."""
+    stages = {"capture": StageStats(), "inference": StageStats(), "render": StageStats()}
+    latencies = []
+    while deadline is None or time.time() < deadline:
+        started = time.perf_counter()
+        frame = read_frame()
+        if frame is None:
+            break
+        captured_at = time.perf_counter()
+        stages["capture"].record(started, captured_at)
+        result = infer(frame)
+        inferred_at = time.perf_counter()
+        stages["inference"].record(captured_at, inferred_at)
+        keep_going = render(frame, result)
+        finished = time.perf_counter()
+        stages["render"].record(inferred_at, finished)
+        latencies.append(finished - captured_at)
+        if keep_going is False:
+            break
+    return {
+        **{stage: stats.summary() for stage, stats in stages.items()},
+        "dropped_frames": 0,
+        "latency_p50_ms": _percentile(latencies, 0.5),
+        "latency_p95_ms": _percentile(latencies, 0.95),
+    }
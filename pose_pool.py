@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Pool of MediaPipe Pose instances shared by concurrent Streamlit sessions.
+# A Pose instance keeps tracking state and isn't safe to use from two
+# sessions at once, so each workout checks one out for its duration and
+# returns it afterwards; the next workout reuses it without reloading the model.
+MAX_INSTANCES = int(os.getenv("FLEXA_POSE_POOL_SIZE", "4"))
+IDLE_SECONDS = float(os.getenv("FLEXA_POSE_POOL_IDLE_SECONDS", "600"))
+CHECKOUT_TIMEOUT = float(os.getenv("FLEXA_POSE_POOL_TIMEOUT", "30"))
+
+PoseConfig = namedtuple("PoseConfig", [
+    "model_complexity", "smooth_landmarks", "min_detection_confidence", "min_tracking_confidence",
+], defaults=[int(os.getenv("FLEXA_POSE_COMPLEXITY", "1")), True, 0.5, 0.5])
+
+
+def build_pose(config):
+    """A MediaPipe Pose for one configuration (model_complexity 0 = lite, 1 = full, 2 = heavy).
+
+    Only the full model ships with the mediapipe wheel; lite and heavy are
+    downloaded the first time they are built.
+    """
+    import mediapipe as mp
+
+    return mp.solutions.pose.Pose(**config._asdict())
+
+
+class PosePool:
+    """Pose instances keyed by PoseConfig, capped at max_instances in total.
+
+    checkout() reuses an idle instance of the same config, builds a new one
+    while under the cap (evicting an idle instance of another config if
+    needed), or waits for a checkin. Instances idle for longer than
+    idle_seconds are closed.
+    """
+
+    def __init__(self, factory=build_pose, max_instances=MAX_INSTANCES, idle_seconds=IDLE_SECONDS):
+        self.factory = factory
+        self.max_instances = max_instances
+        self.idle_seconds = idle_seconds
+        self.idle = {}  # config -> [(instance, idle_since)], most recently used last
+        self.busy = {}  # id(instance) -> (config, instance)
+        self.building = 0
+        self.cond = threading.Condition()
+        self.counters = {"checkouts": 0, "reused": 0, "created": 0, "evicted": 0, "waits": 0}
+
+    def _size(self):
+        return sum(len(entries) for entries in self.idle.values()) + len(self.busy) + self.building
+
+    def _close(self, instance):
+        self.counters["evicted"] += 1
+        close = getattr(instance, "close", None)
+        if close:
+            close()
+
+    def _evict_idle(self, now):
+        for config, entries in list(self.idle.items()):
+            keep = [(instance, since) for instance, since in entries if now - since < self.idle_seconds]
+            for instance, since in entries:
+                if now - since >= self.idle_seconds:
+                    self._close(instance)
+            self.idle[config] = keep
+
+    def _evict_one_idle(self):
+        """Makes room by closing an idle instance: the oldest of whichever config has the most idle,
+        so every config in use keeps a warm instance for as long as possible."""
+        victim = max(((len(entries), -entries[0][1], config) for config, entries in self.idle.items() if entries),
+                     default=None)
+        if victim is None:
+            return False
+        instance, _ = self.idle[victim[2]].pop(0)
+        self._close(instance)
+        return True
+
+    def checkout(self, config=None, timeout=CHECKOUT_TIMEOUT):
+        """A Pose for config (default PoseConfig()); raises TimeoutError if none frees up in time."""
+        config = config or PoseConfig()
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            self.counters["checkouts"] += 1
+            while True:
+                self._evict_idle(time.monotonic())
+                if self.idle.get(config):
+                    instance, _ = self.idle[config].pop()
+                    self.busy[id(instance)] = (config, instance)
+                    self.counters["reused"] += 1
+                    return instance
+                if self._size() < self.max_instances or self._evict_one_idle():
+                    self.building += 1
+                    break
+                self.counters["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.cond.wait(remaining):
+                    raise TimeoutError(f"No pose model free after {timeout}s ({self.max_instances} in use)")
+
+        # Build outside the lock: loading a model takes a while and shouldn't block checkins
+        try:
+            instance = self.factory(config)
+        except Exception:
+            with self.cond:
+                self.building -= 1
+                self.cond.notify()
+            raise
+        with self.cond:
+            self.building -= 1
+            self.busy[id(instance)] = (config, instance)
+            self.counters["created"] += 1
+        return instance
+
+    def checkin(self, instance):
+        """Returns an instance; its tracking state is reset so the next session starts fresh."""
+        reset = getattr(instance, "reset", None)
+        if reset:
+            reset()
+        with self.cond:
+            config, _ = self.busy.pop(id(instance))
+            self.idle.setdefault(config, []).append((instance, time.monotonic()))
+            self._evict_idle(time.monotonic())
+            self.cond.notify()
+
+    @contextmanager
+    def pose(self, config=None, timeout=CHECKOUT_TIMEOUT):
+        instance = self.checkout(config, timeout)
+        try:
+            yield instance
+        finally:
+            self.checkin(instance)
+
+    def stats(self):
+        with self.cond:
+            return {
+                **self.counters,
+                "idle": sum(len(entries) for entries in self.idle.values()),
+                "busy": len(self.busy),
+                "configs": len({config for config, entries in self.idle.items() if entries}
+                               | {config for config, _ in self.busy.values()}),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool (one per Streamlit server, one per batch worker)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PosePool()
+        return _pool
+
+
+def warm(config=None):
+    """Builds a pooled instance ahead of the first workout (e.g. as a worker process initializer)."""
+    pool = get_pool()
+    pool.checkin(pool.checkout(config))
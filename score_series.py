@@ -0,0 +1,173 @@
+import math
+import os
+import uuid
+
+import numpy as np
+
+import storage
+
+# Per-frame form score / joint angle series of a workout. Samples live in
+# preallocated float32 arrays capped at MAX_SAMPLES (long sessions are thinned
+# evenly instead of growing), are saved next to workout history as a small
+# .npz, and are downsampled to CHART_POINTS before anything is plotted.
+SERIES_DIR = os.path.join(storage.DATABASE_DIR, "score_series")
+MAX_SAMPLES = int(os.getenv("FLEXA_SCORE_SERIES_SAMPLES", "4096"))
+CHART_POINTS = int(os.getenv("FLEXA_SCORE_CHART_POINTS", "500"))
+DOWNSAMPLE = os.getenv("FLEXA_SCORE_DOWNSAMPLE", "lttb")  # "lttb" or "decimate"
+
+
+class ScoreSeries:
+    """(seconds, angle, score) samples in fixed-size typed arrays.
+
+    Once capacity is reached every other sample is dropped and only every
+    stride-th frame is kept from then on, so memory stays constant and the
+    samples stay evenly spaced. frames and mean_score cover every frame.
+    """
+
+    def __init__(self, capacity=MAX_SAMPLES):
+        capacity = max(2, capacity - capacity % 2)
+        self.times = np.empty(capacity, np.float32)
+        self.angles = np.empty(capacity, np.float32)
+        self.scores = np.empty(capacity, np.float32)
+        self.size = 0
+        self.stride = 1
+        self.frames = 0
+        self.score_sum = 0.0
+
+    def __len__(self):
+        return self.size
+
+    def _compact(self):
+        half = self.size // 2
+        for samples in (self.times, self.angles, self.scores):
+            samples[:half] = samples[:self.size:2].copy()
+        self.size = half
+        self.stride *= 2
+
+    def append(self, seconds, angle, score):
+        self.frames += 1
+        self.score_sum += score
+        if (self.frames - 1) % self.stride:
+            return
+        if self.size == len(self.scores):
+            self._compact()
+            if (self.frames - 1) % self.stride:
+                return
+        self.times[self.size] = seconds
+        self.angles[self.size] = angle
+        self.scores[self.size] = score
+        self.size += 1
+
+    def extend(self, seconds, angles, scores):
+        for sample in zip(seconds, angles, scores):
+            self.append(*sample)
+
+    @property
+    def mean_score(self):
+        return self.score_sum / self.frames if self.frames else 0.0
+
+    def arrays(self):
+        """Views of the stored samples: (times, angles, scores)."""
+        return self.times[:self.size], self.angles[:self.size], self.scores[:self.size]
+
+
+def decimate(times, values, points):
+    """Every n-th sample (plus the last one), so at most about points samples remain."""
+    if len(times) <= points:
+        return times, values
+    keep = np.arange(0, len(times), math.ceil(len(times) / points))
+    if keep[-1] != len(times) - 1:
+        keep = np.append(keep, len(times) - 1)
+    return times[keep], values[keep]
+
+
+def lttb(times, values, points):
+    """Largest-Triangle-Three-Buckets: points samples that keep the peaks and troughs of the curve."""
+    size = len(times)
+    if size <= points or points < 3:
+        return decimate(times, values, points) if points < 3 else (times, values)
+    times64, values64 = times.astype(np.float64), values.astype(np.float64)
+    edges = np.linspace(1, size - 1, points - 1).astype(np.intp)  # points - 2 buckets between the end points
+    keep = np.empty(points, np.intp)
+    keep[0], keep[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_t, next_v = times64[end:edges[bucket + 2]].mean(), values64[end:edges[bucket + 2]].mean()
+        else:
+            next_t, next_v = times64[-1], values64[-1]
+        t0, v0 = times64[previous], values64[previous]
+        areas = np.abs((t0 - next_t) * (values64[start:end] - v0) - (t0 - times64[start:end]) * (next_v - v0))
+        previous = start + int(areas.argmax())
+        keep[bucket + 1] = previous
+    return times[keep], values[keep]
+
+
+def downsample(times, values, points=CHART_POINTS, method=DOWNSAMPLE):
+    return (lttb if method == "lttb" else decimate)(times, values, points)
+
+
+def new_series_id():
+    return uuid.uuid4().hex
+
+
+def _path(series_id, extension):
+    return os.path.join(SERIES_DIR, f"{series_id}.{extension}")
+
+
+def save(series_id, series):
+    """Writes the samples to ./database/score_series/<series_id>.npz (atomically)."""
+    os.makedirs(SERIES_DIR, exist_ok=True)
+    times, angles, scores = series.arrays()
+    path = _path(series_id, "npz")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez_compressed(file, times=times, angles=angles, scores=scores,
+                            frames=series.frames, stride=series.stride, mean_score=series.mean_score)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load(series_id):
+    """The saved samples as a dict of arrays, or None if the session has no series."""
+    try:
+        with np.load(_path(series_id, "npz")) as data:
+            return {key: data[key] for key in data.files}
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def chart_points(series_id, points=CHART_POINTS):
+    """Downsampled (times, scores) of a saved session, for history charts; empty if it wasn't saved."""
+    data = load(series_id)
+    if data is None:
+        return np.empty(0, np.float32), np.empty(0, np.float32)
+    return downsample(data["times"], data["scores"], points)
+
+
+def render_chart(series, path, title="Form Score", points=CHART_POINTS, method=DOWNSAMPLE):
+    """Plots the downsampled score (and joint angle) curve to a PNG.
+
+    Uses a standalone Figure rather than pyplot, so concurrent sessions can
+    render at the same time without sharing pyplot's global state.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    times, angles, scores = series.arrays()
+    figure = Figure(figsize=(8, 3.5), dpi=100)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.plot(*downsample(times, scores, points, method), color="tab:green", linewidth=1.5, label="Form score")
+    axes.set_ylim(-5, 105)
+    axes.set_xlabel("Seconds")
+    axes.set_ylabel("Form score (%)")
+    angle_axes = axes.twinx()
+    angle_axes.plot(*downsample(times, angles, points, method), color="tab:blue", linewidth=0.8, alpha=0.4)
+    angle_axes.set_ylabel("Joint angle (°)")
+    axes.set_title(f"{title} · avg {series.mean_score:.1f}%")
+    figure.tight_layout()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    figure.savefig(path)
+    return path
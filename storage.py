@@ -0,0 +1,565 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Every module reads and writes ./database through this layer.
+DATABASE_DIR = "./database"
+
+# Select the backend with FLEXA_STORAGE_BACKEND=jsonl|json|sqlite (json keeps the old file layout)
+STORAGE_BACKEND = os.getenv("FLEXA_STORAGE_BACKEND", "jsonl")
+SQLITE_PATH = os.path.join(DATABASE_DIR, "flexa.db")
+
+# JSONL log settings: fsync after every append ("always"), at most once per
+# FSYNC_INTERVAL seconds ("interval") or leave it to the OS ("never")
+FSYNC_POLICY = os.getenv("FLEXA_FSYNC", "always")
+FSYNC_INTERVAL = float(os.getenv("FLEXA_FSYNC_INTERVAL", "1.0"))
+# Fold the log into the snapshot once it holds this many lines
+COMPACT_EVERY = int(os.getenv("FLEXA_COMPACT_EVERY", "500"))
+# Subfolders of ./database that modules keep as plain files (caches, Parquet, charts), not collections
+FILE_DIRS = ("extraction_cache", "lottie_cache", "score_series", "columnar")
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on <path>.lock, held across processes and threads."""
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(path, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_json(path, data, indent=None):
+    """Writes to a temp file in the same directory, then renames it over path."""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def _stat_token(path):
+    """(inode, mtime, size) of a file, or None; changes whenever the file is rewritten or appended to."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _max_int_key(data):
+    """Highest numeric key of a document (or length of a record list)."""
+    if isinstance(data, list):
+        return len(data)
+    return max((int(key) for key in data if str(key).isdigit()), default=0)
+
+
+class JsonFileBackend:
+    """Stores each collection as ./database/<name>.json, same layout as before."""
+
+    def __init__(self, base_dir=DATABASE_DIR):
+        self.base_dir = base_dir
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, name):
+        path = os.path.join(self.base_dir, f"{name}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _read(self, name, default):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return default
+        with open(path, "r") as file:
+            try:
+                return json.load(file)
+            except json.JSONDecodeError:
+                return default
+
+    def _write(self, name, data):
+        atomic_write_json(self._path(name), data, indent=4)
+
+    def version(self, name):
+        """Cheap token that changes whenever the collection changes."""
+        return _stat_token(self._path(name))
+
+    # --- Record collections (append-only histories) ---
+    def load_records(self, name):
+        records = self._read(name, [])
+        return records if isinstance(records, list) else []
+
+    def append_record(self, name, record):
+        with file_lock(self._path(name)):
+            records = self.load_records(name)
+            records.append(record)
+            self._write(name, records)
+
+    # --- Documents (dicts keyed by id) ---
+    def load_document(self, name):
+        data = self._read(name, {})
+        return data if isinstance(data, dict) else {}
+
+    def save_document(self, name, data):
+        with file_lock(self._path(name)):
+            self._write(name, data)
+
+    def get_item(self, name, key):
+        return self.load_document(name).get(str(key))
+
+    def set_item(self, name, key, value):
+        with file_lock(self._path(name)):
+            data = self.load_document(name)
+            data[str(key)] = value
+            self._write(name, data)
+
+    def update_item(self, name, key, update):
+        """Atomically replaces one item with update(old_value)."""
+        with file_lock(self._path(name)):
+            data = self.load_document(name)
+            data[str(key)] = update(data.get(str(key)))
+            self._write(name, data)
+            return data[str(key)]
+
+    # --- Monotonic IDs ---
+    def next_id(self, name, seed=None):
+        """Allocates the next ID from ./database/<name>.seq without reading the collection.
+
+        The collection (or seed()) is only consulted the first time, to carry on
+        from the IDs that were handed out before the counter existed.
+        """
+        seq_path = os.path.join(self.base_dir, f"{name}.seq")
+        with file_lock(seq_path):
+            if os.path.exists(seq_path):
+                with open(seq_path, "r") as file:
+                    current = int(file.read().strip() or 0)
+            elif seed is not None:
+                current = seed()
+            else:
+                current = _max_int_key(self.load_document(name) or self.load_records(name))
+            atomic_write_json(seq_path, current + 1)
+        return current + 1
+
+
+class JsonlLogBackend(JsonFileBackend):
+    """Record collections as an append-only ./database/<name>.jsonl log.
+
+    Each append writes one line, so it costs the same no matter how long the
+    history is. Every COMPACT_EVERY lines the log is folded into
+    <name>.snapshot.json. Documents keep the plain JSON layout.
+    """
+
+    def __init__(self, base_dir=DATABASE_DIR, fsync_policy=FSYNC_POLICY, compact_every=COMPACT_EVERY):
+        super().__init__(base_dir)
+        self.fsync_policy = fsync_policy
+        self.compact_every = compact_every
+        self._log_lines = {}  # name -> lines currently in the log
+        self._last_fsync = {}
+
+    def _log_path(self, name):
+        return os.path.join(self.base_dir, f"{name}.jsonl")
+
+    def _snapshot_path(self, name):
+        return os.path.join(self.base_dir, f"{name}.snapshot.json")
+
+    def _segment_path(self, name, generation):
+        return os.path.join(self.base_dir, f"{name}.jsonl.{generation}")
+
+    def _read_snapshot(self, name):
+        path = self._snapshot_path(name)
+        if not os.path.exists(path):
+            return {"generation": 0, "records": []}
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def _read_lines(self, path):
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, "r") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn line from a crash mid-append; skip it, the lines after it are intact
+                    continue
+        return records
+
+    def _pending_segments(self, name, snapshot_generation):
+        """Log segments set aside by a compaction that never finished."""
+        prefix = f"{name}.jsonl."
+        segments = []
+        for filename in os.listdir(self.base_dir):
+            suffix = filename[len(prefix):]
+            if filename.startswith(prefix) and suffix.isdigit():
+                generation = int(suffix)
+                if generation <= snapshot_generation:
+                    # Already folded into the snapshot, only the cleanup was lost
+                    os.remove(os.path.join(self.base_dir, filename))
+                else:
+                    segments.append(generation)
+        return sorted(segments)
+
+    def _repair_tail(self, path):
+        """Cuts off a torn last line so the next append starts on a clean line.
+
+        Checks only the last byte, so it is cheap enough to run before every append.
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as file:
+            size = file.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            file.seek(size - 1)
+            if file.read(1) == b"\n":
+                return
+            file.seek(0)
+            data = file.read()
+            file.truncate(data.rfind(b"\n") + 1)
+
+    def _migrate(self, name):
+        """One-time move of a legacy <name>.json array into the snapshot."""
+        legacy_path = os.path.join(self.base_dir, f"{name}.json")
+        if os.path.exists(self._snapshot_path(name)) or not os.path.exists(legacy_path):
+            return
+        records = self._read(name, [])
+        if not isinstance(records, list):
+            return
+        self._write_snapshot(name, {"generation": 0, "records": records})
+        os.replace(legacy_path, legacy_path + ".migrated")
+
+    def version(self, name):
+        # Documents live in <name>.json; records in the snapshot + log (compaction rewrites both)
+        return tuple(_stat_token(path) for path in (
+            os.path.join(self.base_dir, f"{name}.json"), self._snapshot_path(name), self._log_path(name)))
+
+    def _write_snapshot(self, name, snapshot):
+        atomic_write_json(self._snapshot_path(name), snapshot)
+
+    def _read_log(self, name):
+        snapshot = self._read_snapshot(name)
+        records = snapshot["records"]
+        for generation in self._pending_segments(name, snapshot["generation"]):
+            records.extend(self._read_lines(self._segment_path(name, generation)))
+        records.extend(self._read_lines(self._log_path(name)))
+        return records
+
+    def _fsync(self, name, file):
+        if self.fsync_policy == "always":
+            os.fsync(file.fileno())
+        elif self.fsync_policy == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync.get(name, 0) >= FSYNC_INTERVAL:
+                os.fsync(file.fileno())
+                self._last_fsync[name] = now
+
+    # --- Record collections (append-only histories) ---
+    def load_records(self, name):
+        with file_lock(self._log_path(name)):
+            self._migrate(name)
+            return self._read_log(name)
+
+    def append_record(self, name, record):
+        with file_lock(self._log_path(name)):
+            self._migrate(name)
+            # Another process may have crashed mid-append since our last write
+            self._repair_tail(self._log_path(name))
+            if name not in self._log_lines:
+                self._log_lines[name] = len(self._read_lines(self._log_path(name)))
+            with open(self._log_path(name), "a") as file:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+                self._fsync(name, file)
+            self._log_lines[name] += 1
+            if self._log_lines[name] >= self.compact_every:
+                self._compact(name)
+
+    def compact(self, name):
+        """Folds the log into the snapshot; safe to interrupt at any point."""
+        with file_lock(self._log_path(name)):
+            self._migrate(name)
+            self._compact(name)
+
+    def _compact(self, name):
+        log_path = self._log_path(name)
+        if not os.path.exists(log_path):
+            return
+        snapshot = self._read_snapshot(name)
+        pending = self._pending_segments(name, snapshot["generation"])
+        generation = max(pending + [snapshot["generation"]]) + 1
+        self._repair_tail(log_path)
+
+        # 1. Set the current log aside so new appends start a fresh file
+        os.replace(log_path, self._segment_path(name, generation))
+        # 2. Atomically write the snapshot that includes the set-aside segments
+        for segment in pending + [generation]:
+            snapshot["records"].extend(self._read_lines(self._segment_path(name, segment)))
+        snapshot["generation"] = generation
+        self._write_snapshot(name, snapshot)
+        # 3. Drop the segments; a crash before this is cleaned up on the next read
+        for segment in pending + [generation]:
+            os.remove(self._segment_path(name, segment))
+        self._log_lines[name] = 0
+
+
+class SqliteBackend:
+    """Embedded SQLite store; appends and single-item writes touch one row."""
+
+    def __init__(self, db_path=SQLITE_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        is_new = not os.path.exists(db_path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection TEXT NOT NULL,
+                    timestamp TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_records_collection ON records (collection, id);
+                CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records (collection, timestamp);
+                CREATE TABLE IF NOT EXISTS documents (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (name, key)
+                );
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS versions (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+            """)
+        if is_new:
+            self.import_json_files(os.path.dirname(db_path) or ".")
+
+    def import_json_files(self, base_dir):
+        """One-time import of the legacy ./database JSON and JSONL files into SQLite.
+
+        Subfolders hold "<folder>/<name>" collections (e.g. bill_headers/7) and
+        are imported under those names, except the FILE_DIRS other modules own.
+        """
+        source = JsonlLogBackend(base_dir)
+        for root, dirs, filenames in os.walk(base_dir):
+            dirs[:] = sorted(d for d in dirs if not (root == base_dir and d in FILE_DIRS))
+            prefix = os.path.relpath(root, base_dir).replace(os.sep, "/")
+            prefix = "" if prefix == "." else prefix + "/"
+            for filename in sorted(filenames):
+                if filename.endswith(".snapshot.json"):
+                    name = prefix + filename[:-len(".snapshot.json")]
+                    self._import_records(name, source._read_log(name))
+                elif filename.endswith(".jsonl"):
+                    name = prefix + filename[:-len(".jsonl")]
+                    if not os.path.exists(source._snapshot_path(name)):
+                        self._import_records(name, source._read_log(name))
+                elif filename.endswith(".seq"):
+                    with open(os.path.join(root, filename), "r") as file:
+                        value = int(file.read().strip() or 0)
+                    with self._connect() as conn:
+                        conn.execute("INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)",
+                                     (prefix + filename[:-len(".seq")], value))
+                elif filename.endswith(".json"):
+                    name = prefix + filename[:-len(".json")]
+                    data = source._read(name, None)
+                    if isinstance(data, list):
+                        self._import_records(name, data)
+                    elif isinstance(data, dict):
+                        self.save_document(name, data)
+
+    def _import_records(self, name, records):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO records (collection, timestamp, data) VALUES (?, ?, ?)",
+                [(name, record.get("timestamp") if isinstance(record, dict) else None, json.dumps(record))
+                 for record in records],
+            )
+            self._bump_version(conn, name)
+
+    def _bump_version(self, conn, name):
+        # Bumped inside each write transaction, so other processes see it too
+        conn.execute("INSERT INTO versions (name, value) VALUES (?, 1) "
+                     "ON CONFLICT (name) DO UPDATE SET value = value + 1", (name,))
+
+    def version(self, name):
+        """Write counter of the collection, bumped by every write."""
+        row = self._connect().execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _connect(self):
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Record collections (append-only histories) ---
+    def load_records(self, name):
+        rows = self._connect().execute(
+            "SELECT data FROM records WHERE collection = ? ORDER BY id", (name,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def append_record(self, name, record):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO records (collection, timestamp, data) VALUES (?, ?, ?)",
+                (name, record.get("timestamp"), json.dumps(record)),
+            )
+            self._bump_version(conn, name)
+
+    # --- Documents (dicts keyed by id) ---
+    def load_document(self, name):
+        rows = self._connect().execute(
+            "SELECT key, data FROM documents WHERE name = ?", (name,)
+        ).fetchall()
+        return {key: json.loads(data) for key, data in rows}
+
+    def save_document(self, name, data):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM documents WHERE name = ?", (name,))
+            conn.executemany(
+                "INSERT INTO documents (name, key, data) VALUES (?, ?, ?)",
+                [(name, str(key), json.dumps(value)) for key, value in data.items()],
+            )
+            self._bump_version(conn, name)
+
+    def get_item(self, name, key):
+        row = self._connect().execute(
+            "SELECT data FROM documents WHERE name = ? AND key = ?", (name, str(key))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_item(self, name, key, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (name, key, data) VALUES (?, ?, ?)",
+                (name, str(key), json.dumps(value)),
+            )
+            self._bump_version(conn, name)
+
+    def update_item(self, name, key, update):
+        """Atomically replaces one item with update(old_value)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM documents WHERE name = ? AND key = ?", (name, str(key))
+            ).fetchone()
+            value = update(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (name, key, data) VALUES (?, ?, ?)",
+                (name, str(key), json.dumps(value)),
+            )
+            self._bump_version(conn, name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return value
+
+    # --- Monotonic IDs ---
+    def next_id(self, name, seed=None):
+        """Allocates the next ID from the counters table inside one write transaction."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+            if row:
+                current = row[0]
+            elif seed is not None:
+                current = seed()
+            else:
+                current = _max_int_key(self.load_document(name) or self.load_records(name))
+            conn.execute("INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)", (name, current + 1))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return current + 1
+
+
+BACKENDS = {
+    "jsonl": JsonlLogBackend,
+    "json": JsonFileBackend,
+    "sqlite": SqliteBackend,
+}
+
+_storage = None
+
+
+def get_storage():
+    """Returns the shared storage backend selected by FLEXA_STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+        _storage = BACKENDS[STORAGE_BACKEND]()
+    return _storage
+
+
+# --- Shortcuts used by the app modules ---
+def load_records(name):
+    return get_storage().load_records(name)
+
+
+def append_record(name, record):
+    get_storage().append_record(name, record)
+
+
+def load_document(name):
+    return get_storage().load_document(name)
+
+
+def save_document(name, data):
+    get_storage().save_document(name, data)
+
+
+def get_item(name, key):
+    return get_storage().get_item(name, key)
+
+
+def set_item(name, key, value):
+    get_storage().set_item(name, key, value)
+
+
+def update_item(name, key, update):
+    return get_storage().update_item(name, key, update)
+
+
+def next_id(name, seed=None):
+    return get_storage().next_id(name, seed)
+
+
+def version(name):
+    """Token that changes whenever the collection changes, in this process or another one."""
+    return get_storage().version(name)
@@ -1,21 +1,16 @@
 import stripe
-import json
 import os
 import datetime
 from dotenv import load_dotenv
+import storage
+import columnar_export
 
 # Load environment variables
 load_dotenv()
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
-# Payment history file
-os.makedirs("./database", exist_ok=True)
-payment_history_path = "./database/payment_history.json"
-
-# Ensure the payment history file exists
-if not os.path.exists(payment_history_path):
-    with open(payment_history_path, "w") as file:
-        json.dump([], file, indent=4)
+# Storage collection for payment history
+PAYMENT_HISTORY = "payment_history"
 
 # Mock users mapped to Stripe test accounts (Replace with real IDs)
 users = {
@@ -36,7 +31,7 @@ def process_payment(sender, receiver, amount):
             description=f"Payment from {sender} to {receiver} via Flexa"
         )
 
-        # Store Payment in JSON History
+        # Store Payment in History
         payment_data = {
             "transaction_id": payment.id,
             "timestamp": str(datetime.datetime.now()),
@@ -46,14 +41,12 @@ def process_payment(sender, receiver, amount):
             "status": "Completed"
         }
 
-        # Update the payment history
-        with open(payment_history_path, "r") as file:
-            history = json.load(file)
-        
-        history.append(payment_data)
-
-        with open(payment_history_path, "w") as file:
-            json.dump(history, file, indent=4)
+        # Update the payment history (also queues it for the Parquet copy); the money has moved by now,
+        # so a failed write is logged rather than reported as a failed payment
+        try:
+            columnar_export.append_record(PAYMENT_HISTORY, payment_data)
+        except Exception as e:
+            print(f"⚠ Payment {payment.id} went through but could not be saved to history: {e}")
 
         return {"success": True, "message": f"✅ Payment of ${amount} from {sender} to {receiver} was successful!", "payment_id": payment.id}
 
@@ -62,7 +55,4 @@ def process_payment(sender, receiver, amount):
 
 def get_payment_history():
     """Fetches the stored payment history."""
-    if os.path.exists(payment_history_path):
-        with open(payment_history_path, "r") as file:
-            return json.load(file)
-    return []
+    return storage.load_records(PAYMENT_HISTORY)
@@ -0,0 +1,157 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the HTTP services Flexa calls (Gemini, lottie.host), shared
+# by the bench_*.py scripts. reply(request) decides what each request gets; the
+# server adds the latency, injects 429/503 errors, streams server-sent events
+# and counts what it saw (requests, injected errors, most requests in flight).
+
+
+class Request:
+    """What the stub received: method, path, headers and the raw body."""
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class Events(list):
+    """A reply body sent as server-sent events (one JSON data: line each), spread evenly over the latency."""
+
+
+class StubServer:
+    """Threaded HTTP server on a free local port; url is its base URL.
+
+    reply(request) returns (status, body) or (status, body, headers), where
+    body is bytes, str, a JSON-serialisable dict / list or Events. latency is
+    seconds per request, or a function of the request. With error_rate, every
+    round(1 / error_rate)-th request is answered 429 or 503 instead.
+    """
+
+    def __init__(self, reply, latency=0.0, error_rate=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.reset()
+        handler = type("StubHandler", (_StubHandler,), {"stub": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        """Clears the counters."""
+        with self.lock:
+            self.requests = []
+            self.errors = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _start(self, request):
+        """Records the request; returns True when it should get an injected error."""
+        with self.lock:
+            self.requests.append(request)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.error_rate > 0 and len(self.requests) % round(1 / self.error_rate) == 0
+            self.errors += fail
+        return fail
+
+    def _finish(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, and chunked transfer for event streams
+    stub = None
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        stub = self.stub
+        request = Request(self.command, self.path, self.headers,
+                          self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        fail = stub._start(request)
+        try:
+            latency = stub.latency(request) if callable(stub.latency) else stub.latency
+            if fail:
+                time.sleep(latency)
+                self._send(random.choice([429, 503]), {"error": "try again"})
+                return
+            status, body, *headers = stub.reply(request)
+            if isinstance(body, Events):
+                self._send_events(status, body, latency / max(1, len(body)))
+            else:
+                time.sleep(latency)
+                self._send(status, body, *headers)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout or cancelled stream)
+        finally:
+            stub._finish()
+
+    def _send(self, status, body, headers=None):
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers.setdefault("Content-Type", "application/json")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_events(self, status, events, delay):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            time.sleep(delay)
+            data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def prompt_text(request):
+    """The text prompt of a Gemini generateContent request body."""
+    return request.json()["contents"][0]["parts"][0]["text"]
+
+
+def gemini_reply(text_for, chunk_size=40):
+    """reply for Gemini: text_for(request) is the model's answer, wrapped like generateContent.
+
+    streamGenerateContent requests get it as Events of chunk_size characters.
+    """
+    def candidates(text):
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+    def reply(request):
+        text = text_for(request)
+        if ":streamGenerateContent" in request.path:
+            return 200, Events(candidates(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size))
+        return 200, candidates(text)
+    return reply
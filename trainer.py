@@ -1,53 +1,38 @@
 import cv2
 import mediapipe as mp
-import numpy as np
-import math
 import time
-import json
 import os
+import pose_math
+import pose_pipeline
+import adaptive_pose
+import pose_pool
+import score_series
+import exercise_profiles
+import workout_rollups
+import columnar_export
+
+# Storage collection for workout history
+WORKOUT_HISTORY = "workout_history"
+
+# Capture, inference and rendering on separate threads (FLEXA_TRAINER_PIPELINE=0 runs them serially)
+PIPELINED = os.getenv("FLEXA_TRAINER_PIPELINE", "1") == "1"
+# Infer on a crop around the athlete and skip near-still frames (see adaptive_pose)
+ADAPTIVE = os.getenv("FLEXA_TRAINER_ADAPTIVE", "0") == "1"
+
+# MediaPipe Pose Estimation (models come from pose_pool, one per concurrent workout)
+mpDraw = mp.solutions.drawing_utils
+mpPose = mp.solutions.pose
 
-# Ensure database folder exists
-os.makedirs("./database", exist_ok=True)
+# Exercise profiles (joints, angle range, rep thresholds, calories per rep), see exercise_profiles
+WORKOUTS = exercise_profiles.PROFILES
 
-# File path for workout history
-WORKOUT_HISTORY_PATH = "./database/workout_history.json"
+def findAngle(img, points, p1, p2, p3, draw=True):
+    """Calculate the angle between three key points of a (33, 2) landmark array."""
+    angle = float(pose_math.joint_angles(points, p1, p2, p3))
+    x1, y1 = (int(v) for v in points[p1])
+    x2, y2 = (int(v) for v in points[p2])
+    x3, y3 = (int(v) for v in points[p3])
 
-# Initialize MediaPipe Pose Estimation
-mpDraw = mp.solutions.drawing_utils
-mpPose = mp.solutions.pose
-pose = mpPose.Pose()
-
-# Define exercise landmark mappings and calorie burn per rep
-WORKOUTS = {
-    "Bicep Curls": (11, 13, 15),  # Shoulder, Elbow, Wrist
-    "Squats": (24, 26, 28),       # Hip, Knee, Ankle
-    "Push-ups": (12, 14, 16),     # Shoulder, Elbow, Wrist
-    "Lunges": (24, 26, 28),       # Hip, Knee, Ankle
-    "Deadlifts": (24, 26, 28),    # Hip, Knee, Ankle
-    "Planks": (12, 14, 16),       # Shoulder, Elbow, Wrist
-    "Bench Press": (12, 14, 16)   # Shoulder, Elbow, Wrist
-}
-
-CALORIES_PER_REP = {
-    "Bicep Curls": 0.5,
-    "Squats": 0.8,
-    "Push-ups": 0.7,
-    "Lunges": 0.6,
-    "Deadlifts": 1.2,
-    "Planks": 0.3,
-    "Bench Press": 1.0
-}
-
-def findAngle(img, lmList, p1, p2, p3, draw=True):
-    """Calculate the angle between three key points."""
-    x1, y1 = lmList[p1][1:]
-    x2, y2 = lmList[p2][1:]
-    x3, y3 = lmList[p3][1:]
-    
-    angle = math.degrees(math.atan2(y3 - y2, x3 - x2) - math.atan2(y1 - y2, x1 - x2))
-    if angle < 0:
-        angle += 360
-    
     if draw:
         cv2.line(img, (x1, y1), (x2, y2), (255, 255, 255), 3)
         cv2.line(img, (x3, y3), (x2, y2), (255, 255, 255), 3)
@@ -59,103 +44,156 @@ def findAngle(img, lmList, p1, p2, p3, draw=True):
     
     return angle
 
-def track_exercise(exercise_name, rep_count):
-    """Track exercise reps using webcam & MediaPipe pose estimation."""
+def drawSkeleton(img, points):
+    """Draws the pose connections from a (33, 2) landmark array (adaptive mode has no MediaPipe result to draw)."""
+    for start, end in mpPose.POSE_CONNECTIONS:
+        cv2.line(img, tuple(int(v) for v in points[start]), tuple(int(v) for v in points[end]), (255, 255, 255), 2)
+
+def record_workout(exercise_name, count, average_score, **extra):
+    """Appends one session to workout history and returns the stored record."""
+    workout_data = {
+        "exercise_name": exercise_name,
+        "reps": int(count),
+        "score": round(average_score, 2),
+        "calories": round(WORKOUTS[exercise_name].calories_per_rep * int(count), 2) if exercise_name in WORKOUTS else 0,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **extra,
+    }
+    # Also updates the Parquet copy the history table reads and the progress charts' daily / weekly totals
+    workout_rollups.append_record(workout_data, lambda record: columnar_export.append_record(WORKOUT_HISTORY, record))
+    return workout_data
+
+def track_exercise(exercise_name, rep_count, source=0, pipelined=PIPELINED, headless=False, adaptive=ADAPTIVE,
+                   pose_config=None):
+    """Track exercise reps using webcam & MediaPipe pose estimation.
+
+    source is a camera index or a video file path (the pipelined mode plays
+    files at their own FPS, like a camera); headless skips the preview window,
+    so a video file can be scored on a server. adaptive runs the model on a
+    crop around the athlete and skips it while they are nearly still.
+    pose_config (a pose_pool.PoseConfig) picks model complexity and confidences.
+    """
     if exercise_name not in WORKOUTS:
         return {"success": False, "message": f"❌ Unsupported exercise: {exercise_name}"}
     
-    cap = cv2.VideoCapture(0)  # Open webcam
+    pool = pose_pool.get_pool()
+    try:
+        pose = pool.checkout(pose_config)
+    except TimeoutError:
+        return {"success": False, "message": "❌ All trainers are busy right now, try again in a moment."}
+    cap = cv2.VideoCapture(source)  # Open webcam (or video file)
+    is_file = isinstance(source, str)
     
-    pTime = 0  # Track FPS
-    dir = 0  # Movement direction (up/down)
-    count = 0  # Rep count
-    score_list = []  # Form score tracking
+    fps_clock = {"pTime": 0}  # Track FPS
+    profile = WORKOUTS[exercise_name]
+    counter = exercise_profiles.rep_counter(profile)  # Rep count + movement direction (up/down)
+    series = score_series.ScoreSeries()  # Per-frame form score + angle, bounded for long sessions
+    adaptive_model = adaptive_pose.AdaptivePose(pose) if adaptive else None
+    angle_fill = adaptive_pose.InterpolatedAngles()  # angles of skipped frames (adaptive mode)
     
     # Timer setup
     exercise_duration = rep_count * 8  # Each rep is ~8 seconds
     start_time = time.time()
     end_time = start_time + exercise_duration
+    session_clock = time.perf_counter()
 
-    while (time.time() - end_time) < 0:
+    def read_frame():
         success, img = cap.read()
-        if not success:
-            break
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = pose.process(imgRGB)
-
-        lmList = []
-        if results.pose_landmarks:
-            mpDraw.draw_landmarks(img, results.pose_landmarks, mpPose.POSE_CONNECTIONS)
-
-            # Extract pose landmarks
-            for id, lm in enumerate(results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                lmList.append([id, cx, cy])
+        return img if success else None
+
+    def track(points, inferred):
+        """Angle, score, series and rep count of one frame; runs in the inference stage so no frame is missed."""
+        angle = float(exercise_profiles.angles(profile, points))
+        seconds = time.perf_counter() - session_clock
+        if adaptive_model is not None:
+            # Skipped frames are scored once the next inference gives the angle to interpolate to
+            times, angles = angle_fill.infer(angle, seconds) if inferred else angle_fill.skip(seconds)
+            scores = exercise_profiles.scores(profile, angles)
+            series.extend(times, angles, scores)
+            return counter.update(scores)
+        per = float(exercise_profiles.scores(profile, angle))  # Normalize score
+        series.append(seconds, angle, per)
+        return counter.update(per)  # Half reps at 100 -> 0 -> 100
+
+    def infer(img):
+        if adaptive_model is not None:
+            points, inferred = adaptive_model.process(img)
+            return None if points is None else (None, points, track(points, inferred))
+        results = pose.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        if not results.pose_landmarks:
+            return None
+        # Extract pose landmarks as a (33, 2) pixel array
+        h, w, c = img.shape
+        points = pose_math.landmarks_to_array(results.pose_landmarks.landmark, w, h)
+        return results.pose_landmarks, points, track(points, True)
+
+    def render(img, result):
+        # Only draws: the pipeline may skip stale results here, tracking already happened in infer()
+        if result is not None:
+            landmarks, points, count = result
+            if landmarks is not None:
+                mpDraw.draw_landmarks(img, landmarks, mpPose.POSE_CONNECTIONS)
+            else:
+                drawSkeleton(img, points)
 
             # Exercise Tracking
-            if len(lmList) != 0:
-                p1, p2, p3 = WORKOUTS[exercise_name]
-                angle = findAngle(img, lmList, p1, p2, p3)
-                per = np.interp(angle, (60, 160), (100, 0))  # Normalize score
-                score_list.append(per)
-
-                if per == 100 and dir == 0:
-                    count += 0.5  # Half rep completed
-                    dir = 1
-                if per == 0 and dir == 1:
-                    count += 0.5  # Full rep completed
-                    dir = 0
-
-                # ✅ Only Display Rep Count (Removed "Reps" text)
-                cv2.putText(img, str(int(count)), (500, 75), cv2.FONT_HERSHEY_PLAIN, 5, (255, 0, 0), 5)
+            for p1, p2, p3 in profile.joints:
+                findAngle(img, points, p1, p2, p3)
+
+            # ✅ Only Display Rep Count (Removed "Reps" text)
+            cv2.putText(img, str(int(count)), (500, 75), cv2.FONT_HERSHEY_PLAIN, 5, (255, 0, 0), 5)
 
         # FPS Calculation
         cTime = time.time()
-        fps = 1 / (cTime - pTime)
-        pTime = cTime
+        fps = 1 / (cTime - fps_clock["pTime"])
+        fps_clock["pTime"] = cTime
 
         # Display Timer & FPS
         cv2.putText(img, f"FPS: {int(fps)}", (70, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
         cv2.putText(img, f"Time Left: {int(end_time - time.time())}", (70, 100), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
 
+        if headless:
+            return True
         cv2.imshow("Workout Tracker", img)
-
-        if cv2.waitKey(1) & 0xFF == 27:  # ESC key to exit
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
-
-    # Compute final score and calories burned
-    average_score = sum(score_list) / len(score_list) if score_list else 0
-    calories_burned = CALORIES_PER_REP.get(exercise_name, 0) * int(count)
-
-    # Save workout history to JSON
-    workout_data = {
-        "exercise_name": exercise_name,
-        "reps": int(count),
-        "score": round(average_score, 2),
-        "calories": round(calories_burned, 2),
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-    }
-
-    if os.path.exists(WORKOUT_HISTORY_PATH):
-        with open(WORKOUT_HISTORY_PATH, "r") as file:
-            history = json.load(file)
-    else:
-        history = []
-
-    history.append(workout_data)
-
-    with open(WORKOUT_HISTORY_PATH, "w") as file:
-        json.dump(history, file, indent=4)
+        return not (cv2.waitKey(1) & 0xFF == 27)  # ESC key to exit
+
+    # Webcam sessions end with the timer, video files when they run out
+    deadline = None if is_file else end_time
+    try:
+        if pipelined:
+            pace_fps = (cap.get(cv2.CAP_PROP_FPS) or 30) if is_file else None
+            pipeline_stats = pose_pipeline.PosePipeline(read_frame, infer, render, pace_fps=pace_fps).run(deadline)
+        else:
+            pipeline_stats = pose_pipeline.run_serial(read_frame, infer, render, deadline)
+    finally:
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+        pool.checkin(pose)
+    if adaptive_model is not None:
+        times, angles = angle_fill.flush()
+        pending_scores = exercise_profiles.scores(profile, angles)
+        series.extend(times, angles, pending_scores)
+        counter.update(pending_scores)
+        pipeline_stats["adaptive"] = adaptive_model.summary()
+    pipeline_stats["pose_pool"] = pool.stats()
+    count = counter.count
+
+    # Save the score series and its chart, then append the session to workout history
+    average_score = series.mean_score
+    series_id = score_series.new_series_id()
+    score_series.save(series_id, series)
+    chart_path = score_series.render_chart(series, os.path.join(score_series.SERIES_DIR, f"{series_id}.png"),
+                                           title=f"{exercise_name} Form Score")
+    workout_data = record_workout(exercise_name, count, average_score, series_id=series_id)
+    calories_burned = workout_data["calories"]
 
     return {
         "success": True,
-        "message": f"✅ Workout Completed: {int(count)} reps | Calories Burned: {round(calories_burned, 2)} kcal",
+        "message": f"✅ Workout Completed: {int(count)} reps | Calories Burned: {calories_burned} kcal",
         "reps": int(count),
-        "calories": round(calories_burned, 2),
+        "calories": calories_burned,
         "score": round(average_score, 2),
-        "chart_path": "./database/form_score_chart.png"
+        "chart_path": chart_path,
+        "pipeline": pipeline_stats
     }
@@ -0,0 +1,205 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import adaptive_pose
+import exercise_profiles
+import pose_math
+import pose_pool
+import score_series
+import trainer
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+FRAME_STRIDE = int(os.getenv("FLEXA_TRAINER_FRAME_STRIDE", "2"))
+
+
+def find_videos(source, exercise):
+    """(path, exercise) pairs from a directory, or from a manifest.
+
+    A .json manifest is a list of paths or of {"path", "exercise"} objects;
+    any other file lists one path per line. exercise is the default.
+    """
+    if os.path.isdir(source):
+        return [
+            (os.path.join(source, name), exercise) for name in sorted(os.listdir(source))
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r") as file:
+        if source.endswith(".json"):
+            entries = json.load(file)
+        else:
+            entries = [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    videos = []
+    for entry in entries:
+        path, video_exercise = (entry["path"], entry.get("exercise", exercise)) if isinstance(entry, dict) else (entry, exercise)
+        videos.append((path if os.path.isabs(path) else os.path.join(base_dir, path), video_exercise))
+    return videos
+
+
+def analyze_video(path, exercise_name, stride=FRAME_STRIDE, adaptive=False, pose=None, save_series=True):
+    """Scores one recorded session in a worker process with that worker's own Pose model.
+
+    Every stride-th frame is decoded and run through the model (skipped frames
+    are only grabbed, not decoded). The landmark arrays are then scored and
+    counted in one vectorised pass. With adaptive=True the model only sees a
+    crop around the athlete and is skipped on near-still frames, whose angles
+    are interpolated between the neighbouring inferred frames. save_series=False
+    (runs that don't record history) leaves series_id None and writes nothing.
+    """
+    import cv2
+
+    if exercise_name not in trainer.WORKOUTS:
+        raise ValueError(f"Unsupported exercise: {exercise_name}")
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    pool = pose_pool.get_pool() if pose is None else None
+    pose = pose or pool.checkout()
+    adaptive_model = adaptive_pose.AdaptivePose(pose) if adaptive else None
+
+    frames_read = 0
+    window = []  # landmark arrays of the inferred frames
+    inferred_at = []  # their frame numbers
+    pose_frames = []  # frame numbers with a pose, inferred or skipped (adaptive mode)
+    try:
+        while True:
+            if frames_read % stride:
+                if not cap.grab():
+                    break
+                frames_read += 1
+                continue
+            success, img = cap.read()
+            if not success:
+                break
+            frames_read += 1
+            if adaptive_model is not None:
+                points, inferred = adaptive_model.process(img)
+                if points is not None:
+                    pose_frames.append(frames_read)
+                    if inferred:
+                        inferred_at.append(frames_read)
+                        window.append(points)
+                continue
+            results = pose.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            if results.pose_landmarks:
+                h, w, c = img.shape
+                inferred_at.append(frames_read)
+                window.append(pose_math.landmarks_to_array(results.pose_landmarks.landmark, w, h))
+    finally:
+        cap.release()
+        if pool is not None:
+            pool.checkin(pose)
+
+    reps, average_score, series_id = 0.0, 0.0, None
+    profile = trainer.WORKOUTS[exercise_name]
+    if window and adaptive_model is not None:
+        angles = np.interp(pose_frames, inferred_at, exercise_profiles.angles(profile, np.stack(window)))
+        scores = exercise_profiles.scores(profile, angles)
+        reps = exercise_profiles.rep_counter(profile).update(scores)
+        average_score = float(scores.mean())
+    elif window:
+        angles, scores, reps = exercise_profiles.evaluate(profile, np.stack(window))
+        average_score = float(scores.mean())
+    if window and save_series:
+        # Saved here in the worker, so history can chart the session without re-reading the video
+        series = score_series.ScoreSeries()
+        series.extend(np.asarray(pose_frames if adaptive else inferred_at) / fps, angles, scores)
+        series_id = score_series.new_series_id()
+        score_series.save(series_id, series)
+    return {
+        "path": path,
+        "exercise_name": exercise_name,
+        "frames": frames_read,
+        "frames_analyzed": -(-frames_read // stride),
+        "frames_with_pose": len(pose_frames) if adaptive else len(window),
+        "inferences": adaptive_model.stats["inferred"] if adaptive else -(-frames_read // stride),
+        "pose_resets": adaptive_model.stats["resets"] if adaptive else 0,
+        "reps": int(reps),
+        "score": round(average_score, 2),
+        "series_id": series_id,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def analyze(videos, workers=None, stride=FRAME_STRIDE, save_history=True, on_result=None, adaptive=False):
+    """Scores many recorded sessions across a process pool (one Pose model per worker).
+
+    Each finished video is appended to workout history (source = the file path)
+    and passed to on_result(result). Returns a throughput report.
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+    failures = []
+    start = time.perf_counter()
+
+    # spawn: MediaPipe's graph threads don't survive fork; each worker warms its own pool instance
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=pose_pool.warm) as executor:
+        futures = {
+            executor.submit(analyze_video, path, exercise_name, stride, adaptive, save_series=save_history): path
+            for path, exercise_name in videos
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append({"path": futures[future], "error": str(e)})
+                continue
+            if save_history:
+                workout = trainer.record_workout(result["exercise_name"], result["reps"], result["score"],
+                                                 source=os.path.basename(result["path"]),
+                                                 series_id=result["series_id"])
+                result["calories"] = workout["calories"]
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    elapsed = time.perf_counter() - start
+    frames = sum(result["frames"] for result in results)
+    analyzed = sum(result["frames_analyzed"] for result in results)
+    inferences = sum(result["inferences"] for result in results)
+    return {
+        "videos": len(results),
+        "failed": len(failures),
+        "failures": failures,
+        "workers": workers,
+        "stride": stride,
+        "frames": frames,
+        "frames_analyzed": analyzed,
+        "inferences": inferences,
+        "elapsed_seconds": round(elapsed, 3),
+        "frames_per_second": round(frames / elapsed, 1) if elapsed else 0.0,
+        "analyzed_frames_per_second": round(analyzed / elapsed, 1) if elapsed else 0.0,
+        "videos_per_minute": round(len(results) / elapsed * 60, 2) if elapsed else 0.0,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score recorded workout videos in bulk")
+    parser.add_argument("source", help="Directory of videos or a manifest file")
+    parser.add_argument("--exercise", default="Squats", choices=list(trainer.WORKOUTS),
+                        help="Exercise for videos the manifest doesn't label")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--stride", type=int, default=FRAME_STRIDE, help="Run the model on every Nth frame")
+    parser.add_argument("--adaptive", action="store_true", help="Crop to the athlete and skip near-still frames")
+    parser.add_argument("--no-history", action="store_true", help="Don't write results to workout history")
+    args = parser.parse_args()
+
+    videos = find_videos(args.source, args.exercise)
+    print(f"🎥 Scoring {len(videos)} videos (stride {args.stride})...")
+    report = analyze(
+        videos, args.workers, args.stride, save_history=not args.no_history, adaptive=args.adaptive,
+        on_result=lambda result: print(f"✅ {result['path']}: {result['reps']} reps | score {result['score']}"),
+    )
+    report.pop("results")
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,210 @@
+import argparse
+import datetime
+import json
+import os
+
+import db_cache
+import storage
+
+# Daily and weekly totals of workout history, kept up to date as sessions are
+# recorded (trainer.record_workout goes through append_record()), so progress
+# charts read a few hundred buckets instead of re-parsing every session ever logged.
+# Buckets live in small partition documents, {period start "YYYY-MM-DD": {exercise_name: bucket}},
+# one per month of days and one per year of weeks (weeks start on Monday), so
+# recording a session rewrites a month of buckets at most. The index document
+# lists the partitions of each period.
+WORKOUT_HISTORY = "workout_history"
+ROLLUPS = "workout_rollups"
+PERIODS = ("day", "week")
+PARTITION_CHARS = {"day": 7, "week": 4}  # "YYYY-MM" / "YYYY" prefix of the period start
+META_KEY = "_meta"  # present once the rollups cover all of workout history (sessions at the last rebuild)
+
+# Most points a progress chart plots; longer ranges are coarsened (days -> weeks -> several weeks)
+CHART_POINTS = int(os.getenv("FLEXA_CHART_POINTS", "120"))
+
+COLUMNS = ["sessions", "reps", "calories", "score"]
+
+
+def period_start(timestamp, period):
+    """"YYYY-MM-DD" of the day / week (Monday) a "YYYY-MM-DD HH:MM:SS" timestamp falls in."""
+    day = str(timestamp)[:10]
+    if period == "day":
+        return day
+    date = datetime.date.fromisoformat(day)
+    return (date - datetime.timedelta(days=date.weekday())).isoformat()
+
+
+def _add_to_bucket(bucket, record):
+    bucket = dict(bucket or {"sessions": 0, "reps": 0, "calories": 0.0, "score_sum": 0.0})
+    bucket["sessions"] += 1
+    bucket["reps"] += int(record.get("reps") or 0)
+    bucket["calories"] = round(bucket["calories"] + float(record.get("calories") or 0), 2)
+    bucket["score_sum"] = round(bucket["score_sum"] + float(record.get("score") or 0), 2)
+    return bucket
+
+
+def partition(period, key):
+    """Storage document holding the bucket of this period start."""
+    return f"{ROLLUPS}/{period}_{key[:PARTITION_CHARS[period]]}"
+
+
+def build(records):
+    """{period: {period start: {exercise: bucket}}} for a list of workout records (full recompute)."""
+    rollups = {period: {} for period in PERIODS}
+    for record in records:
+        if not record.get("timestamp"):
+            continue
+        exercise = record.get("exercise_name", "")
+        for period, buckets in rollups.items():
+            by_exercise = buckets.setdefault(period_start(record["timestamp"], period), {})
+            by_exercise[exercise] = _add_to_bucket(by_exercise.get(exercise), record)
+    return rollups
+
+
+def _lock():
+    """Held while rebuilding and while a session is appended and added, so each is counted exactly once."""
+    return storage.file_lock(os.path.join(storage.DATABASE_DIR, ROLLUPS))
+
+
+def rebuild():
+    """Recomputes every partition from the full workout history; returns the number of sessions."""
+    with _lock():
+        return _rebuild()
+
+
+def _rebuild():
+    records = storage.load_records(WORKOUT_HISTORY)
+    index = {META_KEY: {"sessions": len(records)}}
+    for period, buckets in build(records).items():
+        partitions = {}
+        for key, by_exercise in buckets.items():
+            partitions.setdefault(partition(period, key), {})[key] = by_exercise
+        for name, data in partitions.items():
+            storage.save_document(name, data)
+        index[period] = sorted(partitions)
+    storage.save_document(ROLLUPS, index)
+    return len(records)
+
+
+def ensure_built():
+    """Backfills the rollups from existing history the first time; True if that happened."""
+    if META_KEY in db_cache.load_document(ROLLUPS):
+        return False
+    with _lock():
+        if META_KEY in storage.load_document(ROLLUPS):
+            return False  # another session finished the backfill while we waited
+        _rebuild()
+    return True
+
+
+def append_record(record, append=None):
+    """Appends a workout record to history with append(record) and folds it into the rollups.
+
+    append defaults to storage.append_record(WORKOUT_HISTORY, record). Both
+    happen under the lock rebuild() takes, so a concurrent rebuild either runs
+    before the append or sees the record already added, never counting it twice.
+    """
+    ensure_built()
+    with _lock():
+        if append is None:
+            storage.append_record(WORKOUT_HISTORY, record)
+        else:
+            append(record)
+        _add(record)
+
+
+def _add(record):
+    """Folds one newly appended workout record into its daily and weekly buckets."""
+    if not record.get("timestamp"):
+        return
+    exercise = record.get("exercise_name", "")
+    index = db_cache.load_document(ROLLUPS)
+    for period in PERIODS:
+        key = period_start(record["timestamp"], period)
+        name = partition(period, key)
+        storage.update_item(name, key, lambda by_exercise: {
+            **(by_exercise or {}), exercise: _add_to_bucket((by_exercise or {}).get(exercise), record)})
+        if name not in index.get(period, []):
+            storage.update_item(ROLLUPS, period, lambda names: sorted(set(names or []) | {name}))
+
+
+def load_buckets(period, start=None, end=None):
+    """{period start: {exercise: bucket}} from the partitions overlapping start..end ("YYYY-MM-DD")."""
+    buckets = {}
+    for name in db_cache.load_document(ROLLUPS).get(period, []):
+        prefix = name[-PARTITION_CHARS[period]:]
+        if (start and prefix < start[:len(prefix)]) or (end and prefix > end[:len(prefix)]):
+            continue
+        buckets.update(db_cache.load_document(name))
+    return buckets
+
+
+def _select(period, exercise, start, end):
+    """{period start: [bucket, ...]} in start..end, for one exercise or all of them."""
+    selected = {}
+    for key, by_exercise in load_buckets(period, start, end).items():
+        if (start and key < start) or (end and key > end):
+            continue
+        buckets = [by_exercise.get(exercise)] if exercise else list(by_exercise.values())
+        buckets = [bucket for bucket in buckets if bucket]
+        if buckets:
+            selected[key] = buckets
+    return selected
+
+
+def _frame(selected):
+    import pandas as pd
+
+    rows = {}
+    for key, buckets in selected.items():
+        sessions = sum(bucket["sessions"] for bucket in buckets)
+        rows[key] = (sessions, sum(bucket["reps"] for bucket in buckets),
+                     round(sum(bucket["calories"] for bucket in buckets), 2),
+                     round(sum(bucket["score_sum"] for bucket in buckets) / sessions, 2))
+    df = pd.DataFrame.from_dict(rows, orient="index", columns=COLUMNS)
+    df.index = pd.to_datetime(df.index)
+    return df.sort_index()
+
+
+def frame(period="day", exercise=None, start=None, end=None):
+    """DataFrame indexed by period start: sessions, reps, calories and average score.
+
+    Totals over all exercises unless exercise is given; start / end ("YYYY-MM-DD") bound the range.
+    """
+    ensure_built()
+    return _frame(_select(period, exercise, start, end))
+
+
+def coarsen(df, points):
+    """Merges consecutive rows into at most points bins (sums totals, session-weighted average score)."""
+    if points is None or len(df) <= points:
+        return df
+    size = -(-len(df) // points)
+    group = [i // size for i in range(len(df))]
+    weighted = df.assign(score=df["score"] * df["sessions"])
+    binned = weighted.groupby(group).agg({"sessions": "sum", "reps": "sum", "calories": "sum", "score": "sum"})
+    binned["score"] = (binned["score"] / binned["sessions"]).round(2)
+    binned.index = df.index[::size]
+    return binned
+
+
+def chart_frame(exercise=None, start=None, end=None, points=CHART_POINTS):
+    """(period label, DataFrame) for a progress chart: daily buckets if they fit in points, else weekly, coarsened further if needed."""
+    ensure_built()
+    daily = _select("day", exercise, start, end)
+    if points is None or len(daily) <= points:
+        return "Day", _frame(daily)
+    weekly = _frame(_select("week", exercise, start, end))
+    if len(weekly) <= points:
+        return "Week", weekly
+    size = -(-len(weekly) // points)
+    return f"{size} weeks", coarsen(weekly, points)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the workout history rollups")
+    parser.parse_args()
+    sessions = rebuild()
+    index = storage.load_document(ROLLUPS)
+    print(json.dumps({"sessions": sessions, **{f"{period}_partitions": len(index[period]) for period in PERIODS}},
+                     indent=4))